@@ -0,0 +1,188 @@
+import datetime
+
+import numpy as np
+
+from armazenamento import datetime_to_micros, EPOCH, UM_MICROSSEGUNDO
+from utilizacao import inicio_do_periodo, PERIODOS
+
+# ---------------------------------------------------------------------------------------
+# AnaliseVetorizada - colunas NumPy dos aluguéis para relatórios de faturamento e rankings
+# ---------------------------------------------------------------------------------------
+# As datas são guardadas como microssegundos desde 1970-01-01 no horário "de parede"
+# (armazenamento.datetime_to_micros), o mesmo usado no resto do sistema. Os períodos
+# (dia, semana começando na segunda, mês) são os de utilizacao.py.
+MICROS_POR_DIA = 86_400_000_000
+
+def chaves_periodo(dias, periodo):
+    """
+    Converte um array de dias desde 1970-01-01 em chaves inteiras de período.
+    """
+    if periodo == "dia":
+        return dias
+    if periodo == "semana":
+        # 1970-01-01 foi uma quinta-feira: +3 dias alinha as semanas na segunda
+        return (dias + 3) // 7
+    return dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+def inicio_periodo(chave, periodo):
+    """
+    Data (datetime.date) em que começa o período com a chave dada (ver chaves_periodo).
+    """
+    chave = int(chave)
+    if periodo == "mes":
+        # Meses desde 1970-01
+        dia = datetime.datetime(1970 + chave // 12, chave % 12 + 1, 1)
+    elif periodo == "semana":
+        # Um dia qualquer da semana (a chave é (dias + 3) // 7)
+        dia = EPOCH + datetime.timedelta(days=chave * 7)
+    else:
+        dia = EPOCH + datetime.timedelta(days=chave)
+    return inicio_do_periodo(dia, periodo).date()
+
+class AnaliseVetorizada:
+    """
+    Mantém as colunas dos aluguéis (data_retirada, vehicle_id, código do cpf,
+    valor_total e dias) em arrays NumPy e responde aos relatórios com
+    searchsorted/bincount. refresh() acrescenta apenas os aluguéis novos.
+    """
+    def __init__(self, capacidade=1024):
+        self._n = 0
+        self._retirada = np.empty(capacidade, dtype=np.int64)
+        self._vehicle_id = np.empty(capacidade, dtype=np.int64)
+        self._cpf = np.empty(capacidade, dtype=np.int64)
+        self._valor_total = np.empty(capacidade, dtype=np.float64)
+        self._dias = np.empty(capacidade, dtype=np.int64)
+        self._cpf_codes = {}      # cpf -> código inteiro
+        self._cpfs = []           # código -> cpf
+        self._ultimo_id = 0       # maior rental_id já incluído
+        self._ordenado = True
+
+    def __len__(self):
+        return self._n
+
+    def _garantir_capacidade(self, extra):
+        necessario = self._n + extra
+        capacidade = len(self._retirada)
+        if necessario <= capacidade:
+            return
+        while capacidade < necessario:
+            capacidade *= 2
+        for nome in ("_retirada", "_vehicle_id", "_cpf", "_valor_total", "_dias"):
+            antigo = getattr(self, nome)
+            novo = np.empty(capacidade, dtype=antigo.dtype)
+            novo[:self._n] = antigo[:self._n]
+            setattr(self, nome, novo)
+
+    def extend(self, rentals):
+        """
+        Acrescenta aluguéis às colunas (em qualquer ordem).
+        """
+        rentals = list(rentals)
+        if not rentals:
+            return
+        self._garantir_capacidade(len(rentals))
+        ini = self._n
+        fim = ini + len(rentals)
+        codes = self._cpf_codes
+        cpf_col = []
+        for r in rentals:
+            code = codes.get(r["cpf"])
+            if code is None:
+                code = codes[r["cpf"]] = len(self._cpfs)
+                self._cpfs.append(r["cpf"])
+            cpf_col.append(code)
+        self._retirada[ini:fim] = [datetime_to_micros(r["data_retirada"]) for r in rentals]
+        self._vehicle_id[ini:fim] = [r["vehicle_id"] for r in rentals]
+        self._cpf[ini:fim] = cpf_col
+        self._valor_total[ini:fim] = [r["valor_total"] for r in rentals]
+        self._dias[ini:fim] = [r["dias"] for r in rentals]
+        if ini > 0 and self._retirada[ini - 1] > self._retirada[ini]:
+            self._ordenado = False
+        elif np.any(np.diff(self._retirada[ini:fim]) < 0):
+            self._ordenado = False
+        self._n = fim
+        self._ultimo_id = max(self._ultimo_id, max(r["rental_id"] for r in rentals))
+
+    def refresh(self, rentals):
+        """
+        Acrescenta os aluguéis com rental_id maior que o último incluído.
+        `rentals` está em ordem de rental_id (como CarRentalSystem.rentals),
+        então só o final da lista é percorrido.
+        """
+        inicio = len(rentals)
+        while inicio > 0 and rentals[inicio - 1]["rental_id"] > self._ultimo_id:
+            inicio -= 1
+        self.extend(rentals[inicio:])
+
+    def _ordenar(self):
+        if self._ordenado:
+            return
+        ordem = np.argsort(self._retirada[:self._n], kind="stable")
+        for nome in ("_retirada", "_vehicle_id", "_cpf", "_valor_total", "_dias"):
+            col = getattr(self, nome)
+            col[:self._n] = col[:self._n][ordem]
+        self._ordenado = True
+
+    def _fatia(self, inicio, fim):
+        """
+        Retorna o slice das linhas com data_retirada em [inicio, fim).
+        """
+        self._ordenar()
+        ret = self._retirada[:self._n]
+        lo = 0 if inicio is None else int(np.searchsorted(ret, datetime_to_micros(inicio), side="left"))
+        hi = self._n if fim is None else int(np.searchsorted(ret, datetime_to_micros(fim), side="left"))
+        return slice(lo, hi)
+
+    # ------------------ Relatórios ------------------
+    def faturamento(self, inicio, fim, periodo="dia"):
+        """
+        Soma de valor_total por período ("dia", "semana" ou "mes") em [inicio, fim).
+        Retorna (labels, values): labels são datetime.date do início de cada período
+        (semanas começam na segunda-feira) e values um array com todos os períodos,
+        inclusive os sem aluguel. Levanta ValueError se inicio não for anterior a fim.
+        """
+        if periodo not in PERIODOS:
+            raise ValueError(f"Período inválido: {periodo!r}. Use {', '.join(PERIODOS)}.")
+        if not inicio < fim:
+            raise ValueError(f"Intervalo inválido: {inicio} não é anterior a {fim}.")
+        s = self._fatia(inicio, fim)
+        dias = self._retirada[s] // MICROS_POR_DIA
+        chaves = chaves_periodo(dias, periodo)
+        (primeira, ultima) = chaves_periodo(
+            np.array([(inicio - EPOCH).days, (fim - UM_MICROSSEGUNDO - EPOCH).days]),
+            periodo)
+        tamanho = int(ultima - primeira) + 1
+        values = np.bincount(chaves - primeira, weights=self._valor_total[s], minlength=tamanho)
+        labels = [inicio_periodo(primeira + i, periodo) for i in range(tamanho)]
+        return (labels, values)
+
+    def _top(self, coluna, inicio, fim, n):
+        s = self._fatia(inicio, fim)
+        valores = coluna[s]
+        if len(valores) == 0:
+            return []
+        contagens = np.bincount(valores)
+        # Ordem decrescente de contagem; empates pelo menor código
+        ordem = np.argsort(-contagens, kind="stable")[:n]
+        return [(int(i), int(contagens[i])) for i in ordem if contagens[i] > 0]
+
+    def top_veiculos(self, inicio, fim, n=5):
+        """
+        Retorna [(vehicle_id, quantidade)] dos n veículos mais alugados em [inicio, fim).
+        """
+        return self._top(self._vehicle_id[:self._n], inicio, fim, n)
+
+    def top_clientes(self, inicio, fim, n=5):
+        """
+        Retorna [(cpf, quantidade)] dos n clientes com mais aluguéis em [inicio, fim).
+        """
+        return [(self._cpfs[code], count)
+                for (code, count) in self._top(self._cpf[:self._n], inicio, fim, n)]
+
+    def media_dias(self, inicio, fim):
+        """
+        Duração média contratada (dias) dos aluguéis retirados em [inicio, fim), ou 0.0.
+        """
+        s = self._fatia(inicio, fim)
+        dias = self._dias[s]
+        return float(dias.mean()) if len(dias) else 0.0
@@ -0,0 +1,1255 @@
+import copy
+import datetime
+import gc
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+
+# ---------------------------------------------------------------------------------------
+# Funções auxiliares para lidar com datas (datetime <-> string ISO-8601 e microssegundos)
+# ---------------------------------------------------------------------------------------
+# Os microssegundos são contados desde 1970-01-01 no horário "de parede" (datetime sem
+# fuso), o mesmo das strings ISO; usados pelo formato binário e por analise.py.
+EPOCH = datetime.datetime(1970, 1, 1)
+UM_MICROSSEGUNDO = datetime.timedelta(microseconds=1)
+
+def datetime_to_str(dt):
+    return dt.isoformat() if dt else None
+
+def str_to_datetime(s):
+    return datetime.datetime.fromisoformat(s) if s else None
+
+def datetime_to_micros(dt):
+    return (dt - EPOCH) // UM_MICROSSEGUNDO
+
+RENTAL_FIELDS = ("rental_id", "vehicle_id", "nome_cliente", "user_alugou", "cpf", "whatsapp",
+                 "dias", "valor_por_dia", "valor_total", "data_retirada",
+                 "data_devolucao_estimada", "data_devolucao_efetiva")
+
+class Rental:
+    """
+    Registro compacto de um aluguel. Usa __slots__ em vez de um dict por aluguel
+    e compartilha (sys.intern) as strings que se repetem entre aluguéis do mesmo
+    cliente/usuário. Mantém o acesso por chave usado no resto do sistema:
+    r["cpf"], r["data_devolucao_efetiva"] = ..., r.get("nome_cliente", "").
+    """
+    __slots__ = RENTAL_FIELDS
+
+    def __init__(self, rental_id, vehicle_id, nome_cliente, user_alugou, cpf, whatsapp,
+                 dias, valor_por_dia, valor_total, data_retirada,
+                 data_devolucao_estimada, data_devolucao_efetiva=None):
+        self.rental_id = rental_id
+        self.vehicle_id = vehicle_id
+        self.nome_cliente = sys.intern(nome_cliente or "")
+        self.user_alugou = sys.intern(user_alugou)
+        self.cpf = sys.intern(cpf)
+        self.whatsapp = sys.intern(whatsapp)
+        self.dias = dias
+        self.valor_por_dia = valor_por_dia
+        self.valor_total = valor_total
+        self.data_retirada = data_retirada
+        self.data_devolucao_estimada = data_devolucao_estimada
+        self.data_devolucao_efetiva = data_devolucao_efetiva
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in RENTAL_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in RENTAL_FIELDS
+
+    def __iter__(self):
+        return iter(RENTAL_FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, (Rental, dict)):
+            return all(self[k] == other.get(k) for k in RENTAL_FIELDS)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Rental({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in RENTAL_FIELDS else default
+
+    def keys(self):
+        return RENTAL_FIELDS
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in RENTAL_FIELDS]
+
+    def to_dict(self):
+        return dict(self.items())
+
+def rental_to_json(r):
+    return {
+        "rental_id": r["rental_id"],
+        "vehicle_id": r["vehicle_id"],
+        "nome_cliente": r.get("nome_cliente", ""),
+        "user_alugou": r["user_alugou"],
+        "cpf": r["cpf"],
+        "whatsapp": r["whatsapp"],
+        "dias": r["dias"],
+        "valor_por_dia": r["valor_por_dia"],
+        "valor_total": r["valor_total"],
+        "data_retirada": datetime_to_str(r["data_retirada"]),
+        "data_devolucao_estimada": datetime_to_str(r["data_devolucao_estimada"]),
+        "data_devolucao_efetiva":  datetime_to_str(r["data_devolucao_efetiva"])
+    }
+
+def rental_from_json(r):
+    return Rental(
+        r["rental_id"],
+        r["vehicle_id"],
+        r.get("nome_cliente", ""),
+        r["user_alugou"],
+        r["cpf"],
+        r["whatsapp"],
+        r["dias"],
+        r["valor_por_dia"],
+        r["valor_total"],
+        str_to_datetime(r["data_retirada"]),
+        str_to_datetime(r["data_devolucao_estimada"]),
+        str_to_datetime(r["data_devolucao_efetiva"])
+    )
+
+RESERVATION_FIELDS = ("reserva_id", "vehicle_id", "nome_cliente", "user_reservou", "cpf", "whatsapp",
+                      "valor_por_dia", "inicio", "fim", "status", "rental_id")
+RESERVATION_DATES = ("inicio", "fim")
+
+def reservation_to_json(b):
+    d = {campo: b.get(campo) for campo in RESERVATION_FIELDS}
+    for campo in RESERVATION_DATES:
+        d[campo] = datetime_to_str(d[campo])
+    return d
+
+def reservation_from_json(d):
+    b = {campo: d.get(campo) for campo in RESERVATION_FIELDS}
+    for campo in RESERVATION_DATES:
+        b[campo] = str_to_datetime(b[campo])
+    return b
+
+# Tipos de registro gravados pelo CarRentalSystem: ("u", usuário), ("v", veículo), ("r", aluguel),
+# ("b", reserva). Cada registro é um upsert identificado pela chave do seu tipo.
+RECORD_KEYS = {"u": "username", "v": "id", "r": "rental_id", "b": "reserva_id"}
+
+# Conversão dos registros com datas para JSON e de volta
+RECORD_TO_JSON = {"r": rental_to_json, "b": reservation_to_json}
+RECORD_FROM_JSON = {"r": rental_from_json, "b": reservation_from_json}
+
+# ---------------------------------------------------------------------------------------
+# Trava entre processos e gravação atômica de arquivos
+# ---------------------------------------------------------------------------------------
+try:
+    import fcntl
+
+    def _lock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_fd(fd):
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK desiste após ~10 s; continua esperando
+                continue
+
+    def _unlock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+class FileLock:
+    """
+    Trava exclusiva consultiva (advisory) em <arquivo>.lock, compartilhada por
+    todas as instâncias que usam o mesmo arquivo de dados. É reentrante e também
+    serializa as threads do mesmo processo.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._rlock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                _lock_fd(self._fd)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._rlock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_fd(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        self._rlock.release()
+
+def _fsync_dir(path):
+    # Garante que a troca de nomes (os.replace) também chegou ao disco
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_atomic(path, write, binary=False):
+    """
+    Grava em um arquivo temporário, força para o disco (fsync) e o coloca no
+    lugar de `path` com os.replace: uma queda nunca deixa o arquivo pela metade.
+    `write` recebe o arquivo temporário aberto em modo texto (ou binário, se `binary`).
+    Retorna o tamanho gravado em bytes.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with (open(tmp_path, "wb") if binary else open(tmp_path, "w", encoding="utf-8")) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(path)
+    return size
+
+def file_id(path):
+    """
+    Identifica uma versão de um arquivo (inode, mtime, tamanho), ou None se não existe.
+    Um os.replace sempre produz uma identificação nova.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+# ---------------------------------------------------------------------------------------
+# JsonStorage - snapshot JSON + journal (write-ahead log)
+# ---------------------------------------------------------------------------------------
+# Cada linha do journal é um upsert: {"t": "u"|"v"|"r"|"b", "d": {...}}
+
+# Quantidade de registros no journal que dispara a compactação em segundo plano
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+def read_snapshot(path):
+    """
+    Lê o snapshot JSON e devolve as tabelas {"u", "v", "r", "b"} como dicts indexados
+    pela chave de cada tipo (mantendo a ordem original).
+    """
+    tables = {"u": {}, "v": {}, "r": {}, "b": {}}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for t, nome in (("u", "users"), ("v", "vehicles"), ("r", "rentals"), ("b", "reservations")):
+            key = RECORD_KEYS[t]
+            for item in data.get(nome, []):
+                tables[t][item[key]] = item
+    return tables
+
+def read_journal(path, offset=0):
+    """
+    Lê os registros completos de um journal a partir de `offset` (em bytes).
+    Retorna (registros, bytes consumidos). Uma última linha incompleta
+    (queda no meio da escrita) não é consumida.
+    """
+    records = []
+    consumed = 0
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return (records, consumed)
+    with f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            consumed += len(line)
+    return (records, consumed)
+
+def replay_journal(path, tables, decode=False):
+    """
+    Aplica os registros de um arquivo de journal sobre as tabelas (convertendo
+    aluguéis e reservas para objetos Python se `decode`).
+    Retorna (quantidade de registros aplicados, tamanho válido em bytes).
+    """
+    (records, valid_size) = read_journal(path)
+    for rec in records:
+        (t, d) = (rec["t"], rec["d"])
+        if decode and t in RECORD_FROM_JSON:
+            d = RECORD_FROM_JSON[t](d)
+        tables[t][d[RECORD_KEYS[t]]] = d
+    return (len(records), valid_size)
+
+def write_snapshot(path, users, vehicles, rentals, reservations=()):
+    """
+    Grava o snapshot completo de forma atômica (ver write_atomic).
+    """
+    data = {
+        "users": users,
+        "vehicles": vehicles,
+        "rentals": rentals,
+        "reservations": list(reservations)
+    }
+    return write_atomic(path, lambda f: json.dump(data, f, indent=4, ensure_ascii=False))
+
+def write_json_file(path, data):
+    return write_atomic(path, lambda f: json.dump(data, f, ensure_ascii=False, separators=(",", ":")))
+
+class JsonStorage:
+    """
+    Snapshot em JSON (<arquivo>) mais um journal só de acréscimos (<arquivo>.journal).
+    Cada operação grava apenas um registro no journal; o journal é incorporado
+    ao snapshot em segundo plano.
+
+    Várias instâncias podem usar o mesmo arquivo: toda escrita acontece sob a
+    trava <arquivo>.lock, e sync() devolve os registros gravados pelas outras
+    instâncias desde a última leitura (seguindo o journal mesmo quando ele é
+    rotacionado e compactado por outra instância).
+    """
+    def __init__(self, json_file_path, compact_threshold=JOURNAL_COMPACT_THRESHOLD):
+        self.json_file_path = json_file_path
+        self.journal_path = json_file_path + ".journal"
+        self.compacting_path = json_file_path + ".journal.compactando"
+        # Último journal compactado (mantido para quem ainda não o leu até o fim)
+        # e a sua descrição {"ino", "tamanho", "snapshot"} (ver _compact)
+        self.previous_path = json_file_path + ".journal.anterior"
+        self.compacted_path = json_file_path + ".journal.compactado"
+        # Derivado do nome completo: data.json e data.bin no mesmo diretório não se misturam
+        self.aggregates_path = json_file_path + ".agregados.json"
+        self.compact_threshold = compact_threshold
+        self._lock = FileLock(json_file_path + ".lock")
+        self._journal = None
+        self._journal_count = 0
+        self._compact_thread = None
+        self.bytes_written = 0        # total gravado por esta instância (métricas)
+        # Até onde esta instância já leu: versão do snapshot e (inode, bytes) do journal
+        self._snapshot_id = None
+        self._journal_ino = None
+        self._journal_offset = 0
+        self._finished_ino = None     # journal rotacionado que já foi lido até o fim
+
+    def lock(self):
+        return self._lock
+
+    def load(self):
+        """
+        Carrega o snapshot JSON e reaplica os journals pendentes
+        (um journal em compactação interrompida e o journal atual).
+        Retorna (users, vehicles, rentals, reservations).
+        """
+        with self._lock:
+            self._snapshot_id = file_id(self.json_file_path)
+            tables = self._read_tables(self.json_file_path)
+            self._replay(self.compacting_path, tables)
+            (self._journal_count, valid_size) = self._replay(self.journal_path, tables)
+            jid = file_id(self.journal_path)
+            if jid is not None and jid[2] > valid_size:
+                # Descarta o final incompleto para que os próximos registros fiquem legíveis
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_size)
+            self._journal_ino = jid[0] if jid is not None else None
+            self._journal_offset = valid_size
+            cid = file_id(self.compacting_path)
+            self._finished_ino = cid[0] if cid is not None else None
+
+            # Compactação que não terminou na última execução
+            if os.path.exists(self.compacting_path):
+                self.start_compaction()
+
+        return self._from_tables(tables)
+
+    # ------------------ Formato do snapshot ------------------
+    # As subclasses (BinaryStorage) trocam só estes métodos; journal, travas,
+    # sync e compactação são os mesmos
+    def _read_tables(self, path):
+        return read_snapshot(path)
+
+    def _replay(self, path, tables):
+        return replay_journal(path, tables)
+
+    def _from_tables(self, tables):
+        return (list(tables["u"].values()),
+                list(tables["v"].values()),
+                [rental_from_json(r) for r in tables["r"].values()],
+                [reservation_from_json(b) for b in tables["b"].values()])
+
+    def _write_tables(self, path, tables):
+        return write_snapshot(path,
+                              list(tables["u"].values()),
+                              list(tables["v"].values()),
+                              list(tables["r"].values()),
+                              list(tables["b"].values()))
+
+    def _write_objects(self, path, users, vehicles, rentals, reservations):
+        return write_snapshot(path, users, vehicles,
+                              [rental_to_json(r) for r in rentals],
+                              [reservation_to_json(b) for b in reservations])
+
+    def sync(self):
+        """
+        Retorna os registros (tipo, dados) gravados por outras instâncias desde a
+        última leitura, ou None quando é preciso recarregar tudo (snapshot regravado
+        por save() ou compactado antes de lermos o journal até o fim).
+        """
+        with self._lock:
+            records = self._read_external()
+        if records is None:
+            return None
+        return [(rec["t"], RECORD_FROM_JSON[rec["t"]](rec["d"]) if rec["t"] in RECORD_FROM_JSON
+                 else rec["d"]) for rec in records]
+
+    def _read_external(self):
+        # Chamado sob a trava
+        records = []
+        snapshot_id = file_id(self.json_file_path)
+        if snapshot_id != self._snapshot_id:
+            # O snapshot mudou: só dá para continuar se foi a compactação de um
+            # journal que já lemos por inteiro
+            marker = None
+            if os.path.exists(self.compacted_path):
+                with open(self.compacted_path, "r", encoding="utf-8") as f:
+                    marker = json.load(f)
+            if marker is None or marker["snapshot"] != list(snapshot_id or ()):
+                return None
+            if marker["ino"] == self._journal_ino:
+                pid = file_id(self.previous_path)
+                if pid is None or pid[0] != self._journal_ino:
+                    return None
+                (rest, _) = read_journal(self.previous_path, self._journal_offset)
+                records.extend(rest)
+                self._finished_ino = self._journal_ino
+                self._journal_ino = None
+                self._journal_offset = 0
+            elif marker["ino"] != self._finished_ino:
+                return None
+            self._snapshot_id = snapshot_id
+
+        jid = file_id(self.journal_path)
+        if self._journal_ino is not None and (jid is None or jid[0] != self._journal_ino):
+            # Nosso journal foi rotacionado: o restante dele está no arquivo em compactação
+            cid = file_id(self.compacting_path)
+            if cid is None or cid[0] != self._journal_ino:
+                return None
+            (rest, _) = read_journal(self.compacting_path, self._journal_offset)
+            records.extend(rest)
+            self._finished_ino = self._journal_ino
+            self._journal_ino = None
+            self._journal_offset = 0
+        elif self._journal_ino is None:
+            # Um journal inteiro pode ter sido criado e rotacionado por outra instância
+            # entre dois sync(): ainda não lido, ele está no arquivo em compactação
+            cid = file_id(self.compacting_path)
+            if cid is not None and cid[0] != self._finished_ino and (jid is None or cid[0] != jid[0]):
+                (rest, _) = read_journal(self.compacting_path)
+                records.extend(rest)
+                self._finished_ino = cid[0]
+        if jid is not None:
+            if self._journal_ino is None:
+                self._journal_ino = jid[0]
+                self._journal_offset = 0
+            (novos, consumed) = read_journal(self.journal_path, self._journal_offset)
+            records.extend(novos)
+            self._journal_offset += consumed
+        return records
+
+    def append(self, *records):
+        """
+        Acrescenta um ou mais registros (tipo, dados) ao journal.
+        O custo não depende do tamanho do histórico.
+        """
+        lines = []
+        for (t, d) in records:
+            if t in RECORD_TO_JSON:
+                d = RECORD_TO_JSON[t](d)
+            lines.append(json.dumps({"t": t, "d": d}, ensure_ascii=False, separators=(",", ":")))
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with self._lock:
+            jid = file_id(self.journal_path)
+            if self._journal is not None and (jid is None or os.fstat(self._journal.fileno()).st_ino != jid[0]):
+                # Outra instância rotacionou ou apagou o journal: abre o atual
+                self._journal.close()
+                self._journal = None
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab")
+            end = self._journal.seek(0, os.SEEK_END)
+            self._journal.write(data)
+            self.bytes_written += len(data)
+            self._journal.flush()
+            ino = os.fstat(self._journal.fileno()).st_ino
+            if (self._journal_ino, self._journal_offset) in ((ino, end), (None, 0)) and \
+                    (self._journal_ino is not None or end == 0):
+                # Estávamos em dia com o journal: nossos registros não voltam em sync()
+                self._journal_ino = ino
+                self._journal_offset = end + len(data)
+            self._journal_count += len(records)
+            if self._journal_count >= self.compact_threshold:
+                self.start_compaction()
+
+    def start_compaction(self):
+        """
+        Rotaciona o journal e o incorpora ao snapshot em uma thread separada.
+        """
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return
+            if not os.path.exists(self.compacting_path):
+                if self._journal is not None:
+                    self._journal.close()
+                    self._journal = None
+                jid = file_id(self.journal_path)
+                if jid is None:
+                    return
+                os.replace(self.journal_path, self.compacting_path)
+                if (self._journal_ino, self._journal_offset) == (jid[0], jid[2]):
+                    # Já lemos o journal inteiro; o próximo começa do zero
+                    self._finished_ino = self._journal_ino
+                    self._journal_ino = None
+                    self._journal_offset = 0
+                self._journal_count = 0
+            self._compact_thread = threading.Thread(target=self._compact, daemon=True)
+            self._compact_thread.start()
+
+    def _compact(self):
+        """
+        Incorpora o journal rotacionado ao snapshot. A leitura e a gravação do novo
+        snapshot acontecem fora da trava; a troca só é feita se nenhuma outra
+        instância mexeu no snapshot ou no journal rotacionado nesse meio tempo.
+        """
+        with self._lock:
+            snapshot_id = file_id(self.json_file_path)
+            compacting_id = file_id(self.compacting_path)
+        if compacting_id is None:
+            return
+        tables = self._read_tables(self.json_file_path)
+        (_, valid_size) = self._replay(self.compacting_path, tables)
+        # Único por thread (como em write_atomic): duas instâncias do mesmo processo
+        # podem compactar ao mesmo tempo, cada uma na sua thread
+        tmp_path = f"{self.json_file_path}.{os.getpid()}.{threading.get_ident()}.compactando.tmp"
+        size = self._write_tables(tmp_path, tables)
+        with self._lock:
+            self.bytes_written += size
+            if file_id(self.json_file_path) != snapshot_id or file_id(self.compacting_path) != compacting_id:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                return
+            os.replace(tmp_path, self.json_file_path)
+            _fsync_dir(self.json_file_path)
+            write_json_file(self.compacted_path, {
+                "ino": compacting_id[0],
+                "tamanho": valid_size,
+                "snapshot": list(file_id(self.json_file_path)),
+            })
+            os.replace(self.compacting_path, self.previous_path)
+
+    def wait_compaction(self):
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+            self._compact_thread = None
+
+    def save(self, users, vehicles, rentals, reservations=()):
+        """
+        Grava o snapshot completo e descarta os journals.
+        As outras instâncias recarregam tudo no próximo sync().
+        """
+        self.wait_compaction()
+        with self._lock:
+            self.bytes_written += self._write_objects(self.json_file_path, users, vehicles,
+                                                      rentals, reservations)
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            for path in (self.compacting_path, self.journal_path, self.previous_path, self.compacted_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal_count = 0
+            self._snapshot_id = file_id(self.json_file_path)
+            self._journal_ino = None
+            self._journal_offset = 0
+            self._finished_ino = None
+
+    def load_aggregates(self):
+        """
+        Retorna os agregados gravados por save_aggregates (ou None).
+        """
+        if not os.path.exists(self.aggregates_path):
+            return None
+        with open(self.aggregates_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_aggregates(self, data):
+        with self._lock:
+            self.bytes_written += write_json_file(self.aggregates_path, data)
+
+    def flush(self):
+        # Cada append já chega ao arquivo (o journal é esvaziado a cada escrita)
+        pass
+
+    def close(self):
+        """
+        Aguarda a compactação em andamento e fecha o journal.
+        """
+        self.wait_compaction()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+# ---------------------------------------------------------------------------------------
+# Snapshot binário (.bin)
+# ---------------------------------------------------------------------------------------
+# Layout (little-endian):
+#   cabeçalho  "ALGB", versão (u16), reservado (u16), CRC32 do corpo (u32) e as
+#              quantidades de strings, usuários, veículos, aluguéis e reservas (u32 cada)
+#   strings    tamanho de cada string em caracteres (u32 × n), tamanho do bloco (u32)
+#              e o bloco UTF-8 com todas as strings concatenadas
+#   registros  usuários, veículos, aluguéis e reservas, nessa ordem; cada registro é
+#              o seu tamanho em bytes (u32) seguido dos campos de tamanho fixo
+# Strings são gravadas como índices (u32) na tabela de strings, com 0 = None: cada
+# valor diferente (cpf, nome, usuário) aparece uma vez só no arquivo. Datas são int64
+# com os microssegundos desde 1970-01-01 no mesmo horário local, sem fuso, das
+# strings ISO do JSON; DATA_NULA (o NaT do numpy) representa None.
+BINARY_MAGIC = b"ALGB"
+BINARY_VERSION = 1
+BINARY_EXTENSIONS = (".bin",)
+BINARY_HEADER = struct.Struct("<4sHHIIIIII")
+BINARY_USER = struct.Struct("<IIII")            # tamanho, username, password, role
+BINARY_VEHICLE = struct.Struct("<IIIIIIBB")     # tamanho, id, nome, marca, ano, placa,
+                                                # ano inteiro?, disponivel
+BINARY_RENTAL = struct.Struct("<IIIIIIIIddqqq")  # tamanho, RENTAL_FIELDS na ordem
+BINARY_RESERVATION = struct.Struct("<IIIIIIIdqqII")  # tamanho, RESERVATION_FIELDS na ordem
+                                                     # (rental_id 0 = None)
+DATA_NULA = -2 ** 63
+
+def _datetime_to_epoch(dt):
+    return DATA_NULA if dt is None else datetime_to_micros(dt)
+
+def _epochs_to_datetimes(valores):
+    # Com numpy a conversão da coluna inteira é feita em C (NaT vira None)
+    try:
+        import numpy
+    except ImportError:
+        return [None if us == DATA_NULA else EPOCH + datetime.timedelta(0, 0, us) for us in valores]
+    return numpy.array(valores, dtype=numpy.int64).view("datetime64[us]").tolist()
+
+def _binary_columns(formato, dados, n):
+    """
+    Lê n registros de `formato` em `dados` e retorna uma lista por campo
+    (a primeira com os tamanhos, que são conferidos).
+    """
+    try:
+        import numpy
+    except ImportError:
+        colunas = [list(c) for c in zip(*formato.iter_unpack(dados))]
+        colunas = colunas or [[] for _ in formato.unpack(bytes(formato.size))]
+        corrompido = any(tamanho != formato.size - 4 for tamanho in colunas[0])
+    else:
+        # Os registros têm tamanho fixo: o numpy lê cada campo como uma coluna, em C
+        tipos = numpy.dtype([(f"c{i}", "<" + c) for (i, c) in enumerate(formato.format.lstrip("<"))])
+        registros = numpy.frombuffer(dados, dtype=tipos, count=n)
+        corrompido = bool((registros["c0"] != formato.size - 4).any())
+        colunas = [registros[nome].tolist() for nome in tipos.names]
+    if corrompido:
+        raise ValueError("Snapshot binário corrompido (registro de tamanho inesperado).")
+    return colunas
+
+def encode_binary_snapshot(users, vehicles, rentals, reservations=()):
+    """
+    Codifica as quatro tabelas no formato binário. Retorna os bytes do arquivo.
+    """
+    indices = {None: 0}
+    strings = []
+
+    def ref(texto):
+        i = indices.get(texto)
+        if i is None:
+            i = indices[texto] = len(indices)
+            strings.append(texto)
+        return i
+
+    ts = _datetime_to_epoch
+    (pack_u, tam_u) = (BINARY_USER.pack, BINARY_USER.size - 4)
+    (pack_v, tam_v) = (BINARY_VEHICLE.pack, BINARY_VEHICLE.size - 4)
+    (pack_r, tam_r) = (BINARY_RENTAL.pack, BINARY_RENTAL.size - 4)
+    (pack_b, tam_b) = (BINARY_RESERVATION.pack, BINARY_RESERVATION.size - 4)
+    registros = [pack_u(tam_u, ref(u["username"]), ref(u["password"]), ref(u["role"]))
+                 for u in users]
+    registros += [pack_v(tam_v, v["id"], ref(v["nome"]), ref(v["marca"]), ref(str(v["ano"])),
+                         ref(v["placa"]), isinstance(v["ano"], int), bool(v["disponivel"]))
+                  for v in vehicles]
+    registros += [pack_r(tam_r, r["rental_id"], r["vehicle_id"], ref(r["nome_cliente"]),
+                         ref(r["user_alugou"]), ref(r["cpf"]), ref(r["whatsapp"]), r["dias"],
+                         r["valor_por_dia"], r["valor_total"], ts(r["data_retirada"]),
+                         ts(r["data_devolucao_estimada"]), ts(r["data_devolucao_efetiva"]))
+                  for r in rentals]
+    reservations = list(reservations)
+    registros += [pack_b(tam_b, b["reserva_id"], b["vehicle_id"], ref(b["nome_cliente"]),
+                         ref(b["user_reservou"]), ref(b["cpf"]), ref(b["whatsapp"]),
+                         b["valor_por_dia"], ts(b["inicio"]), ts(b["fim"]), ref(b["status"]),
+                         b["rental_id"] or 0)
+                  for b in reservations]
+    texto = "".join(strings).encode("utf-8")
+    corpo = b"".join([struct.pack(f"<{len(strings)}I", *map(len, strings)),
+                      struct.pack("<I", len(texto)), texto] + registros)
+    cabecalho = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, zlib.crc32(corpo),
+                                   len(strings), len(users), len(vehicles), len(rentals),
+                                   len(reservations))
+    return cabecalho + corpo
+
+def decode_binary_snapshot(data):
+    """
+    Decodifica os bytes gravados por encode_binary_snapshot nas tabelas
+    {"u", "v", "r", "b"} indexadas pela chave de cada tipo, já com aluguéis
+    (Rental) e reservas prontos para uso. Levanta ValueError se o arquivo não
+    for um snapshot binário, for de outra versão ou estiver corrompido.
+    """
+    if len(data) < BINARY_HEADER.size:
+        raise ValueError("Snapshot binário incompleto.")
+    (magic, versao, _, crc, n_str, n_u, n_v, n_r, n_b) = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError("O arquivo não é um snapshot binário.")
+    if versao != BINARY_VERSION:
+        raise ValueError(f"Versão de snapshot binário não suportada: {versao}.")
+    corpo = memoryview(data)[BINARY_HEADER.size:]
+    if zlib.crc32(corpo) != crc:
+        raise ValueError("Snapshot binário corrompido (CRC não confere).")
+    try:
+        tamanhos = struct.unpack_from(f"<{n_str}I", corpo)
+        pos = 4 * n_str
+        (n_bytes,) = struct.unpack_from("<I", corpo, pos)
+        pos += 4
+        texto = str(corpo[pos:pos + n_bytes], "utf-8")
+        pos += n_bytes
+    except struct.error as e:
+        raise ValueError(f"Snapshot binário corrompido ({e}).") from None
+
+    def registros(formato, n):
+        nonlocal pos
+        fim = pos + formato.size * n
+        if fim > len(corpo):
+            raise ValueError("Snapshot binário incompleto.")
+        colunas = _binary_columns(formato, corpo[pos:fim], n)
+        pos = fim
+        return colunas
+
+    # Os objetos criados aqui não formam ciclos: o coletor de ciclos só
+    # atrasaria a carga, varrendo-os repetidas vezes enquanto são criados
+    gc_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        s = [None]
+        i = 0
+        for n in tamanhos:
+            s.append(sys.intern(texto[i:i + n]))
+            i += n
+        ref = s.__getitem__
+
+        (_, username, password, role) = registros(BINARY_USER, n_u)
+        users = [{"username": s[a], "password": s[b], "role": s[c]}
+                 for (a, b, c) in zip(username, password, role)]
+        (_, *colunas) = registros(BINARY_VEHICLE, n_v)
+        vehicles = [{"id": vid, "nome": s[nome], "marca": s[marca],
+                     "ano": int(s[ano]) if ano_int else s[ano], "placa": s[placa],
+                     "disponivel": bool(disp)}
+                    for (vid, nome, marca, ano, placa, ano_int, disp) in zip(*colunas)]
+        (_, rental_id, vehicle_id, nome, user, cpf, whatsapp, dias, valor_por_dia, valor_total,
+         *datas) = registros(BINARY_RENTAL, n_r)
+        rentals = list(map(Rental, rental_id, vehicle_id, map(ref, nome), map(ref, user),
+                           map(ref, cpf), map(ref, whatsapp), dias, valor_por_dia, valor_total,
+                           *map(_epochs_to_datetimes, datas)))
+        (_, *colunas) = registros(BINARY_RESERVATION, n_b)
+        (colunas[7], colunas[8]) = map(_epochs_to_datetimes, colunas[7:9])
+        reservations = [{"reserva_id": bid, "vehicle_id": vid, "nome_cliente": s[nome],
+                         "user_reservou": s[user], "cpf": s[cpf], "whatsapp": s[whatsapp],
+                         "valor_por_dia": valor, "inicio": inicio, "fim": fim,
+                         "status": s[status], "rental_id": rental_id or None}
+                        for (bid, vid, nome, user, cpf, whatsapp, valor, inicio, fim, status,
+                             rental_id) in zip(*colunas)]
+        tables = {
+            "u": {u["username"]: u for u in users},
+            "v": {v["id"]: v for v in vehicles},
+            "r": dict(zip(rental_id, rentals)),
+            "b": {b["reserva_id"]: b for b in reservations},
+        }
+    finally:
+        if gc_ativo:
+            gc.enable()
+    return tables
+
+def read_binary_snapshot(path):
+    """
+    Lê o snapshot binário (tabelas vazias se o arquivo não existe).
+    """
+    if not os.path.exists(path):
+        return {"u": {}, "v": {}, "r": {}, "b": {}}
+    with open(path, "rb") as f:
+        return decode_binary_snapshot(f.read())
+
+def write_binary_snapshot(path, users, vehicles, rentals, reservations=()):
+    """
+    Grava o snapshot binário de forma atômica. Retorna o tamanho em bytes.
+    """
+    data = encode_binary_snapshot(users, vehicles, rentals, reservations)
+    return write_atomic(path, lambda f: f.write(data), binary=True)
+
+class BinaryStorage(JsonStorage):
+    """
+    O mesmo snapshot + journal do JsonStorage (journal em JSON, travas, sync e
+    compactação), com o snapshot no formato binário: as tabelas guardam
+    aluguéis e reservas já como objetos, e os registros do journal são
+    convertidos ao serem reaplicados.
+    """
+    def _read_tables(self, path):
+        return read_binary_snapshot(path)
+
+    def _replay(self, path, tables):
+        return replay_journal(path, tables, decode=True)
+
+    def _from_tables(self, tables):
+        return tuple(list(tables[t].values()) for t in ("u", "v", "r", "b"))
+
+    def _write_tables(self, path, tables):
+        return write_binary_snapshot(path, *(list(tables[t].values()) for t in ("u", "v", "r", "b")))
+
+    def _write_objects(self, path, users, vehicles, rentals, reservations):
+        return write_binary_snapshot(path, users, vehicles, rentals, reservations)
+
+# ---------------------------------------------------------------------------------------
+# SqliteStorage - tabelas e índices em um banco SQLite
+# ---------------------------------------------------------------------------------------
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vehicles (
+    id         INTEGER PRIMARY KEY,
+    nome       TEXT,
+    marca      TEXT,
+    ano        TEXT,
+    placa      TEXT NOT NULL,
+    disponivel INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rentals (
+    rental_id               INTEGER PRIMARY KEY,
+    vehicle_id              INTEGER NOT NULL,
+    nome_cliente            TEXT,
+    user_alugou             TEXT,
+    cpf                     TEXT,
+    whatsapp                TEXT,
+    dias                    INTEGER,
+    valor_por_dia           REAL,
+    valor_total             REAL,
+    data_retirada           TEXT NOT NULL,
+    data_devolucao_estimada TEXT,
+    data_devolucao_efetiva  TEXT
+);
+-- Aluguéis em aberto, lidos a cada sync() (SqliteStorage._mark_synced)
+CREATE INDEX IF NOT EXISTS idx_rentals_abertos ON rentals (rental_id)
+    WHERE data_devolucao_efetiva IS NULL;
+CREATE TABLE IF NOT EXISTS reservations (
+    reserva_id    INTEGER PRIMARY KEY,
+    vehicle_id    INTEGER NOT NULL,
+    nome_cliente  TEXT,
+    user_reservou TEXT,
+    cpf           TEXT,
+    whatsapp      TEXT,
+    valor_por_dia REAL,
+    inicio        TEXT NOT NULL,
+    fim           TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    rental_id     INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+def rental_from_row(row):
+    (rental_id, vehicle_id, nome_cliente, user_alugou, cpf, whatsapp, dias, valor_por_dia,
+     valor_total, data_retirada, data_devolucao_estimada, data_devolucao_efetiva) = row
+    return Rental(rental_id, vehicle_id, nome_cliente, user_alugou, cpf, whatsapp,
+                  dias, valor_por_dia, valor_total,
+                  str_to_datetime(data_retirada),
+                  str_to_datetime(data_devolucao_estimada),
+                  str_to_datetime(data_devolucao_efetiva))
+
+SQLITE_UPSERT = {
+    "u": "INSERT OR REPLACE INTO users (username, password, role) VALUES (?, ?, ?)",
+    "v": "INSERT OR REPLACE INTO vehicles (id, nome, marca, ano, placa, disponivel) "
+         "VALUES (?, ?, ?, ?, ?, ?)",
+    "r": f"INSERT OR REPLACE INTO rentals ({', '.join(RENTAL_FIELDS)}) "
+         f"VALUES ({', '.join('?' * len(RENTAL_FIELDS))})",
+    "b": f"INSERT OR REPLACE INTO reservations ({', '.join(RESERVATION_FIELDS)}) "
+         f"VALUES ({', '.join('?' * len(RESERVATION_FIELDS))})",
+}
+
+class SqliteStorage:
+    """
+    Guarda usuários, veículos, aluguéis e reservas em tabelas SQLite. É só um
+    formato de armazenamento: o CarRentalSystem carrega tudo e responde às
+    consultas pelos índices e agregados em memória, como nos outros formatos.
+    As tabelas são lidas pela chave primária; o único índice extra é o dos
+    aluguéis em aberto, usado por sync().
+
+    Várias instâncias podem usar o mesmo banco: lock() serializa as mutações
+    entre processos e sync() devolve o que as outras gravaram.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        self._lock = FileLock(db_path + ".lock")
+        self._data_version = None
+        self._generation = 0
+        self._max_rental_id = 0
+        self._open_ids = set()
+        # Estimativa do volume enviado ao banco (texto pelo tamanho, números como 8 bytes)
+        self.bytes_written = 0
+
+    def lock(self):
+        return self._lock
+
+    def _read_generation(self):
+        # Incrementada a cada save(), que substitui o banco inteiro
+        row = self.conn.execute("SELECT valor FROM meta WHERE chave = 'geracao'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _mark_synced(self):
+        # Guarda a versão do banco vista por esta conexão e os aluguéis já conhecidos
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self._generation = self._read_generation()
+        self._max_rental_id = self.conn.execute(
+            "SELECT COALESCE(MAX(rental_id), 0) FROM rentals").fetchone()[0]
+        self._open_ids = {rid for (rid,) in self.conn.execute(
+            "SELECT rental_id FROM rentals WHERE data_devolucao_efetiva IS NULL")}
+
+    def sync(self):
+        """
+        Retorna os registros (tipo, dados) gravados por outras conexões desde a
+        última leitura: usuários, veículos e reservas completos, aluguéis novos e
+        aluguéis que estavam em aberto e foram devolvidos; ou None se o banco foi
+        substituído por save(). PRAGMA data_version só muda quando outra
+        conexão grava, então sem mudanças nada é lido.
+        """
+        with self._lock:
+            if self.conn.execute("PRAGMA data_version").fetchone()[0] == self._data_version:
+                return []
+            if self._read_generation() != self._generation:
+                return None
+            (users, vehicles, _, reservations) = self.load(rentals=False)
+            records = ([("u", u) for u in users] + [("v", v) for v in vehicles]
+                       + [("b", b) for b in reservations])
+            known_open = self._open_ids
+            rows = self.conn.execute(
+                f"SELECT {', '.join(RENTAL_FIELDS)} FROM rentals WHERE rental_id > ? "
+                f"OR (data_devolucao_efetiva IS NOT NULL AND rental_id IN "
+                f"(SELECT value FROM json_each(?))) ORDER BY rental_id",
+                (self._max_rental_id, json.dumps(sorted(known_open))))
+            records.extend(("r", rental_from_row(row)) for row in rows)
+            self._mark_synced()
+            return records
+
+    def load(self, rentals=True):
+        users = [{"username": u, "password": p, "role": role}
+                 for (u, p, role) in self.conn.execute(
+                     "SELECT username, password, role FROM users ORDER BY rowid")]
+        vehicles = [{"id": vid, "nome": nome, "marca": marca, "ano": ano,
+                     "placa": placa, "disponivel": bool(disp)}
+                    for (vid, nome, marca, ano, placa, disp) in self.conn.execute(
+                        "SELECT id, nome, marca, ano, placa, disponivel FROM vehicles ORDER BY id")]
+        reservations = [reservation_from_json(dict(zip(RESERVATION_FIELDS, row)))
+                        for row in self.conn.execute(
+                            f"SELECT {', '.join(RESERVATION_FIELDS)} FROM reservations "
+                            f"ORDER BY reserva_id")]
+        if not rentals:
+            return (users, vehicles, None, reservations)
+        rentals = [rental_from_row(row) for row in self.conn.execute(
+            f"SELECT {', '.join(RENTAL_FIELDS)} FROM rentals ORDER BY rental_id")]
+        self._mark_synced()
+        return (users, vehicles, rentals, reservations)
+
+    @staticmethod
+    def _row(t, d):
+        if t == "u":
+            return (d["username"], d["password"], d["role"])
+        if t == "v":
+            return (d["id"], d["nome"], d["marca"], d["ano"], d["placa"], int(d["disponivel"]))
+        if t == "b":
+            b = reservation_to_json(d)
+            return tuple(b[campo] for campo in RESERVATION_FIELDS)
+        r = rental_to_json(d)
+        return tuple(r[campo] for campo in RENTAL_FIELDS)
+
+    def _upsert_many(self, records):
+        # Um executemany por tabela; dentro de cada tabela a ordem dos registros é mantida
+        rows = {t: [] for t in SQLITE_UPSERT}
+        for (t, d) in records:
+            rows[t].append(self._row(t, d))
+        for (t, sql) in SQLITE_UPSERT.items():
+            if rows[t]:
+                self.conn.executemany(sql, rows[t])
+                self.bytes_written += sum(len(x) if isinstance(x, str) else 8
+                                          for row in rows[t] for x in row)
+
+    def append(self, *records):
+        """
+        Grava os registros (tipo, dados) em uma única transação.
+        """
+        with self._lock, self.conn:
+            self._upsert_many(records)
+        for (t, d) in records:
+            if t == "r":
+                self._max_rental_id = max(self._max_rental_id, d["rental_id"])
+                if d["data_devolucao_efetiva"] is None:
+                    self._open_ids.add(d["rental_id"])
+                else:
+                    self._open_ids.discard(d["rental_id"])
+
+    def save(self, users, vehicles, rentals, reservations=()):
+        """
+        Substitui todo o conteúdo do banco.
+        """
+        with self._lock, self.conn:
+            for tabela in ("users", "vehicles", "rentals", "reservations"):
+                self.conn.execute(f"DELETE FROM {tabela}")
+            self._upsert_many([("u", u) for u in users] +
+                              [("v", v) for v in vehicles] +
+                              [("r", r) for r in rentals] +
+                              [("b", b) for b in reservations])
+            self.conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('geracao', ?)",
+                              (str(self._read_generation() + 1),))
+        self._mark_synced()
+
+    def load_aggregates(self):
+        row = self.conn.execute("SELECT valor FROM meta WHERE chave = 'agregados'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_aggregates(self, data):
+        valor = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('agregados', ?)",
+                              (valor,))
+        self.bytes_written += len(valor)
+
+    def flush(self):
+        # Cada append já é uma transação confirmada
+        pass
+
+    def close(self):
+        self.conn.close()
+
+# ---------------------------------------------------------------------------------------
+# GroupCommitStorage - gravação agrupada em uma thread separada
+# ---------------------------------------------------------------------------------------
+# Atraso máximo (segundos) entre uma mutação e a sua gravação em disco
+GROUP_COMMIT_MAX_DELAY = 0.5
+
+class GroupCommitStorage:
+    """
+    Envolve outro armazenamento (JsonStorage, SqliteStorage...). append() apenas
+    marca os registros como pendentes; uma thread de gravação junta as mutações
+    de uma rajada e grava o lote no máximo `max_delay` segundos depois da primeira.
+    Registros repetidos do mesmo item (ex.: o mesmo veículo alugado e devolvido)
+    são gravados uma vez só, com o estado mais recente.
+    flush() grava tudo o que está pendente e espera terminar.
+    """
+    def __init__(self, storage, max_delay=GROUP_COMMIT_MAX_DELAY):
+        self.storage = storage
+        self.max_delay = max_delay
+        self._pending = {}           # (tipo, chave) -> cópia do registro
+        self._first_pending = None   # instante da mutação pendente mais antiga
+        self._writing = False
+        self._flush_requested = False
+        self._closed = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="gravacao-agrupada", daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        # Consultas e atributos específicos do armazenamento envolvido
+        return getattr(self.storage, name)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def load(self):
+        self.flush()
+        return self.storage.load()
+
+    def append(self, *records):
+        """
+        Enfileira os registros sem tocar no disco. Os registros são copiados
+        para que a thread de gravação não leia um item sendo alterado.
+        """
+        with self._cond:
+            self._raise_error()
+            for (t, d) in records:
+                self._pending[(t, d[RECORD_KEYS[t]])] = (t, copy.copy(d))
+            if self._first_pending is None:
+                self._first_pending = time.monotonic()
+                self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Espera o prazo para juntar a rajada de mutações (ou um flush)
+                deadline = self._first_pending + self.max_delay
+                while not (self._closed or self._flush_requested):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending
+                self._pending = {}
+                self._first_pending = None
+                self._writing = True
+            try:
+                self.storage.append(*batch.values())
+            except Exception as e:
+                with self._cond:
+                    # Devolve o lote à fila sem sobrescrever registros mais novos
+                    batch.update(self._pending)
+                    self._pending = batch
+                    if self._first_pending is None:
+                        self._first_pending = time.monotonic()
+                    self._error = e
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+            if self._error is not None and not self._closed:
+                # Evita repetir uma gravação com erro em ciclo apertado
+                time.sleep(self.max_delay)
+
+    def flush(self):
+        """
+        Grava imediatamente os registros pendentes e espera a gravação terminar.
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            try:
+                while (self._pending or self._writing) and self._error is None and self._thread.is_alive():
+                    self._cond.wait()
+            finally:
+                self._flush_requested = False
+            self._raise_error()
+        self.storage.flush()
+
+    def save(self, users, vehicles, rentals, reservations=()):
+        self.flush()
+        self.storage.save(users, vehicles, rentals, reservations)
+
+    def load_aggregates(self):
+        self.flush()
+        return self.storage.load_aggregates()
+
+    def save_aggregates(self, data):
+        self.flush()
+        self.storage.save_aggregates(data)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.storage.close()
+
+# ---------------------------------------------------------------------------------------
+# Escolha do armazenamento pela extensão do arquivo
+# ---------------------------------------------------------------------------------------
+def open_storage(path, compact_threshold=JOURNAL_COMPACT_THRESHOLD):
+    """
+    .db / .sqlite / .sqlite3 -> SqliteStorage; .bin -> BinaryStorage;
+    qualquer outra extensão -> JsonStorage.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in SQLITE_EXTENSIONS:
+        return SqliteStorage(path)
+    if ext in BINARY_EXTENSIONS:
+        return BinaryStorage(path, compact_threshold=compact_threshold)
+    return JsonStorage(path, compact_threshold=compact_threshold)
+
+def convert_storage(src, dst):
+    """
+    Copia todos os dados de `src` para `dst`, cada um no formato da sua extensão
+    (ex.: data.json -> data.bin e de volta). Substitui o conteúdo de `dst`, junto
+    com os agregados gravados e o histórico mensal (<dst>.historico, cujas
+    partições têm o mesmo formato para qualquer extensão).
+    Retorna as quantidades (users, vehicles, rentals, reservations) do arquivo principal.
+    """
+    # Uma base nova pode ter só o journal, ainda sem snapshot
+    if not any(os.path.exists(src + sufixo) for sufixo in ("", ".journal", ".journal.compactando")):
+        raise FileNotFoundError(f"Arquivo não encontrado: {src}")
+    if os.path.abspath(src) == os.path.abspath(dst):
+        raise ValueError("Origem e destino são o mesmo arquivo.")
+    origem = open_storage(src)
+    try:
+        dados = origem.load()
+        agregados = origem.load_aggregates()
+    finally:
+        origem.close()
+    # Sem o histórico, os rental_id arquivados voltariam a ser usados no destino
+    from historico import historico_dir
+    shutil.rmtree(historico_dir(dst), ignore_errors=True)
+    if os.path.isdir(historico_dir(src)):
+        shutil.copytree(historico_dir(src), historico_dir(dst))
+    destino = open_storage(dst)
+    try:
+        destino.save(*dados)
+        if agregados is not None:
+            destino.save_aggregates(agregados)
+    finally:
+        destino.close()
+    return tuple(len(itens) for itens in dados)
@@ -0,0 +1,211 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from armazenamento import open_storage
+from gerador import gravar_dados
+from sistema_de_alugueis import CarRentalSystem
+
+# ---------------------------------------------------------------------------------------
+# Benchmarks do CarRentalSystem em bases sintéticas (ver gerador.py)
+# ---------------------------------------------------------------------------------------
+# Para cada tamanho e armazenamento, mede a carga, a gravação completa, as mutações
+# e as consultas da Visão Geral. O resultado é um JSON com a mediana (ms) de cada
+# operação, que pode ser comparado com uma execução anterior (--comparar), e o
+# tamanho do arquivo de cada base.
+TAMANHOS = (1_000, 100_000, 1_000_000)
+ARMAZENAMENTOS = (".json", ".bin", ".db")
+
+def medir(func, repeticoes):
+    """
+    Executa func() `repeticoes` vezes e retorna a mediana em milissegundos.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+def bench_base(path, alugueis, repeticoes=20, semente=42):
+    """
+    Gera uma base com `alugueis` aluguéis em `path` e mede cada operação.
+    Retorna {operação: mediana em ms}.
+    """
+    # ~8 dias por aluguel em 2 anos: ~90 aluguéis por veículo sem sobreposição
+    veiculos = max(50, alugueis // 50)
+    gravar_dados(path, veiculos=veiculos, alugueis=alugueis,
+                 inicio=datetime.datetime.now() - datetime.timedelta(days=730), semente=semente)
+    resultados = {}
+
+    def ler_armazenamento():
+        storage = open_storage(path)
+        try:
+            storage.load()
+        finally:
+            storage.close()
+
+    # Só o armazenamento (ler e decodificar o arquivo), sem montar os índices
+    resultados["storage_load"] = medir(ler_armazenamento, 1 if alugueis >= 100_000 else 3)
+
+    inicio = time.perf_counter()
+    system = CarRentalSystem(path)
+    resultados["load_data"] = (time.perf_counter() - inicio) * 1000
+    system.login("admin", "admin")
+    try:
+        resultados["save_data"] = medir(system.save_data, 1 if alugueis >= 100_000 else 3)
+
+        livres = [v["id"] for v in system.vehicles if v["disponivel"]][:repeticoes]
+        abertos = []
+
+        def alugar():
+            system.rent_vehicle(livres[len(abertos)], "Cliente Benchmark", "00000000000",
+                                "", 3, 120.0)
+            abertos.append(system.rentals[-1]["rental_id"])
+
+        def devolver():
+            system.return_vehicle(abertos.pop())
+
+        resultados["rent_vehicle"] = medir(alugar, len(livres))
+        resultados["return_vehicle"] = medir(devolver, len(livres))
+        system.flush()
+
+        consultas = {
+            "list_open_rentals": system.list_open_rentals,
+            "list_overdue_rentals": system.list_overdue_rentals,
+            "list_rentals_last_7_days": system.list_rentals_last_7_days,
+            "list_rentals_current_week": system.list_rentals_current_week,
+            "get_top_5_veiculos_mes": system.get_top_5_veiculos_mes,
+            "get_top_5_clientes_mes": system.get_top_5_clientes_mes,
+            "get_7days_faturamento": system.get_7days_faturamento,
+            "search_vehicles": lambda: system.search_vehicles(marca="Fiat", placa="AAA1",
+                                                              disponivel=True),
+            "search_vehicles_texto": lambda: system.search_vehicles("hb 2020"),
+            "free_vehicles": lambda: system.free_vehicles(
+                datetime.datetime.now() + datetime.timedelta(days=7),
+                datetime.datetime.now() + datetime.timedelta(days=10)),
+            "utilization_report": system.utilization_report,
+        }
+        for (nome, func) in consultas.items():
+            resultados[nome] = medir(func, repeticoes)
+
+        # A Visão Geral de ponta a ponta: o snapshot (thread do Tk) e o cálculo dos
+        # painéis que a tela faz em segundo plano, sem montar a figura do gráfico
+        try:
+            from interface import calcular_visao_geral
+        except ImportError:
+            calcular_visao_geral = None
+        if calcular_visao_geral is not None:
+            def visao_geral():
+                fila = queue.SimpleQueue()
+                calcular_visao_geral(system.dashboard_snapshot(), fila, 0, criar_figura=False)
+                while not fila.empty():
+                    (_, painel, valor) = fila.get()
+                    if painel == "erro":
+                        raise valor
+
+            resultados["dashboard_snapshot"] = medir(system.dashboard_snapshot, repeticoes)
+            resultados["calcular_visao_geral"] = medir(visao_geral, repeticoes)
+
+        try:
+            analise = system.get_analytics()
+        except ImportError:
+            analise = None
+        if analise is not None:
+            fim = datetime.datetime.now()
+            ini = fim - datetime.timedelta(days=730)
+            resultados["analise_faturamento_mensal_2_anos"] = medir(
+                lambda: analise.faturamento(ini, fim, "mes"), repeticoes)
+            resultados["analise_top_clientes_2_anos"] = medir(
+                lambda: analise.top_clientes(ini, fim), repeticoes)
+    finally:
+        system.close()
+    return {nome: round(ms, 4) for (nome, ms) in resultados.items()}
+
+def executar(tamanhos=TAMANHOS, armazenamentos=ARMAZENAMENTOS, repeticoes=20, semente=42,
+             progresso=None):
+    """
+    Roda bench_base para cada tamanho e armazenamento em um diretório temporário.
+    Retorna o dicionário de resultados (o mesmo gravado em JSON).
+    """
+    resultado = {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "semente": semente,
+        "resultados": {},
+        "tamanho_arquivo": {},
+    }
+    diretorio = tempfile.mkdtemp(prefix="bench_alugueis_")
+    try:
+        for ext in armazenamentos:
+            for n in tamanhos:
+                chave = f"{ext.lstrip('.')}/{n}"
+                if progresso:
+                    progresso(f"{chave}...")
+                path = os.path.join(diretorio, f"dados_{n}{ext}")
+                resultado["resultados"][chave] = bench_base(path, n, repeticoes, semente)
+                resultado["tamanho_arquivo"][chave] = os.path.getsize(path)
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return resultado
+
+def comparar(atual, anterior, tolerancia=1.5, minimo_ms=0.5):
+    """
+    Lista as operações que ficaram mais de `tolerancia` vezes mais lentas que
+    na execução anterior (ignorando tempos abaixo de `minimo_ms`, dominados por ruído).
+    Retorna [(base, operação, ms anterior, ms atual)].
+    """
+    regressoes = []
+    for (base, ops) in atual["resultados"].items():
+        antes = anterior["resultados"].get(base, {})
+        for (op, ms) in ops.items():
+            if op in antes and ms > max(antes[op], minimo_ms) * tolerancia:
+                regressoes.append((base, op, antes[op], ms))
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do sistema de aluguéis.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS),
+                        help="quantidades de aluguéis (padrão: 1000 100000 1000000)")
+    parser.add_argument("--armazenamentos", nargs="+", default=list(ARMAZENAMENTOS),
+                        choices=ARMAZENAMENTOS)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default="benchmark.json", help="arquivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=1.5,
+                        help="razão de tempo a partir da qual há regressão")
+    parser.add_argument("--minimo-ms", type=float, default=0.5,
+                        help="tempos abaixo deste valor não contam como regressão")
+    args = parser.parse_args()
+
+    resultado = executar(args.tamanhos, args.armazenamentos, args.repeticoes, args.semente,
+                         progresso=lambda msg: print(msg, file=sys.stderr))
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    for (base, ops) in resultado["resultados"].items():
+        print(f"\n{base} ({resultado['tamanho_arquivo'][base]:,} bytes)")
+        for (op, ms) in ops.items():
+            print(f"  {op:36s} {ms:12.4f} ms")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        regressoes = comparar(resultado, anterior, args.tolerancia, args.minimo_ms)
+        for (base, op, antes, agora) in regressoes:
+            print(f"REGRESSÃO {base} {op}: {antes:.4f} ms -> {agora:.4f} ms")
+        if regressoes:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
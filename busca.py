@@ -0,0 +1,203 @@
+import bisect
+import itertools
+
+# ---------------------------------------------------------------------------------------
+# IndiceVeiculos - busca de veículos por nome, marca, ano, prefixo de placa e disponibilidade
+# ---------------------------------------------------------------------------------------
+# Tudo é comparado em minúsculas. Os veículos são identificados pelo id; o índice
+# guarda as chaves com que cada veículo foi indexado, para poder tirá-lo depois
+# mesmo que o dicionário do veículo já tenha sido alterado.
+CAMPOS = ("nome", "marca", "ano")
+
+# Um critério entra por interseção de conjuntos se tiver até este múltiplo dos
+# candidatos atuais; acima disso, sai mais barato conferir candidato a candidato
+FATOR_INTERSECAO = 10
+
+_INVERTE = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+def _palavras(vehicle):
+    return {p for campo in CAMPOS for p in str(vehicle[campo]).lower().split()}
+
+class IndiceVeiculos:
+    """
+    Índices invertidos (valor exato de nome/marca/ano e palavras desses campos,
+    com vocabulário ordenado para busca por prefixo), placas ordenadas (prefixo
+    por busca binária) e um mapa de bits de disponibilidade indexado pelo id.
+
+    buscar() parte do critério mais seletivo (o de menos candidatos) e confere
+    os demais só nesses candidatos, então o custo acompanha o tamanho da menor
+    lista de candidatos e não o da frota.
+    """
+    def __init__(self, vehicles=()):
+        self.reconstruir(vehicles)
+
+    def reconstruir(self, vehicles):
+        self._por_campo = {campo: {} for campo in CAMPOS}   # campo -> valor -> {id}
+        self._termos = {}          # palavra -> {id}
+        self._vocabulario = []     # palavras de _termos, ordenadas
+        self._placas = []          # (placa, id), ordenadas
+        self._chaves = {}          # id -> (nome, marca, ano, placa, palavras)
+        self._disponiveis = bytearray()   # byte id = 1 se o veículo está disponível
+        for v in vehicles:
+            self.adicionar(v)
+
+    def __len__(self):
+        return len(self._chaves)
+
+    # ------------------ Manutenção ------------------
+    def adicionar(self, vehicle):
+        vid = vehicle["id"]
+        if vid in self._chaves:
+            self.remover(vid)
+        valores = tuple(str(vehicle[campo]).lower() for campo in CAMPOS)
+        placa = vehicle["placa"].lower()
+        palavras = _palavras(vehicle)
+        self._chaves[vid] = valores + (placa, palavras)
+        for (campo, valor) in zip(CAMPOS, valores):
+            self._por_campo[campo].setdefault(valor, set()).add(vid)
+        for p in palavras:
+            ids = self._termos.get(p)
+            if ids is None:
+                ids = self._termos[p] = set()
+                bisect.insort(self._vocabulario, p)
+            ids.add(vid)
+        bisect.insort(self._placas, (placa, vid))
+        self.definir_disponivel(vid, vehicle["disponivel"])
+
+    def remover(self, vehicle_id):
+        chaves = self._chaves.pop(vehicle_id, None)
+        if chaves is None:
+            return
+        (*valores, placa, palavras) = chaves
+        for (campo, valor) in zip(CAMPOS, valores):
+            self._descartar(self._por_campo[campo], valor, vehicle_id)
+        for p in palavras:
+            if self._descartar(self._termos, p, vehicle_id):
+                del self._vocabulario[bisect.bisect_left(self._vocabulario, p)]
+        i = bisect.bisect_left(self._placas, (placa, vehicle_id))
+        if i < len(self._placas) and self._placas[i] == (placa, vehicle_id):
+            del self._placas[i]
+        self.definir_disponivel(vehicle_id, False)
+
+    @staticmethod
+    def _descartar(indice, chave, vehicle_id):
+        # Retorna True se a chave ficou sem veículos (e saiu do índice)
+        ids = indice.get(chave)
+        if ids is None:
+            return False
+        ids.discard(vehicle_id)
+        if not ids:
+            del indice[chave]
+            return True
+        return False
+
+    def definir_disponivel(self, vehicle_id, disponivel):
+        # O mapa cobre todos os ids indexados (ids sem veículo ficam com 0)
+        if vehicle_id >= len(self._disponiveis):
+            self._disponiveis.extend(bytes(max(vehicle_id + 1 - len(self._disponiveis),
+                                               len(self._disponiveis))))
+        self._disponiveis[vehicle_id] = 1 if disponivel else 0
+
+    def disponivel(self, vehicle_id):
+        return vehicle_id < len(self._disponiveis) and self._disponiveis[vehicle_id] == 1
+
+    # ------------------ Consulta ------------------
+    def _faixa_placas(self, prefixo):
+        lo = bisect.bisect_left(self._placas, (prefixo,))
+        hi = bisect.bisect_left(self._placas, (prefixo + "\uffff",))
+        return (lo, hi)
+
+    def _candidatos_termo(self, prefixo):
+        # Veículos com alguma palavra ou a placa começando com o prefixo
+        lo = bisect.bisect_left(self._vocabulario, prefixo)
+        hi = bisect.bisect_left(self._vocabulario, prefixo + "\uffff")
+        conjuntos = [self._termos[p] for p in self._vocabulario[lo:hi]]
+        (plo, phi) = self._faixa_placas(prefixo)
+        tamanho = sum(len(c) for c in conjuntos) + (phi - plo)
+
+        def ids():
+            resultado = set().union(*conjuntos)
+            resultado.update(vid for (_, vid) in self._placas[plo:phi])
+            return resultado
+        return (tamanho, ids)
+
+    def buscar(self, texto="", nome=None, marca=None, ano=None, placa=None, disponivel=None,
+               limite=None):
+        """
+        Retorna os ids (em ordem crescente) dos veículos que atendem a todos os critérios:
+          - texto: cada palavra é prefixo de uma palavra de nome/marca/ano ou da placa
+          - nome, marca, ano: valor exato (sem diferenciar maiúsculas)
+          - placa: prefixo da placa
+          - disponivel: True/False filtra pela disponibilidade
+        No máximo `limite` ids, se dado.
+        """
+        filtros = []      # (tamanho estimado, gerador de candidatos, teste de um id)
+        disponibilidade = None
+        chaves = self._chaves
+        for (i, (campo, valor)) in enumerate(zip(CAMPOS, (nome, marca, ano))):
+            if valor:
+                valor = str(valor).lower()
+                ids = self._por_campo[campo].get(valor, ())
+                filtros.append((len(ids), lambda ids=ids: ids,
+                                lambda vid, i=i, valor=valor: chaves[vid][i] == valor))
+        if placa:
+            prefixo = placa.lower()
+            (lo, hi) = self._faixa_placas(prefixo)
+            filtros.append((hi - lo, lambda lo=lo, hi=hi: [vid for (_, vid) in self._placas[lo:hi]],
+                            lambda vid, prefixo=prefixo: chaves[vid][3].startswith(prefixo)))
+        for termo in set(texto.lower().split()):
+            (tamanho, ids) = self._candidatos_termo(termo)
+            filtros.append((tamanho, ids,
+                            lambda vid, termo=termo: chaves[vid][3].startswith(termo)
+                            or any(p.startswith(termo) for p in chaves[vid][4])))
+        if disponivel is not None:
+            # Só serve de ponto de partida se for o critério mais seletivo; senão
+            # é conferida no fim, direto no mapa de bits (sem interseção)
+            livres = self._disponiveis.count(1)
+            ids = self._ids_disponiveis if disponivel else self._ids_indisponiveis
+            disponibilidade = (livres if disponivel else len(chaves) - livres, ids, None)
+            if not filtros:
+                return ids()[:limite]    # já em ordem de id
+            filtros.append(disponibilidade)
+
+        if not filtros:
+            return sorted(chaves)[:limite]
+
+        # Começa pelo critério com menos candidatos. Os seguintes entram por interseção
+        # de conjuntos (em C) enquanto forem de tamanho comparável; os muito maiores
+        # são só conferidos nos candidatos que sobraram.
+        filtros.sort(key=lambda f: f[0])
+        candidatos = set(filtros[0][1]())
+        testes = []
+        for filtro in filtros[1:]:
+            (tamanho, ids, teste) = filtro
+            if filtro is disponibilidade:
+                continue
+            if tamanho <= FATOR_INTERSECAO * len(candidatos):
+                candidatos.intersection_update(ids())
+            else:
+                testes.append(teste)
+
+        candidatos = sorted(candidatos)
+        if disponibilidade is not None and filtros[0] is not disponibilidade:
+            # Confere a disponibilidade dos candidatos em C, lendo o mapa de bits
+            mapa = self._disponiveis if disponivel else self._disponiveis.translate(_INVERTE)
+            candidatos = list(itertools.compress(candidatos, map(mapa.__getitem__, candidatos)))
+        if not testes:
+            return candidatos[:limite]
+        resultado = []
+        for vid in candidatos:
+            if all(teste(vid) for teste in testes):
+                resultado.append(vid)
+                if limite is not None and len(resultado) >= limite:
+                    break
+        return resultado
+
+    def _ids_disponiveis(self):
+        # itertools.compress varre o mapa de bits em C, pulando os indisponíveis
+        return list(itertools.compress(range(len(self._disponiveis)), self._disponiveis))
+
+    def _ids_indisponiveis(self):
+        ocupados = self._disponiveis.translate(_INVERTE)
+        return [vid for vid in itertools.compress(range(len(ocupados)), ocupados)
+                if vid in self._chaves]
@@ -0,0 +1,120 @@
+import bisect
+
+from armazenamento import datetime_to_str, str_to_datetime
+
+# ---------------------------------------------------------------------------------------
+# IndiceClientes - perfil de cada cliente (cpf) montado a partir dos aluguéis
+# ---------------------------------------------------------------------------------------
+# Para cada cpf: rental_id dos aluguéis (em ordem), total gasto, último aluguel (maior
+# data_retirada, com o nome e o whatsapp usados nele), aluguéis em aberto e quantidade
+# de devoluções com atraso (devolução efetiva depois da estimada). O índice é atualizado
+# a cada aluguel e devolução, então consultar um cliente custa O(1) mais o tamanho do
+# perfil, sem percorrer o histórico.
+
+def atrasado(r):
+    return (r["data_devolucao_efetiva"] is not None
+            and r["data_devolucao_efetiva"] > r["data_devolucao_estimada"])
+
+def novo_perfil(cpf):
+    return {
+        "cpf": cpf,
+        "nome": "",
+        "whatsapp": "",
+        "alugueis": [],
+        "total_gasto": 0.0,
+        "ultimo_aluguel": None,
+        "ultima_retirada": None,
+        "em_aberto": [],
+        "atrasos": 0,
+    }
+
+class IndiceClientes:
+    """
+    cpf -> perfil (ver novo_perfil). adicionar() recebe cada aluguel novo e
+    devolver() cada aluguel que passou de aberto para devolvido.
+    """
+    def __init__(self):
+        self._perfis = {}
+
+    def reconstruir(self, alugueis):
+        self._perfis = {}
+        for r in alugueis:
+            self.adicionar(r)
+
+    def adicionar(self, r):
+        p = self._perfis.get(r["cpf"])
+        if p is None:
+            p = self._perfis[r["cpf"]] = novo_perfil(r["cpf"])
+        ids = p["alugueis"]
+        if ids and ids[-1] > r["rental_id"]:
+            bisect.insort(ids, r["rental_id"])
+        else:
+            ids.append(r["rental_id"])
+        p["total_gasto"] += r["valor_total"]
+        if p["ultima_retirada"] is None or r["data_retirada"] >= p["ultima_retirada"]:
+            p["ultimo_aluguel"] = r["rental_id"]
+            p["ultima_retirada"] = r["data_retirada"]
+            p["nome"] = r["nome_cliente"]
+            p["whatsapp"] = r["whatsapp"]
+        if r["data_devolucao_efetiva"] is None:
+            p["em_aberto"].append(r["rental_id"])
+        elif atrasado(r):
+            p["atrasos"] += 1
+
+    def devolver(self, r):
+        p = self._perfis.get(r["cpf"])
+        if p is None or r["rental_id"] not in p["em_aberto"]:
+            return
+        p["em_aberto"].remove(r["rental_id"])
+        if atrasado(r):
+            p["atrasos"] += 1
+
+    def perfil(self, cpf):
+        """
+        Retorna o perfil do cpf (o próprio dict do índice), ou None.
+        """
+        return self._perfis.get(cpf)
+
+    def perfis(self):
+        return self._perfis.values()
+
+    def __len__(self):
+        return len(self._perfis)
+
+    # ------------------ Gravação ------------------
+    def exportar(self):
+        return [dict(p, ultima_retirada=datetime_to_str(p["ultima_retirada"]))
+                for p in self._perfis.values()]
+
+    def carregar(self, perfis):
+        self._perfis = {p["cpf"]: dict(p, ultima_retirada=str_to_datetime(p["ultima_retirada"]))
+                        for p in perfis}
+
+def combinar(arquivado, perfil, alugueis_por_id):
+    """
+    Junta o perfil do histórico (`arquivado`) e o do arquivo principal (`perfil`),
+    qualquer um deles podendo ser None, em um dict novo. Os aluguéis que estão nos
+    dois (ver CarRentalSystem._archived_rentals) contam só uma vez: saem do lado do
+    histórico, descontados com os valores da cópia em `alugueis_por_id`.
+    """
+    if arquivado is None:
+        return None if perfil is None else dict(perfil, alugueis=list(perfil["alugueis"]),
+                                                em_aberto=list(perfil["em_aberto"]))
+    resultado = dict(arquivado, alugueis=[], em_aberto=[])
+    for rental_id in arquivado["alugueis"]:
+        r = alugueis_por_id.get(rental_id)
+        if r is None:
+            resultado["alugueis"].append(rental_id)
+        else:
+            resultado["total_gasto"] -= r["valor_total"]
+            resultado["atrasos"] -= atrasado(r)
+    if perfil is None:
+        return resultado
+    resultado["alugueis"] = sorted(resultado["alugueis"] + perfil["alugueis"])
+    resultado["total_gasto"] += perfil["total_gasto"]
+    resultado["atrasos"] += perfil["atrasos"]
+    resultado["em_aberto"] = list(perfil["em_aberto"])
+    if resultado["ultima_retirada"] is None or perfil["ultima_retirada"] >= resultado["ultima_retirada"]:
+        for campo in ("nome", "whatsapp", "ultimo_aluguel", "ultima_retirada"):
+            resultado[campo] = perfil[campo]
+    return resultado
@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+import time
+
+from armazenamento import convert_storage
+
+# ---------------------------------------------------------------------------------------
+# Conversão entre formatos de armazenamento (.json, .bin, .db)
+# ---------------------------------------------------------------------------------------
+# O formato de cada arquivo é escolhido pela extensão (ver armazenamento.open_storage).
+# Os journals pendentes da origem são incorporados; o destino fica só com o snapshot,
+# mais os agregados e o histórico mensal copiados da origem.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte os dados do sistema de aluguéis "
+                                                 "entre JSON, binário e SQLite.")
+    parser.add_argument("origem", help="arquivo de origem (.json, .bin ou .db)")
+    parser.add_argument("destino", help="arquivo de destino (.json, .bin ou .db); é substituído")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        (users, vehicles, rentals, reservations) = convert_storage(args.origem, args.destino)
+    except (OSError, ValueError) as e:
+        print(f"Erro na conversão: {e}", file=sys.stderr)
+        return 1
+    ms = (time.perf_counter() - inicio) * 1000
+    print(f"{users} usuários, {vehicles} veículos, {rentals} aluguéis e "
+          f"{reservations} reservas convertidos em {ms:.0f} ms.")
+    print(f"{args.origem}: {os.path.getsize(args.origem):,} bytes -> "
+          f"{args.destino}: {os.path.getsize(args.destino):,} bytes")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
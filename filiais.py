@@ -0,0 +1,325 @@
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+from collections import Counter
+
+from armazenamento import write_json_file
+from sistema_de_alugueis import CarRentalSystem
+
+# ---------------------------------------------------------------------------------------
+# BranchNetwork - várias filiais, cada uma com o seu CarRentalSystem e o seu arquivo
+# ---------------------------------------------------------------------------------------
+# As filiais são listadas no arquivo da rede (rede.json):
+#   {"filiais": {"centro": "centro.json", "aeroporto": "aeroporto.bin"}}
+# com caminhos relativos ao diretório desse arquivo. Veículos e aluguéis são
+# identificados na rede por "<filial>:<id>" (ex.: "centro:12"), já que os ids de
+# cada filial são independentes. Nos relatórios consolidados, cada processo do pool
+# (do tamanho do número de núcleos) abre o arquivo de uma filial, calcula os totais
+# do intervalo a partir dos agregados materializados dela (regravando-os se estiverem
+# desatualizados) e devolve só os totais; o processo principal apenas os soma.
+SEPARADOR = ":"
+TOP_PADRAO = 5
+
+def chave_filial(filial, item_id):
+    return f"{filial}{SEPARADOR}{item_id}"
+
+def separar_chave(chave):
+    """
+    "centro:12" -> ("centro", 12). Levanta ValueError se a chave não tiver esse formato.
+    """
+    (filial, sep, item_id) = str(chave).rpartition(SEPARADOR)
+    if not sep or not filial:
+        raise ValueError(f"Chave inválida: {chave!r} (use <filial>{SEPARADOR}<id>).")
+    return (filial, int(item_id))
+
+def ler_data(valor, ultimo_dia=False):
+    """
+    date/datetime, "AAAA-MM-DD" ou "AAAA-MM" -> date. Um mês vira o seu primeiro dia
+    (ou o último, com ultimo_dia=True). Levanta ValueError para uma data inválida.
+    """
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    if len(valor) == len("AAAA-MM"):
+        dia = datetime.datetime.strptime(valor, "%Y-%m").date()
+        if ultimo_dia:
+            proximo = (dia.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            dia = proximo - datetime.timedelta(days=1)
+        return dia
+    return datetime.datetime.strptime(valor, "%Y-%m-%d").date()
+
+def validar_data(valor):
+    """
+    Confere uma data "AAAA-MM-DD" ou "AAAA-MM" (levanta ValueError) e a devolve.
+    """
+    ler_data(valor)
+    return valor
+
+def branch_report(filial, path, inicio, fim):
+    """
+    Totais de uma filial para os aluguéis retirados em [inicio, fim): faturamento
+    por dia, contagens por veículo e por cpf e os nomes dos veículos contados
+    (ver CarRentalSystem.period_totals). Roda em um processo do pool: abre o
+    arquivo da filial e regrava os agregados dela se estiverem desatualizados,
+    para que a próxima abertura só some os aluguéis novos.
+    """
+    system = CarRentalSystem(path, shared=True)
+    try:
+        totais = system.period_totals(inicio, fim)
+        system.refresh_aggregates()
+        nomes = {}
+        for vid in totais["veiculos"]:
+            v = system.get_vehicle(vid)
+            nomes[vid] = v["nome"] if v is not None else None
+    finally:
+        system.close()
+    return dict(totais, filial=filial, nomes=nomes)
+
+class BranchNetwork:
+    """
+    Rede de filiais descrita em `rede_path`. Cada filial é um CarRentalSystem
+    (no modo compartilhado, para que os processos dos relatórios leiam os mesmos
+    arquivos com segurança). As operações recebem chaves "<filial>:<id>" e são
+    encaminhadas à filial; consolidated_report() calcula cada filial em paralelo.
+    `processos` limita o pool (padrão: número de núcleos; 1 = sem pool).
+    """
+    def __init__(self, rede_path="rede.json", processos=None, **opcoes):
+        self.rede_path = rede_path
+        self.processos = processos
+        self._opcoes = dict(opcoes, shared=True)
+        self._arquivos = {}    # filial -> caminho do arquivo de dados
+        self._sistemas = {}    # filial -> CarRentalSystem
+        self._pool = None
+        if os.path.exists(rede_path):
+            with open(rede_path, "r", encoding="utf-8") as f:
+                filiais = json.load(f)["filiais"]
+            for (nome, arquivo) in filiais.items():
+                self._abrir(nome, arquivo)
+
+    def _abrir(self, nome, arquivo):
+        path = os.path.join(os.path.dirname(os.path.abspath(self.rede_path)), arquivo)
+        self._arquivos[nome] = arquivo
+        self._sistemas[nome] = CarRentalSystem(path, **self._opcoes)
+
+    def _path(self, nome):
+        return self._sistemas[nome].json_file_path
+
+    # ------------------ Filiais ------------------
+    def add_branch(self, nome, arquivo=None):
+        """
+        Cria (ou abre) o arquivo da filial e a inclui no arquivo da rede.
+        Retorna o CarRentalSystem da filial.
+        """
+        if not nome or SEPARADOR in nome or os.sep in nome or "/" in nome:
+            raise ValueError(f"Nome de filial inválido: {nome!r}.")
+        if nome in self._sistemas:
+            raise ValueError(f"Filial já cadastrada: {nome}.")
+        self._abrir(nome, arquivo or f"{nome}.json")
+        write_json_file(self.rede_path, {"filiais": self._arquivos})
+        return self._sistemas[nome]
+
+    def branches(self):
+        return list(self._sistemas)
+
+    def branch(self, nome):
+        """
+        Retorna o CarRentalSystem da filial (ou None).
+        """
+        return self._sistemas.get(nome)
+
+    def _resolver(self, chave):
+        # (sistema da filial, id local), ou None para chave inválida ou filial desconhecida
+        try:
+            (filial, item_id) = separar_chave(chave)
+        except ValueError:
+            return None
+        system = self._sistemas.get(filial)
+        return None if system is None else (filial, system, item_id)
+
+    # ------------------ Sessão ------------------
+    def login(self, username, password):
+        """
+        Entra em todas as filiais onde o usuário existe. Retorna as filiais.
+        """
+        return [nome for (nome, system) in self._sistemas.items() if system.login(username, password)]
+
+    def logout(self):
+        for system in self._sistemas.values():
+            system.logout()
+
+    # ------------------ Veículos e aluguéis ------------------
+    def get_vehicle(self, chave):
+        alvo = self._resolver(chave)
+        return None if alvo is None else alvo[1].get_vehicle(alvo[2])
+
+    def list_vehicles(self):
+        return [(chave_filial(nome, v["id"]), v)
+                for (nome, system) in self._sistemas.items() for v in system.list_vehicles()]
+
+    def search_vehicles(self, query="", limit=None, **filtros):
+        """
+        Busca em todas as filiais (ver CarRentalSystem.search_vehicles).
+        Retorna [(chave, veículo)], filial por filial.
+        """
+        resultado = []
+        for (nome, system) in self._sistemas.items():
+            restante = None if limit is None else limit - len(resultado)
+            if restante == 0:
+                break
+            resultado.extend((chave_filial(nome, v["id"]), v)
+                             for v in system.search_vehicles(query, limit=restante, **filtros))
+        return resultado
+
+    def rent_vehicle(self, chave_veiculo, nome_cliente, cpf, whatsapp, dias, valor_por_dia):
+        """
+        Retorna (mensagem, chave do novo aluguel), com a chave None se não alugou.
+        """
+        alvo = self._resolver(chave_veiculo)
+        if alvo is None:
+            return ("Filial ou veículo não encontrado!", None)
+        (filial, system, vehicle_id) = alvo
+        msg = system.rent_vehicle(vehicle_id, nome_cliente, cpf, whatsapp, dias, valor_por_dia)
+        rental_id = system.last_rental_id
+        return (msg, None if rental_id is None else chave_filial(filial, rental_id))
+
+    def return_vehicle(self, chave_aluguel):
+        alvo = self._resolver(chave_aluguel)
+        if alvo is None:
+            return "Filial ou aluguel não encontrado!"
+        return alvo[1].return_vehicle(alvo[2])
+
+    def get_rental(self, chave):
+        alvo = self._resolver(chave)
+        return None if alvo is None else alvo[1].get_rental(alvo[2])
+
+    def list_open_rentals(self):
+        return [(chave_filial(nome, r["rental_id"]), r)
+                for (nome, system) in self._sistemas.items() for r in system.list_open_rentals()]
+
+    # ------------------ Relatórios consolidados ------------------
+    def _executor(self):
+        if self._pool is None:
+            # "spawn": os processos não herdam as threads (gravação, métricas) deste
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(len(self._sistemas), self.processos or os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def consolidated_report(self, de=None, ate=None, top=TOP_PADRAO):
+        """
+        Faturamento (total, por filial e por dia), veículos mais alugados e
+        clientes (por cpf, somando todas as filiais) dos aluguéis retirados de
+        `de` a `ate`, inclusive (date, "AAAA-MM-DD" ou "AAAA-MM" para o mês
+        inteiro; padrão: do primeiro dia do mês atual até hoje). Cada filial é
+        calculada em um processo do pool (branch_report) e os resultados são
+        somados aqui. Levanta ValueError para uma data inválida.
+        """
+        hoje = datetime.date.today()
+        de = ler_data(de) if de is not None else hoje.replace(day=1)
+        ate = ler_data(ate, ultimo_dia=True) if ate is not None else max(de, hoje)
+        inicio = datetime.datetime(de.year, de.month, de.day)
+        fim = datetime.datetime(ate.year, ate.month, ate.day) + datetime.timedelta(days=1)
+        # Os processos leem os arquivos: as mutações feitas aqui precisam estar gravadas
+        for system in self._sistemas.values():
+            system.flush()
+        nomes_filiais = list(self._sistemas)
+        n = len(nomes_filiais)
+        args = (nomes_filiais, [self._path(nome) for nome in nomes_filiais], [inicio] * n, [fim] * n)
+        if n <= 1 or self.processos == 1:
+            parciais = list(map(branch_report, *args))
+        else:
+            # map mantém a ordem das filiais: os desempates não dependem de quem termina antes
+            parciais = list(self._executor().map(branch_report, *args))
+
+        faturamento_por_dia = Counter()
+        faturamento_por_filial = {}
+        veiculos = Counter()
+        nomes_veiculos = {}
+        clientes = Counter()
+        for p in parciais:
+            faturamento_por_dia.update(p["faturamento_por_dia"])
+            faturamento_por_filial[p["filial"]] = sum(p["faturamento_por_dia"].values())
+            for (vid, count) in p["veiculos"].items():
+                veiculos[chave_filial(p["filial"], vid)] = count
+                nomes_veiculos[chave_filial(p["filial"], vid)] = p["nomes"][vid]
+            clientes.update(p["clientes"])
+        return {
+            "de": de,
+            "ate": ate,
+            "filiais": nomes_filiais,
+            "alugueis": sum(veiculos.values()),
+            "faturamento": sum(faturamento_por_filial.values()),
+            "faturamento_por_filial": faturamento_por_filial,
+            "faturamento_por_dia": sorted(faturamento_por_dia.items()),
+            "top_veiculos": [(chave, nomes_veiculos[chave], count)
+                             for (chave, count) in veiculos.most_common(top)],
+            "top_clientes": clientes.most_common(top),
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for system in self._sistemas.values():
+            system.close()
+
+# ---------------------------------------------------------------------------------------
+# Linha de comando
+# ---------------------------------------------------------------------------------------
+def print_report(relatorio):
+    print(f"Rede ({len(relatorio['filiais'])} filiais) de {relatorio['de']} a {relatorio['ate']}")
+    print(f"Aluguéis: {relatorio['alugueis']} | Faturamento: R$ {relatorio['faturamento']:.2f}")
+    print("Faturamento por filial:")
+    for (nome, total) in relatorio["faturamento_por_filial"].items():
+        print(f"  {nome}: R$ {total:.2f}")
+    print(f"Top {len(relatorio['top_veiculos'])} carros:")
+    for (chave, nome, count) in relatorio["top_veiculos"]:
+        print(f"  {chave} {nome}: {count}")
+    print(f"Top {len(relatorio['top_clientes'])} clientes:")
+    for (cpf, count) in relatorio["top_clientes"]:
+        print(f"  {cpf}: {count}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rede de filiais do sistema de aluguéis.")
+    parser.add_argument("--rede", default="rede.json", help="arquivo com a lista de filiais")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    add = sub.add_parser("add", help="cadastra uma filial")
+    add.add_argument("nome")
+    add.add_argument("--arquivo", help="arquivo de dados da filial (padrão: <nome>.json)")
+    sub.add_parser("list", help="lista as filiais")
+    report = sub.add_parser("report", help="relatório consolidado de todas as filiais")
+    report.add_argument("--de", type=validar_data,
+                        help="primeiro dia, AAAA-MM-DD (ou AAAA-MM; padrão: início do mês atual)")
+    report.add_argument("--ate", type=validar_data,
+                        help="último dia, AAAA-MM-DD (ou AAAA-MM para o mês todo; padrão: hoje)")
+    report.add_argument("--top", type=int, default=TOP_PADRAO)
+    report.add_argument("--processos", type=int, help="tamanho do pool (padrão: núcleos)")
+    args = parser.parse_args(argv)
+
+    rede = BranchNetwork(args.rede, processos=getattr(args, "processos", None))
+    try:
+        if args.comando == "add":
+            try:
+                rede.add_branch(args.nome, args.arquivo)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                return 1
+            print(f"Filial {args.nome} cadastrada.")
+        elif args.comando == "list":
+            for nome in rede.branches():
+                system = rede.branch(nome)
+                print(f"{nome}: {system.json_file_path} | {system.count_vehicles()} veículos, "
+                      f"{system.count_open_rentals()} aluguéis em aberto")
+        else:
+            print_report(rede.consolidated_report(args.de, args.ate, args.top))
+    finally:
+        rede.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+import argparse
+import datetime
+import heapq
+import random
+
+from armazenamento import open_storage, Rental
+
+# ---------------------------------------------------------------------------------------
+# Gerador de dados sintéticos (frota, clientes e histórico de aluguéis)
+# ---------------------------------------------------------------------------------------
+# Com a mesma semente e os mesmos parâmetros, os dados gerados são sempre os mesmos.
+MARCAS = {
+    "Volkswagen": ("Gol", "Polo", "Virtus", "T-Cross", "Nivus"),
+    "Fiat": ("Mobi", "Argo", "Cronos", "Pulse", "Strada"),
+    "Chevrolet": ("Onix", "Tracker", "Spin", "S10"),
+    "Hyundai": ("HB20", "Creta"),
+    "Toyota": ("Corolla", "Yaris", "Hilux"),
+    "Renault": ("Kwid", "Sandero", "Duster"),
+}
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor",
+         "Isabela", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael")
+SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Costa", "Almeida")
+
+def placa_mercosul(n):
+    """
+    Placa no formato AAA0A00, distinta para cada n (até 26³ × 10⁴).
+    """
+    (letras, numero) = divmod(n, 10000)
+    return (f"{chr(65 + letras // 676 % 26)}{chr(65 + letras // 26 % 26)}{chr(65 + letras % 26)}"
+            f"{numero // 1000}{chr(65 + numero // 100 % 10)}{numero % 100:02d}")
+
+def gerar_dados(veiculos=100, alugueis=1000, inicio=None, fim=None, clientes=None,
+                atendentes=5, fracao_abertos=0.3, semente=42):
+    """
+    Gera (users, vehicles, rentals) coerentes entre si: aluguéis com
+    data_retirada distribuída em [inicio, fim), rental_id em ordem de retirada,
+    nenhum veículo com dois aluguéis ao mesmo tempo, no máximo um aluguel em
+    aberto por veículo e `disponivel` de acordo. Os aluguéis em aberto saem dos
+    mais recentes (cerca de `fracao_abertos` dos veículos com aluguel nos últimos
+    10 dias do período). Se não houver veículo livre na hora sorteada, a retirada
+    é adiada até a primeira devolução; ValueError se isso passar de `fim`.
+    """
+    rng = random.Random(semente)
+    if fim is None:
+        fim = datetime.datetime.now().replace(microsecond=0)
+    if inicio is None:
+        inicio = fim - datetime.timedelta(days=365)
+    if clientes is None:
+        clientes = max(1, alugueis // 10)
+
+    users = [{"username": "admin", "password": "admin", "role": "admin"}]
+    users += [{"username": f"atendente{i}", "password": f"senha{i}", "role": "padrao"}
+              for i in range(1, atendentes + 1)]
+
+    modelos = [(marca, nome) for (marca, nomes) in MARCAS.items() for nome in nomes]
+    vehicles = []
+    for i in range(1, veiculos + 1):
+        (marca, nome) = rng.choice(modelos)
+        vehicles.append({
+            "id": i,
+            "nome": nome,
+            "marca": marca,
+            "ano": str(rng.randint(2012, 2025)),
+            "placa": placa_mercosul(i),
+            "disponivel": True
+        })
+
+    pessoas = [(f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+                f"{rng.randrange(10**10, 10**11):011d}",
+                f"(11) 9{rng.randrange(10**7, 10**8)}")
+               for _ in range(clientes)]
+    usernames = [u["username"] for u in users]
+
+    span = int((fim - inicio).total_seconds())
+    retiradas = sorted(rng.randrange(span) for _ in range(alugueis))
+    limite_abertos = fim - datetime.timedelta(days=10)
+    # Veículos livres (sorteio entre eles) e ocupados: heap de (livre a partir de, índice)
+    livres = list(range(veiculos))
+    ocupados = []
+    ultima_retirada = inicio
+    rentals = []
+    for (i, segundos) in enumerate(retiradas, start=1):
+        data_retirada = max(inicio + datetime.timedelta(seconds=segundos), ultima_retirada)
+        while ocupados and ocupados[0][0] <= data_retirada:
+            livres.append(heapq.heappop(ocupados)[1])
+        if not livres:
+            # Frota toda ocupada: adia a retirada (e as seguintes) até a próxima devolução
+            (data_retirada, indice) = heapq.heappop(ocupados)
+            if data_retirada >= fim:
+                raise ValueError(f"{veiculos} veículos não comportam {alugueis} aluguéis no período.")
+            livres.append(indice)
+        ultima_retirada = data_retirada
+        dias = rng.randint(1, 15)
+        valor_por_dia = float(rng.choice((90, 110, 130, 150, 180, 250)))
+        (nome, cpf, whatsapp) = pessoas[int(rng.paretovariate(1.2)) % clientes]
+        j = rng.randrange(len(livres))
+        (livres[j], livres[-1]) = (livres[-1], livres[j])
+        v = vehicles[livres.pop()]
+        devolucao = data_retirada + datetime.timedelta(days=dias, hours=rng.randint(-12, 12))
+        if data_retirada >= limite_abertos and rng.random() < fracao_abertos:
+            # Em aberto: o veículo não volta para os livres
+            devolucao = None
+            v["disponivel"] = False
+        else:
+            devolucao = min(devolucao, fim)
+            heapq.heappush(ocupados, (devolucao, v["id"] - 1))
+        rentals.append(Rental(
+            rental_id=i,
+            vehicle_id=v["id"],
+            nome_cliente=nome,
+            user_alugou=rng.choice(usernames),
+            cpf=cpf,
+            whatsapp=whatsapp,
+            dias=dias,
+            valor_por_dia=valor_por_dia,
+            valor_total=dias * valor_por_dia,
+            data_retirada=data_retirada,
+            data_devolucao_estimada=data_retirada + datetime.timedelta(days=dias),
+            data_devolucao_efetiva=devolucao
+        ))
+    return (users, vehicles, rentals)
+
+def gravar_dados(path, *args, **kwargs):
+    """
+    Gera os dados (ver gerar_dados) e grava um snapshot completo em `path`
+    (.json, .bin ou .db). Retorna (users, vehicles, rentals).
+    """
+    dados = gerar_dados(*args, **kwargs)
+    storage = open_storage(path)
+    try:
+        storage.save(*dados)
+    finally:
+        storage.close()
+    return dados
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o sistema de aluguéis.")
+    parser.add_argument("arquivo", help="arquivo de saída (.json, .bin ou .db)")
+    parser.add_argument("--veiculos", type=int, default=100)
+    parser.add_argument("--alugueis", type=int, default=1000)
+    parser.add_argument("--inicio", type=datetime.datetime.fromisoformat,
+                        help="início do período (padrão: um ano antes do fim)")
+    parser.add_argument("--fim", type=datetime.datetime.fromisoformat, help="fim do período (padrão: agora)")
+    parser.add_argument("--clientes", type=int, help="quantidade de clientes (padrão: aluguéis / 10)")
+    parser.add_argument("--abertos", type=float, default=0.3, help="fração de aluguéis em aberto")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    (users, vehicles, rentals) = gravar_dados(
+        args.arquivo, veiculos=args.veiculos, alugueis=args.alugueis, inicio=args.inicio,
+        fim=args.fim, clientes=args.clientes, fracao_abertos=args.abertos, semente=args.semente)
+    print(f"{len(users)} usuários, {len(vehicles)} veículos e {len(rentals)} aluguéis "
+          f"gravados em {args.arquivo}.")
+
+if __name__ == "__main__":
+    main()
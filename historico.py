@@ -0,0 +1,259 @@
+import bisect
+import collections
+import json
+import os
+import shutil
+
+from armazenamento import (datetime_to_str, str_to_datetime, file_id, read_binary_snapshot,
+                           write_binary_snapshot, write_json_file)
+from clientes import IndiceClientes
+
+# ---------------------------------------------------------------------------------------
+# HistoricoMensal - aluguéis encerrados arquivados em partições mensais
+# ---------------------------------------------------------------------------------------
+# Cada partição é um snapshot binário (ver armazenamento.encode_binary_snapshot) só com
+# os aluguéis cuja data_retirada cai naquele mês: <diretório>/AAAA-MM.bin. O índice
+# (<diretório>/indice.json) guarda, por partição, a quantidade, a faixa de rental_id
+# e as datas extremas, para que cada consulta abra apenas as partições que podem ter
+# algo no intervalo pedido. As partições abertas ficam em um cache pequeno (LRU).
+# O resumo por cliente do histórico (<diretório>/clientes.json) é derivado das partições:
+# ele guarda a marca do índice de onde veio e é recalculado se ela não bater.
+ARCHIVE_CACHE_PARTITIONS = 6
+
+def historico_dir(path):
+    """
+    Diretório das partições de um arquivo de dados (data.json -> data.json.historico).
+    Derivado do nome completo, para que data.json e data.bin não dividam o histórico.
+    """
+    return path + ".historico"
+
+def chave_mes(dt):
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+class HistoricoMensal:
+    """
+    Partições mensais de aluguéis encerrados. arquivar() acrescenta aluguéis;
+    as consultas (alugueis_entre, alugueis_sobrepostos, buscar) só leem as
+    partições cujo resumo no índice cruza o intervalo pedido.
+    """
+    def __init__(self, diretorio, cache=ARCHIVE_CACHE_PARTITIONS):
+        self.diretorio = diretorio
+        self.indice_path = os.path.join(diretorio, "indice.json")
+        self.clientes_path = os.path.join(diretorio, "clientes.json")
+        self.cache = cache
+        self._indice = {}      # mês -> resumo da partição (ver _resumo)
+        self._indice_id = None
+        self._particoes = collections.OrderedDict()   # mês -> (file_id, aluguéis, retiradas)
+        self._clientes = None  # (marca do índice, IndiceClientes)
+        self.recarregar()
+
+    def recarregar(self):
+        """
+        Relê o índice se ele mudou desde a última leitura (outra instância arquivou).
+        """
+        iid = file_id(self.indice_path)
+        if iid == self._indice_id:
+            return
+        indice = {}
+        if iid is not None:
+            with open(self.indice_path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            for (mes, p) in dados["particoes"].items():
+                indice[mes] = {
+                    "quantidade": p["quantidade"],
+                    "min_id": p["min_id"],
+                    "max_id": p["max_id"],
+                    "retirada_min": str_to_datetime(p["retirada_min"]),
+                    "retirada_max": str_to_datetime(p["retirada_max"]),
+                    "devolucao_max": str_to_datetime(p["devolucao_max"]),
+                }
+        self._indice = indice
+        self._indice_id = iid
+
+    def __len__(self):
+        return sum(p["quantidade"] for p in self._indice.values())
+
+    @property
+    def max_rental_id(self):
+        return max((p["max_id"] for p in self._indice.values()), default=0)
+
+    def meses(self):
+        return sorted(self._indice)
+
+    def _path(self, mes):
+        return os.path.join(self.diretorio, f"{mes}.bin")
+
+    def _ler(self, mes):
+        # rental_id -> aluguel, sem passar pelo cache
+        return read_binary_snapshot(self._path(mes))["r"]
+
+    def particao(self, mes):
+        """
+        Retorna (aluguéis em ordem de data_retirada, retiradas) de uma partição,
+        lendo o arquivo só se ela não estiver no cache ou tiver sido regravada.
+        """
+        pid = file_id(self._path(mes))
+        item = self._particoes.get(mes)
+        if item is not None and item[0] == pid:
+            self._particoes.move_to_end(mes)
+            return item[1:]
+        alugueis = sorted(self._ler(mes).values(), key=lambda r: r["data_retirada"])
+        retiradas = [r["data_retirada"] for r in alugueis]
+        self._particoes[mes] = (pid, alugueis, retiradas)
+        while len(self._particoes) > self.cache:
+            self._particoes.popitem(last=False)
+        return (alugueis, retiradas)
+
+    # ------------------ Arquivamento ------------------
+    @staticmethod
+    def _resumo(alugueis):
+        return {
+            "quantidade": len(alugueis),
+            "min_id": min(r["rental_id"] for r in alugueis),
+            "max_id": max(r["rental_id"] for r in alugueis),
+            "retirada_min": min(r["data_retirada"] for r in alugueis),
+            "retirada_max": max(r["data_retirada"] for r in alugueis),
+            "devolucao_max": max(r["data_devolucao_efetiva"] for r in alugueis),
+        }
+
+    def arquivar(self, rentals):
+        """
+        Acrescenta aluguéis encerrados às partições dos seus meses: cada partição
+        afetada é regravada (de forma atômica) e o índice é gravado por último.
+        Um aluguel que já estava arquivado é substituído.
+        Retorna os meses das partições gravadas.
+        """
+        por_mes = {}
+        for r in rentals:
+            por_mes.setdefault(chave_mes(r["data_retirada"]), []).append(r)
+        if not por_mes:
+            return []
+        os.makedirs(self.diretorio, exist_ok=True)
+        # O resumo só volta ao cache depois do índice gravado (ver _gravar_clientes)
+        clientes = self.clientes()
+        self._clientes = None
+        recalcular = False
+        for (mes, novos) in sorted(por_mes.items()):
+            # Uma partição gravada sem chegar ao índice (queda) também é aproveitada
+            alugueis = self._ler(mes) if os.path.exists(self._path(mes)) else {}
+            # ... mas aí o resumo por cliente não a conhecia e é recalculado no final
+            recalcular |= len(alugueis) != self._indice.get(mes, {"quantidade": 0})["quantidade"]
+            for r in novos:
+                if r["rental_id"] not in alugueis:
+                    clientes.adicionar(r)
+            alugueis.update((r["rental_id"], r) for r in novos)
+            alugueis = sorted(alugueis.values(), key=lambda r: r["rental_id"])
+            write_binary_snapshot(self._path(mes), [], [], alugueis)
+            self._indice[mes] = self._resumo(alugueis)
+            self._particoes.pop(mes, None)
+        write_json_file(self.indice_path, {
+            "versao": 1,
+            "particoes": {mes: dict(p, **{campo: datetime_to_str(p[campo])
+                                          for campo in ("retirada_min", "retirada_max",
+                                                        "devolucao_max")})
+                          for (mes, p) in sorted(self._indice.items())},
+        })
+        self._indice_id = file_id(self.indice_path)
+        if recalcular:
+            clientes.reconstruir(self.todos())
+        self._gravar_clientes(clientes)
+        return sorted(por_mes)
+
+    def limpar(self):
+        """
+        Apaga todas as partições e o índice.
+        """
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+        self._indice = {}
+        self._indice_id = None
+        self._particoes.clear()
+        self._clientes = None
+
+    # ------------------ Resumo por cliente ------------------
+    def _marca(self):
+        return [[mes, p["quantidade"], p["min_id"], p["max_id"]] for (mes, p) in sorted(self._indice.items())]
+
+    def clientes(self):
+        """
+        Perfis dos clientes só com os aluguéis arquivados (clientes.IndiceClientes).
+        Vem de clientes.json se ele corresponder ao índice atual; senão é
+        recalculado lendo todas as partições (uma vez) e regravado.
+        """
+        self.recarregar()
+        marca = self._marca()
+        if self._clientes is not None and self._clientes[0] == marca:
+            return self._clientes[1]
+        clientes = IndiceClientes()
+        dados = None
+        if marca and os.path.exists(self.clientes_path):
+            with open(self.clientes_path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        if dados is not None and dados["marca"] == marca:
+            clientes.carregar(dados["clientes"])
+            self._clientes = (marca, clientes)
+        else:
+            clientes.reconstruir(self.todos())
+            self._gravar_clientes(clientes)
+        return clientes
+
+    def _gravar_clientes(self, clientes):
+        marca = self._marca()
+        if marca:
+            write_json_file(self.clientes_path, {"marca": marca, "clientes": clientes.exportar()})
+        self._clientes = (marca, clientes)
+
+    # ------------------ Consultas ------------------
+    def alugueis_entre(self, inicio=None, fim=None):
+        """
+        Aluguéis arquivados com data_retirada em [inicio, fim), em ordem cronológica
+        (inicio/fim = None deixam o intervalo aberto).
+        """
+        self.recarregar()
+        resultado = []
+        for mes in self.meses():
+            p = self._indice[mes]
+            if (inicio is not None and p["retirada_max"] < inicio) or \
+                    (fim is not None and p["retirada_min"] >= fim):
+                continue
+            (alugueis, retiradas) = self.particao(mes)
+            lo = 0 if inicio is None else bisect.bisect_left(retiradas, inicio)
+            hi = len(retiradas) if fim is None else bisect.bisect_left(retiradas, fim)
+            resultado.extend(alugueis[lo:hi])
+        return resultado
+
+    def alugueis_sobrepostos(self, inicio, fim):
+        """
+        Aluguéis arquivados que ocupam algum instante de [inicio, fim).
+        """
+        self.recarregar()
+        resultado = []
+        for mes in self.meses():
+            p = self._indice[mes]
+            if p["retirada_min"] >= fim or p["devolucao_max"] <= inicio:
+                continue
+            (alugueis, retiradas) = self.particao(mes)
+            hi = bisect.bisect_left(retiradas, fim)
+            resultado.extend(r for r in alugueis[:hi] if r["data_devolucao_efetiva"] > inicio)
+        return resultado
+
+    def buscar(self, rental_id):
+        """
+        Retorna o aluguel arquivado com esse rental_id, ou None.
+        """
+        self.recarregar()
+        for mes in self.meses():
+            p = self._indice[mes]
+            if p["min_id"] <= rental_id <= p["max_id"]:
+                for r in self.particao(mes)[0]:
+                    if r["rental_id"] == rental_id:
+                        return r
+        return None
+
+    def todos(self):
+        """
+        Percorre todos os aluguéis arquivados, partição por partição (em ordem de
+        mês e, dentro dela, de rental_id), sem guardá-los no cache.
+        """
+        self.recarregar()
+        for mes in self.meses():
+            yield from self._ler(mes).values()
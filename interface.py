@@ -0,0 +1,1010 @@
+import datetime
+import queue
+import threading
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import messagebox, simpledialog
+
+from utilizacao import calcular_utilizacao
+
+# ---------------------------------------------------------------------------------------
+# Definições de fonte, cores e estilos (para Tkinter)
+# ---------------------------------------------------------------------------------------
+DEFAULT_FONT = ("Arial", 13)
+BG_MAIN  = "#ECECEC"       # Fundo principal da janela
+BG_FRAME = "#FFFFFF"       # Fundo dos frames
+FG_TEXT  = "#333333"       # Cor do texto
+
+# Botões pretos
+BUTTON_BG   = "#000000"
+BUTTON_FG   = "#FFFFFF"
+BUTTON_STYLE = {
+    "font":             DEFAULT_FONT,
+    "bg":               BUTTON_BG,
+    "fg":               BUTTON_FG,
+    "activebackground": "#333333",
+    "cursor":           "hand2"
+}
+
+# Intervalo (ms) entre as verificações de mudanças feitas por outras instâncias
+SYNC_INTERVAL_MS = 2000
+
+# Pausa na digitação (ms) antes de a busca de veículos rodar
+BUSCA_ATRASO_MS = 150
+
+ENTRY_STYLE = {
+    "font":   DEFAULT_FONT,
+    "fg":     FG_TEXT,
+    "bg":     "#FFFFFF",
+    "bd":     2,
+    "relief": "solid"
+}
+
+# ---------------------------------------------------------------------------------------
+# Lista virtualizada (só as linhas visíveis ficam no widget)
+# ---------------------------------------------------------------------------------------
+class ListaVirtual(tk.Frame):
+    """
+    Text somente leitura que mostra uma janela de linhas de uma listagem.
+    A listagem é dada por `total()` (quantidade de itens), `buscar(offset, limit)`
+    (os itens da janela) e `formatar(item)` (a linha, terminada em "\n").
+    A barra de rolagem e a roda do mouse mudam o offset e pedem só as linhas
+    que cabem na tela: o custo de desenhar não depende do tamanho da listagem.
+    """
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, bg=kwargs.get("bg", BG_FRAME))
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.text = tk.Text(self, wrap="none", font=DEFAULT_FONT, fg=FG_TEXT, **kwargs)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scroll_y = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scroll_y.grid(row=0, column=1, sticky="ns")
+        self.scroll_x = tk.Scrollbar(self, orient="horizontal", command=self.text.xview)
+        self.scroll_x.grid(row=1, column=0, sticky="ew")
+        self.text.config(xscrollcommand=self.scroll_x.set, state="disabled")
+
+        self._altura_linha = tkfont.Font(font=DEFAULT_FONT).metrics("linespace")
+        self.linhas = int(self.text.cget("height"))
+        self.offset = 0
+        self._total = None
+        self._buscar = None
+        self._formatar = None
+        self._vazio = ""
+
+        self.text.bind("<Configure>", self.on_configure)
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(evento, self.on_wheel)
+
+    def mostrar(self, total, buscar, formatar, vazio=""):
+        self._total = total
+        self._buscar = buscar
+        self._formatar = formatar
+        self._vazio = vazio
+        self.offset = 0
+        self.atualizar()
+
+    def mostrar_lista(self, itens, formatar, vazio=""):
+        self.mostrar(lambda: len(itens), lambda offset, limit: itens[offset:offset + limit],
+                     formatar, vazio)
+
+    def mostrar_texto(self, texto):
+        # Mensagem fixa (ex.: "Carregando..."), sem listagem por trás
+        self._total = None
+        self._escrever(texto)
+        self.scroll_y.set(0, 1)
+
+    def atualizar(self):
+        """
+        Redesenha a janela atual (ex.: depois de uma mutação), mantendo o offset.
+        """
+        if self._total is None:
+            return
+        total = self._total()
+        self.offset = max(0, min(self.offset, total - self.linhas))
+        if total == 0:
+            self._escrever(self._vazio)
+            self.scroll_y.set(0, 1)
+            return
+        itens = self._buscar(self.offset, self.linhas)
+        self._escrever("".join(self._formatar(item) for item in itens))
+        self.scroll_y.set(self.offset / total, min(1.0, (self.offset + self.linhas) / total))
+
+    def _escrever(self, texto):
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, texto)
+        self.text.config(state="disabled")
+
+    def rolar_para(self, offset):
+        if offset != self.offset:
+            self.offset = offset
+            self.atualizar()
+
+    def yview(self, *args):
+        # Comandos da barra de rolagem: ("moveto", fração) ou ("scroll", n, "units"|"pages")
+        if self._total is None:
+            return
+        if args[0] == "moveto":
+            self.rolar_para(int(float(args[1]) * self._total()))
+        elif args[0] == "scroll":
+            passo = self.linhas if args[2] == "pages" else 1
+            self.rolar_para(max(0, self.offset + int(args[1]) * passo))
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.yview("scroll", -3, "units")
+        else:
+            self.yview("scroll", 3, "units")
+        return "break"
+
+    def on_configure(self, event):
+        borda = 2 * (int(self.text.cget("pady")) + int(self.text.cget("borderwidth"))
+                     + int(self.text.cget("highlightthickness")))
+        linhas = max(1, (event.height - borda) // self._altura_linha)
+        if linhas != self.linhas:
+            self.linhas = linhas
+            self.atualizar()
+
+# ---------------------------------------------------------------------------------------
+# Segunda Tela: VisaoGeralWindow
+# ---------------------------------------------------------------------------------------
+class VisaoGeralWindow(tk.Toplevel):
+    """
+    Exibe:
+      - Aluguéis por Semana (Últimos 7 dias ou Semana Atual)
+      - Top 5 Carros no Mês
+      - Top 5 Clientes no Mês
+      - Gráfico de Linhas (últimos 7 dias, sem y negativo)
+    """
+    def __init__(self, master, system, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.master = master
+        self.system = system
+        self.title("Visão Geral - Estatísticas (Últimos 7 dias)")
+        self._resultados = queue.Queue()
+        self._geracao = 0
+        self._pendentes = set()
+        self._semana_alugueis = {}
+        self._poll_id = None
+        self._auto_refresh_id = None
+        self.configure(bg=BG_MAIN)
+        self.geometry("1400x700")
+
+        container = tk.Frame(self, bg=BG_MAIN)
+        container.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # 2 linhas × 3 colunas (a utilização ocupa a terceira coluna inteira)
+        for r in range(2):
+            container.rowconfigure(r, weight=1, minsize=300)
+        for c in range(3):
+            container.columnconfigure(c, weight=1, minsize=420)
+
+        # Frame Aluguéis por Semana
+        frame_semana = tk.LabelFrame(container, text="Aluguéis por Semana",
+                                     font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        frame_semana.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.setup_semana(frame_semana)
+
+        # Frame Gráfico
+        frame_grafico = tk.LabelFrame(container, text="Faturamento (Últimos 7 dias)",
+                                      font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        frame_grafico.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
+        self.setup_grafico(frame_grafico)
+
+        # Frame Top 5 Carros
+        frame_top_veic = tk.LabelFrame(container, text="Top 5 Carros no Mês",
+                                       font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        frame_top_veic.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.setup_top_veic(frame_top_veic)
+
+        # Frame Top 5 Clientes
+        frame_top_clients = tk.LabelFrame(container, text="Top 5 Clientes no Mês",
+                                          font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        frame_top_clients.grid(row=1, column=1, sticky="nsew", padx=5, pady=5)
+        self.setup_top_clients(frame_top_clients)
+
+        # Frame Utilização da Frota
+        frame_utilizacao = tk.LabelFrame(container, text="Utilização da Frota (30 dias)",
+                                         font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        frame_utilizacao.grid(row=0, column=2, rowspan=2, sticky="nsew", padx=5, pady=5)
+        self.setup_utilizacao(frame_utilizacao)
+
+        if self.system.metrics is not None:
+            self.system.metrics.instrumentar(self, ("update_all", "update_chart"), prefixo="gui.visao_geral.")
+
+        # Atualiza tudo (em segundo plano)
+        self.update_all()
+
+    def setup_semana(self, parent):
+        parent.rowconfigure(1, weight=1)
+        parent.columnconfigure(0, weight=1)
+
+        self.semana_var = tk.StringVar(value="last7")
+
+        radio_ultimos7 = tk.Radiobutton(parent, text="Últimos 7 dias",
+                                        variable=self.semana_var, value="last7",
+                                        font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT,
+                                        command=self.update_semana)
+        radio_ultimos7.grid(row=0, column=0, padx=5, pady=2, sticky="w")
+
+        radio_semana_atual = tk.Radiobutton(parent, text="Semana Atual",
+                                            variable=self.semana_var, value="currentweek",
+                                            font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT,
+                                            command=self.update_semana)
+        radio_semana_atual.grid(row=0, column=0, padx=5, pady=2, sticky="e")
+
+        self.lista_semana = ListaVirtual(parent, bg="#F9F9F9")
+        self.lista_semana.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
+
+    def update_semana(self):
+        # As duas listas chegam juntas da thread de cálculo; o rádio só alterna entre elas
+        modo = self.semana_var.get()
+        if modo not in self._semana_alugueis:
+            self.lista_semana.mostrar_texto(CARREGANDO)
+            return
+        self.lista_semana.mostrar_lista(self._semana_alugueis[modo], _linha_aluguel, SEMANA_VAZIA[modo])
+
+    def setup_grafico(self, parent):
+        parent.rowconfigure(0, weight=1)
+        parent.columnconfigure(0, weight=1)
+        self.frame_chart = tk.Frame(parent, bg=BG_FRAME)
+        self.frame_chart.grid(row=0, column=0, sticky="nsew")
+
+        self.auto_refresh_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(parent, text="Atualizar automaticamente", variable=self.auto_refresh_var,
+                       font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT,
+                       command=self.toggle_auto_refresh).grid(row=1, column=0, sticky="w", padx=5)
+
+        self.fig = None
+        self.canvas_mpl = None
+        self.chart_data = None
+        self.chart_placeholder = tk.Label(self.frame_chart, text="Carregando gráfico...",
+                                          font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        self.chart_placeholder.pack(fill="both", expand=True)
+
+    def update_chart(self, labels, values, fig=None):
+        """
+        Na primeira vez, coloca na tela a figura montada pela thread de cálculo
+        (ou a monta aqui). Depois, a mesma figura e o mesmo canvas são reaproveitados:
+        só os dados da linha, os rótulos do eixo x e o limite do eixo y mudam, e o
+        redesenho fica para quando o Tk estiver ocioso (draw_idle).
+        """
+        if (labels, values) == self.chart_data:
+            return
+        self.chart_data = (labels, values)
+        if self.canvas_mpl is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+            self.fig = fig if fig is not None else montar_grafico(labels, values)
+            self.chart_placeholder.destroy()
+            self.chart_placeholder = None
+            self.canvas_mpl = FigureCanvasTkAgg(self.fig, master=self.frame_chart)
+            self.canvas_mpl.get_tk_widget().pack(fill="both", expand=True)
+        else:
+            atualizar_grafico(self.fig, labels, values)
+        self.canvas_mpl.draw_idle()
+
+    def toggle_auto_refresh(self):
+        if self.auto_refresh_var.get():
+            if self._auto_refresh_id is None:
+                self._auto_refresh_id = self.after(AUTO_REFRESH_MS, self.auto_refresh)
+        elif self._auto_refresh_id is not None:
+            self.after_cancel(self._auto_refresh_id)
+            self._auto_refresh_id = None
+
+    def auto_refresh(self):
+        # Consulta só o faturamento dos 7 dias (agregado por dia); o gráfico só é
+        # redesenhado se algum valor ou dia mudou
+        (labels, values) = self.system.get_7days_faturamento()
+        self.update_chart(labels, values)
+        self._auto_refresh_id = self.after(AUTO_REFRESH_MS, self.auto_refresh)
+
+    def setup_top_veic(self, parent):
+        parent.rowconfigure(1, weight=1)
+        parent.columnconfigure(0, weight=1)
+        self.top_veic_text = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
+        self.top_veic_text.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
+
+    def setup_top_clients(self, parent):
+        parent.rowconfigure(1, weight=1)
+        parent.columnconfigure(0, weight=1)
+        self.top_clients_text = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
+        self.top_clients_text.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
+
+    def setup_utilizacao(self, parent):
+        parent.rowconfigure(1, weight=1)
+        parent.columnconfigure(0, weight=1)
+        self.utilizacao_text = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
+        self.utilizacao_text.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
+
+    @staticmethod
+    def show_text(widget, texto):
+        widget.delete("1.0", tk.END)
+        widget.insert(tk.END, texto)
+
+    def update_all(self):
+        """
+        Tira um snapshot dos dados (rápido, na thread do Tk) e calcula os painéis
+        em uma thread separada. Cada painel mostra "Carregando..." até o seu
+        resultado chegar pela fila, lida com after() (ver poll_results).
+        """
+        self._geracao += 1
+        self._semana_alugueis = {}
+        self._pendentes = set(PAINEIS)
+        self.lista_semana.mostrar_texto(CARREGANDO)
+        for widget in (self.top_veic_text, self.top_clients_text, self.utilizacao_text):
+            self.show_text(widget, CARREGANDO)
+        snapshot = self.system.dashboard_snapshot()
+        # A figura só é montada (na thread de cálculo) na primeira vez
+        threading.Thread(target=calcular_visao_geral,
+                         args=(snapshot, self._resultados, self._geracao, self.fig is None),
+                         name="visao-geral", daemon=True).start()
+        if self._poll_id is None:
+            self._poll_id = self.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def poll_results(self):
+        self._poll_id = None
+        while True:
+            try:
+                (geracao, painel, valor) = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            if geracao != self._geracao:
+                continue    # resultado de um cálculo anterior
+            self._pendentes.discard(painel)
+            if painel == "erro":
+                self._pendentes.clear()
+                erro = f"Erro ao calcular a Visão Geral: {valor}\n"
+                self.lista_semana.mostrar_texto(erro)
+                for widget in (self.top_veic_text, self.top_clients_text, self.utilizacao_text):
+                    self.show_text(widget, erro)
+            elif painel == "semana":
+                self._semana_alugueis = valor
+                self.update_semana()
+            elif painel == "top_veic":
+                self.show_text(self.top_veic_text, valor)
+            elif painel == "top_clients":
+                self.show_text(self.top_clients_text, valor)
+            elif painel == "utilizacao":
+                self.show_text(self.utilizacao_text, valor)
+            elif painel == "grafico":
+                self.update_chart(*valor)
+        if self._pendentes:
+            self._poll_id = self.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def destroy(self):
+        for after_id in (self._poll_id, self._auto_refresh_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self._poll_id = None
+        self._auto_refresh_id = None
+        super().destroy()
+
+# ---------------------------------------------------------------------------------------
+# Cálculo da Visão Geral (thread separada)
+# ---------------------------------------------------------------------------------------
+# Roda fora da thread do Tk: só usa o snapshot (CarRentalSystem.dashboard_snapshot)
+# e não toca em widgets; os resultados vão para a fila como (geração, painel, valor).
+CARREGANDO = "Carregando...\n"
+PAINEIS = ("semana", "top_veic", "top_clients", "utilizacao", "grafico")
+UTILIZACAO_DESTAQUES = 5   # veículos mais e menos usados listados no painel
+POLL_INTERVAL_MS = 50
+AUTO_REFRESH_MS = 5000   # intervalo da atualização automática do gráfico
+
+SEMANA_VAZIA = {
+    "last7": "Nenhum aluguel encontrado nos últimos 7 dias.\n",
+    "currentweek": "Nenhum aluguel encontrado na semana atual.\n",
+}
+
+def _linha_aluguel(aluguel):
+    (rental_id, vehicle_id, nome_cliente, data_retirada, status) = aluguel
+    return (f"Aluguel ID: {rental_id} | Veículo ID: {vehicle_id} | "
+            f"Cliente: {nome_cliente} | Retirada: {data_retirada.strftime('%d/%m/%Y %H:%M')} | "
+            f"Status: {status}\n")
+
+def _limite_y(values):
+    maior = max(values, default=0)
+    return maior * 1.1 if maior > 0 else 1
+
+def montar_grafico(labels, values):
+    """
+    Monta a Figure do faturamento dos últimos 7 dias (sem canvas do Tk).
+    O eixo x usa posições 0..6 com os dias como rótulos, para que
+    atualizar_grafico possa trocar os dados sem recriar nada.
+    """
+    # matplotlib só é importado quando o primeiro gráfico é montado
+    from matplotlib.figure import Figure
+    import matplotlib.ticker as ticker
+
+    fig = Figure(figsize=(5,3), dpi=100)
+    ax = fig.add_subplot(111)
+
+    # Plot
+    ax.plot(range(len(values)), values, marker='o', color='#000000', linewidth=2, markersize=8)
+    ax.set_xticks(range(len(labels)), labels)
+    ax.set_title("Faturamento dos Últimos 7 Dias", fontsize=14, fontweight='bold', pad=10)
+    ax.set_xlabel("Dia", fontsize=12)
+    ax.set_ylabel("Valor (R$)", fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.6)
+
+    ax.set_ylim(0, _limite_y(values))
+
+    def formato_moeda(x, pos):
+        return f"R$ {x:,.2f}"
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(formato_moeda))
+
+    fig.tight_layout()
+    return fig
+
+def atualizar_grafico(fig, labels, values):
+    """
+    Troca os dados da figura montada por montar_grafico, no lugar.
+    """
+    ax = fig.axes[0]
+    ax.lines[0].set_data(range(len(values)), values)
+    ax.set_xticks(range(len(labels)), labels)
+    ax.set_ylim(0, _limite_y(values))
+
+def calcular_visao_geral(snapshot, fila, geracao, criar_figura=True):
+    """
+    Calcula os painéis a partir do snapshot e publica cada um na fila assim que fica pronto.
+    O gráfico vai como (labels, values, figura), com a figura só quando `criar_figura`.
+    """
+    try:
+        agora = snapshot["agora"]
+        sete_dias_atras = agora - datetime.timedelta(days=7)
+        inicio_semana = snapshot["inicio_semana"]
+        fim_semana = inicio_semana + datetime.timedelta(days=7)
+        alugueis = snapshot["alugueis"]
+        # Só filtra: as linhas são formatadas na tela, apenas as visíveis (ListaVirtual)
+        fila.put((geracao, "semana", {
+            "last7": [a for a in alugueis if a[3] >= sete_dias_atras],
+            "currentweek": [a for a in alugueis if inicio_semana <= a[3] < fim_semana],
+        }))
+
+        nomes = snapshot["nomes_veiculos"]
+        top5 = [(nomes[vid], count) for (vid, count) in snapshot["veiculos_mes"].most_common(5)
+                if nomes.get(vid)]
+        fila.put((geracao, "top_veic",
+                  "".join(f"{nome} - {count} aluguéis\n" for (nome, count) in top5)
+                  or "Nenhum aluguel este mês.\n"))
+
+        top5 = snapshot["clientes_mes"].most_common(5)
+        fila.put((geracao, "top_clients",
+                  "".join(f"CPF: {cpf} - {count} aluguéis\n" for (cpf, count) in top5)
+                  or "Nenhum aluguel este mês.\n"))
+
+        fila.put((geracao, "utilizacao", texto_utilizacao(snapshot)))
+
+        (labels, values) = snapshot["faturamento_7_dias"]
+        fila.put((geracao, "grafico",
+                  (labels, values, montar_grafico(labels, values) if criar_figura else None)))
+    except Exception as e:
+        fila.put((geracao, "erro", e))
+
+def texto_utilizacao(snapshot):
+    """
+    Resume a utilização dos últimos 30 dias: % da frota, % por semana e os
+    veículos mais e menos usados, com a maior lacuna ociosa de cada um.
+    """
+    veiculos = snapshot["veiculos"]
+    if not veiculos:
+        return "Nenhum veículo cadastrado.\n"
+    relatorio = calcular_utilizacao(snapshot["intervalos_utilizacao"],
+                                    [vid for (vid, _) in veiculos],
+                                    snapshot["inicio_utilizacao"], snapshot["agora"], "semana")
+    nomes = dict(veiculos)
+    linhas = [f"Frota: {relatorio['ocupacao_frota']:.1f}% do tempo alugada\n", "\nPor semana:\n"]
+    for (inicio, pct) in zip(relatorio["periodos"], relatorio["frota"]):
+        linhas.append(f"  {inicio.strftime('%d/%m')}: {pct:.1f}%\n")
+
+    def linha(vid):
+        uso = relatorio["veiculos"][vid]
+        lacuna = uso["maior_lacuna"]
+        dias = (lacuna[1] - lacuna[0]) / datetime.timedelta(days=1) if lacuna else 0.0
+        return (f"  ID {vid} {nomes.get(vid, '')}: {uso['ocupacao_total']:.1f}% "
+                f"(maior lacuna: {dias:.1f} dias)\n")
+
+    ordem = sorted(relatorio["veiculos"], key=lambda vid: relatorio["veiculos"][vid]["ocupacao_total"])
+    linhas.append("\nMais usados:\n")
+    linhas.extend(linha(vid) for vid in reversed(ordem[-UTILIZACAO_DESTAQUES:]))
+    linhas.append("\nMenos usados:\n")
+    linhas.extend(linha(vid) for vid in ordem[:UTILIZACAO_DESTAQUES])
+    return "".join(linhas)
+
+def _linha_veiculo(v):
+    status = "Disponível" if v["disponivel"] else "Indisponível"
+    return (f"ID: {v['id']} | {v['nome']} - {v['marca']} "
+            f"- {v['ano']} - {v['placa']} [{status}]\n")
+
+def _linha_aluguel_aberto(r):
+    dt_ret = r["data_retirada"].strftime('%d/%m/%Y %H:%M')
+    dt_dev_est = r["data_devolucao_estimada"].strftime('%d/%m/%Y %H:%M')
+    return (f"Aluguel ID: {r['rental_id']} | Veículo ID: {r['vehicle_id']} | "
+            f"Cliente: {r['nome_cliente']} | CPF: {r['cpf']} | Dias: {r['dias']} | "
+            f"Retirada: {dt_ret} | Devolução Estimada: {dt_dev_est}\n")
+
+# ---------------------------------------------------------------------------------------
+# Tela Principal (CarRentalApp)
+# ---------------------------------------------------------------------------------------
+class CarRentalApp(tk.Tk):
+    """
+    Tela Principal (3 colunas, 3 linhas).
+    Seção "Alugar Veículo" com Nome do Cliente.
+    Na listagem de aluguéis abertos, mostra "Devolução Estimada".
+    Botão "Apagar Base de Dados" agora abaixo do botão "Visão Geral".
+    """
+    def __init__(self, system, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.system = system
+        if self.system.metrics is not None:
+            # Tempo de cada ação da tela, incluindo o redesenho, junto às métricas do sistema
+            self.system.metrics.instrumentar(
+                self, [nome for nome in dir(self) if nome.startswith("handle_")], prefixo="gui.")
+
+        self.title("Sistema de Aluguel de Carros - Tela Principal")
+        self.configure(bg=BG_MAIN)
+        self.geometry("1200x700")
+
+        container = tk.Frame(self, bg=BG_MAIN)
+        container.pack(fill="both", expand=True, padx=10, pady=10)
+
+        for r in range(3):
+            container.rowconfigure(r, weight=1, minsize=200)
+        for c in range(3):
+            container.columnconfigure(c, weight=1, minsize=370)
+
+        # Coluna 0
+        self.frame_login = tk.LabelFrame(container, text="Login / Logout", font=DEFAULT_FONT,
+                                         bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_login.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.setup_login_logout(self.frame_login)
+
+        self.frame_create_user = tk.LabelFrame(container, text="Criar Usuário (Admin)",
+                                              font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_create_user.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.setup_criar_usuario(self.frame_create_user)
+
+        self.frame_vehicle = tk.LabelFrame(container, text="Cadastrar Veículo (Admin)",
+                                           font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_vehicle.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
+        self.setup_cadastrar_veiculo(self.frame_vehicle)
+
+        # Coluna 1
+        self.frame_mod_vehicle = tk.LabelFrame(container, text="Modificar Veículo (Admin)",
+                                               font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_mod_vehicle.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
+        self.setup_modificar_veiculo(self.frame_mod_vehicle)
+
+        self.frame_rent = tk.LabelFrame(container, text="Alugar Veículo", font=DEFAULT_FONT,
+                                        bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_rent.grid(row=1, column=1, sticky="nsew", padx=5, pady=5)
+        self.setup_alugar(self.frame_rent)
+
+        self.frame_return = tk.LabelFrame(container, text="Devolução de Veículo", font=DEFAULT_FONT,
+                                          bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_return.grid(row=2, column=1, sticky="nsew", padx=5, pady=5)
+        self.setup_devolver(self.frame_return)
+
+        # Coluna 2
+        self.frame_listings = tk.LabelFrame(container, text="Listagens Gerais", font=DEFAULT_FONT,
+                                            bg=BG_FRAME, fg=FG_TEXT)
+        self.frame_listings.grid(row=0, column=2, rowspan=2, sticky="nsew", padx=5, pady=5)
+        self.setup_listagens(self.frame_listings)
+
+        # Frame col=2, row=2 - para Visão Geral + Apagar Base
+        self.frame_visao_geral = tk.Frame(container, bg=BG_MAIN)
+        self.frame_visao_geral.grid(row=2, column=2, sticky="nsew", padx=5, pady=5)
+        self.setup_visao_geral_button(self.frame_visao_geral)
+
+        self.update_ui()
+        if self.system.shared:
+            self.after(SYNC_INTERVAL_MS, self.poll_sync)
+
+    def poll_sync(self):
+        # Modo compartilhado: traz as mutações feitas por outras instâncias
+        if self.system.sync():
+            self.update_ui()
+        self.after(SYNC_INTERVAL_MS, self.poll_sync)
+
+    # ------------------ Métodos de Setup ------------------
+    def setup_login_logout(self, parent):
+        parent.columnconfigure(1, weight=1)
+        tk.Label(parent, text="Usuário:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
+        self.entry_username = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_username.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Senha:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
+        self.entry_password = tk.Entry(parent, show="*", **ENTRY_STYLE)
+        self.entry_password.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
+
+        btn_login = tk.Button(parent, text="Login", **BUTTON_STYLE, command=self.handle_login)
+        btn_login.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
+
+        btn_logout = tk.Button(parent, text="Logout", **BUTTON_STYLE, command=self.handle_logout)
+        btn_logout.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+
+        self.label_logged_user = tk.Label(parent, text="Não logado", fg="red",
+                                          font=(DEFAULT_FONT[0], DEFAULT_FONT[1], "italic"), bg=BG_FRAME)
+        self.label_logged_user.grid(row=3, column=0, columnspan=2, pady=5)
+
+    def setup_criar_usuario(self, parent):
+        parent.columnconfigure(1, weight=1)
+        tk.Label(parent, text="Username:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
+        self.entry_newuser_username = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_newuser_username.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Senha:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
+        self.entry_newuser_password = tk.Entry(parent, show="*", **ENTRY_STYLE)
+        self.entry_newuser_password.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Tipo:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
+        self.role_var = tk.StringVar(value="padrao")
+        role_options = ["admin", "padrao"]
+        option_role = tk.OptionMenu(parent, self.role_var, *role_options)
+        option_role.config(font=DEFAULT_FONT, bg="#FFFFFF", fg=FG_TEXT, bd=2, relief="solid")
+        option_role.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
+
+        btn_createuser = tk.Button(parent, text="Criar", **BUTTON_STYLE, command=self.handle_create_user)
+        btn_createuser.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+    def setup_cadastrar_veiculo(self, parent):
+        parent.columnconfigure(1, weight=1)
+        tk.Label(parent, text="Nome:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
+        self.entry_veic_nome = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_veic_nome.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Marca:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
+        self.entry_veic_marca = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_veic_marca.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Ano:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
+        self.entry_veic_ano = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_veic_ano.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Placa:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=3, column=0, sticky="e", padx=5, pady=3)
+        self.entry_veic_placa = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_veic_placa.grid(row=3, column=1, sticky="ew", padx=5, pady=3)
+
+        btn_register_veic = tk.Button(parent, text="Cadastrar", **BUTTON_STYLE, command=self.handle_register_vehicle)
+        btn_register_veic.grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+    def setup_modificar_veiculo(self, parent):
+        parent.columnconfigure(1, weight=1)
+        tk.Label(parent, text="ID:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
+        self.entry_mod_id = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_mod_id.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Novo Nome:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
+        self.entry_mod_nome = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_mod_nome.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Nova Marca:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
+        self.entry_mod_marca = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_mod_marca.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Novo Ano:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=3, column=0, sticky="e", padx=5, pady=3)
+        self.entry_mod_ano = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_mod_ano.grid(row=3, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Nova Placa:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=4, column=0, sticky="e", padx=5, pady=3)
+        self.entry_mod_placa = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_mod_placa.grid(row=4, column=1, sticky="ew", padx=5, pady=3)
+
+        btn_mod_vehicle = tk.Button(parent, text="Modificar", **BUTTON_STYLE, command=self.handle_modify_vehicle)
+        btn_mod_vehicle.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+    def setup_alugar(self, parent):
+        parent.columnconfigure(1, weight=1)
+
+        tk.Label(parent, text="ID Veículo:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
+        self.entry_rent_id = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_rent_id.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Nome do Cliente:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
+        self.entry_rent_nome = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_rent_nome.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="CPF:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
+        self.entry_rent_cpf = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_rent_cpf.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="WhatsApp:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=3, column=0, sticky="e", padx=5, pady=3)
+        self.entry_rent_whatsapp = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_rent_whatsapp.grid(row=3, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="Dias:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=4, column=0, sticky="e", padx=5, pady=3)
+        self.entry_rent_dias = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_rent_dias.grid(row=4, column=1, sticky="ew", padx=5, pady=3)
+
+        tk.Label(parent, text="R$/dia:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=5, column=0, sticky="e", padx=5, pady=3)
+        self.entry_rent_valordia = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_rent_valordia.grid(row=5, column=1, sticky="ew", padx=5, pady=3)
+
+        btn_rent = tk.Button(parent, text="Alugar", **BUTTON_STYLE, command=self.handle_rent_vehicle)
+        btn_rent.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+    def setup_devolver(self, parent):
+        parent.columnconfigure(1, weight=1)
+        tk.Label(parent, text="ID Aluguel:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
+            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
+        self.entry_return_id = tk.Entry(parent, **ENTRY_STYLE)
+        self.entry_return_id.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
+
+        btn_return = tk.Button(parent, text="Devolver", **BUTTON_STYLE, command=self.handle_return_vehicle)
+        btn_return.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+    def setup_listagens(self, parent):
+        parent.rowconfigure(3, weight=1)
+        parent.columnconfigure(0, weight=1)
+
+        btn_list_vehicles = tk.Button(parent, text="Listar Veículos", **BUTTON_STYLE,
+                                      command=self.handle_list_vehicles)
+        btn_list_vehicles.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+
+        btn_list_open_rentals = tk.Button(parent, text="Listar Aluguéis em Aberto",
+                                          **BUTTON_STYLE, command=self.handle_list_open_rentals)
+        btn_list_open_rentals.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
+
+        # Busca de veículos enquanto digita (nome, marca, ano ou início da placa)
+        frame_busca = tk.Frame(parent, bg=BG_FRAME)
+        frame_busca.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
+        frame_busca.columnconfigure(1, weight=1)
+        tk.Label(frame_busca, text="Buscar:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT).grid(
+            row=0, column=0, sticky="w")
+        self.entry_busca = tk.Entry(frame_busca, **ENTRY_STYLE)
+        self.entry_busca.grid(row=0, column=1, padx=5, sticky="ew")
+        self.entry_busca.bind("<KeyRelease>", self.schedule_search)
+        self.busca_disponiveis_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_busca, text="Só disponíveis", variable=self.busca_disponiveis_var,
+                       font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT,
+                       command=self.handle_search_vehicles).grid(row=0, column=2, sticky="e")
+        self._busca_id = None
+
+        self.lista_geral = ListaVirtual(parent, bg="#F9F9F9")
+        self.lista_geral.grid(row=3, column=0, padx=5, pady=5, sticky="nsew")
+
+    def setup_visao_geral_button(self, parent):
+        # Botão "Visão Geral"
+        btn_visao = tk.Button(parent, text="Visão Geral", **BUTTON_STYLE,
+                              command=self.open_visao_geral)
+        btn_visao.pack(fill="x", padx=5, pady=5)
+
+        # Botão "Apagar Base de Dados" abaixo do "Visão Geral"
+        btn_clear_db = tk.Button(parent, text="Apagar Base de Dados", **BUTTON_STYLE,
+                                 command=self.handle_clear_database)
+        btn_clear_db.pack(fill="x", padx=5, pady=5)
+
+    # ------------------ Métodos-Handler ------------------
+    def open_visao_geral(self):
+        if not self.system.get_current_user():
+            messagebox.showerror("Erro", "É necessário estar logado para abrir a Visão Geral!")
+            return
+        visao = VisaoGeralWindow(self, self.system)
+        visao.grab_set()
+
+    def handle_login(self):
+        user = self.entry_username.get().strip()
+        pw   = self.entry_password.get().strip()
+        if self.system.login(user, pw):
+            messagebox.showinfo("Login", f"Bem-vindo, {user}!")
+        else:
+            messagebox.showerror("Erro", "Usuário ou senha incorretos.")
+        self.update_ui()
+
+    def handle_logout(self):
+        self.system.logout()
+        self.update_ui()
+
+    def handle_create_user(self):
+        username = self.entry_newuser_username.get().strip()
+        password = self.entry_newuser_password.get().strip()
+        role     = self.role_var.get().strip()
+        msg = self.system.create_user(username, password, role)
+        messagebox.showinfo("Criar Usuário", msg)
+        self.update_ui()
+
+    def handle_register_vehicle(self):
+        nome  = self.entry_veic_nome.get().strip()
+        marca = self.entry_veic_marca.get().strip()
+        ano   = self.entry_veic_ano.get().strip()
+        placa = self.entry_veic_placa.get().strip()
+        msg   = self.system.register_vehicle(nome, marca, ano, placa)
+        messagebox.showinfo("Cadastro de Veículo", msg)
+        self.update_ui()
+
+    def handle_modify_vehicle(self):
+        try:
+            vehicle_id = int(self.entry_mod_id.get().strip())
+        except ValueError:
+            messagebox.showerror("Erro", "ID do veículo inválido!")
+            return
+        nome  = self.entry_mod_nome.get().strip()
+        marca = self.entry_mod_marca.get().strip()
+        ano   = self.entry_mod_ano.get().strip()
+        placa = self.entry_mod_placa.get().strip()
+        msg   = self.system.modify_vehicle(vehicle_id, nome, marca, ano, placa)
+        messagebox.showinfo("Modificar Veículo", msg)
+        self.update_ui()
+
+    def handle_rent_vehicle(self):
+        try:
+            vehicle_id = int(self.entry_rent_id.get().strip())
+        except ValueError:
+            messagebox.showerror("Erro", "ID do veículo inválido!")
+            return
+
+        nome_cliente = self.entry_rent_nome.get().strip()
+        cpf          = self.entry_rent_cpf.get().strip()
+        whatsapp     = self.entry_rent_whatsapp.get().strip()
+
+        try:
+            dias          = int(self.entry_rent_dias.get().strip())
+            valor_por_dia = float(self.entry_rent_valordia.get().strip())
+        except ValueError:
+            messagebox.showerror("Erro", "Dias ou valor por dia inválidos!")
+            return
+
+        msg = self.system.rent_vehicle(vehicle_id, nome_cliente, cpf, whatsapp, dias, valor_por_dia)
+        messagebox.showinfo("Aluguel", msg)
+
+        # Limpar campos após alugar
+        self.entry_rent_id.delete(0, tk.END)
+        self.entry_rent_nome.delete(0, tk.END)
+        self.entry_rent_cpf.delete(0, tk.END)
+        self.entry_rent_whatsapp.delete(0, tk.END)
+        self.entry_rent_dias.delete(0, tk.END)
+        self.entry_rent_valordia.delete(0, tk.END)
+
+        self.update_ui()
+
+    def handle_return_vehicle(self):
+        try:
+            rental_id = int(self.entry_return_id.get().strip())
+        except ValueError:
+            messagebox.showerror("Erro", "ID do aluguel inválido!")
+            return
+        msg = self.system.return_vehicle(rental_id)
+        messagebox.showinfo("Devolução", msg)
+        self.update_ui()
+
+    def handle_list_vehicles(self):
+        self.lista_geral.mostrar(self.system.count_vehicles, self.system.list_vehicles_page,
+                                 _linha_veiculo, "Nenhum veículo cadastrado.\n")
+
+    def schedule_search(self, event=None):
+        # Espera uma pausa na digitação antes de buscar
+        if self._busca_id is not None:
+            self.after_cancel(self._busca_id)
+        self._busca_id = self.after(BUSCA_ATRASO_MS, self.handle_search_vehicles)
+
+    def handle_search_vehicles(self):
+        self._busca_id = None
+        texto = self.entry_busca.get().strip()
+        disponivel = True if self.busca_disponiveis_var.get() else None
+        if not texto and disponivel is None:
+            self.handle_list_vehicles()
+            return
+        vehicles = self.system.search_vehicles(texto, disponivel=disponivel)
+        self.lista_geral.mostrar_lista(vehicles, _linha_veiculo, "Nenhum veículo encontrado.\n")
+
+    def handle_list_open_rentals(self):
+        self.lista_geral.mostrar(self.system.count_open_rentals, self.system.list_open_rentals_page,
+                                 _linha_aluguel_aberto, "Não há aluguéis em aberto.\n")
+
+    def handle_clear_database(self):
+        """
+        Botão "Apagar Base de Dados" (agora abaixo do botão "Visão Geral"):
+        - Verifica se o usuário é admin
+        - Pede confirmação (messagebox.askyesno)
+        - Pede senha do admin (simpledialog.askstring)
+        - Se ok, chama system.clear_data()
+        """
+        if not self.system.is_admin():
+            messagebox.showerror("Erro", "Somente admin pode apagar a base de dados.")
+            return
+
+        confirm = messagebox.askyesno("Confirmação", 
+                                      "Você tem certeza que deseja APAGAR TODOS OS DADOS?\nEsta ação é irreversível!")
+        if not confirm:
+            return
+
+        # Pede senha do admin
+        admin_pass = simpledialog.askstring("Senha do Admin", 
+                                            "Por favor, insira a senha do admin para confirmar:",
+                                            show='*')
+        if admin_pass is None:
+            # Usuário cancelou o input
+            return
+
+        # Verifica se a senha está correta
+        # Precisamos achar o user admin ("admin") e verificar a password
+        admin_user = self.system.get_user("admin")
+        if admin_user is not None and admin_user["role"] != "admin":
+            admin_user = None
+
+        if admin_user is not None and admin_user["password"] == admin_pass:
+            self.system.clear_data()
+            messagebox.showinfo("Sucesso", "Base de dados apagada com sucesso. Admin recriado (admin/admin).")
+        else:
+            messagebox.showerror("Erro", "Senha de admin incorreta. Base de dados não foi apagada.")
+
+    def update_ui(self):
+        # A listagem aberta é redesenhada (só a parte visível) para refletir mutações
+        self.lista_geral.atualizar()
+
+        user = self.system.get_current_user()
+        if user:
+            self.label_logged_user.config(text=f"Logado como: {user['username']}", fg="green")
+        else:
+            self.label_logged_user.config(text="Não logado", fg="red")
+
+        is_logged_in = bool(user)
+        is_admin = self.system.is_admin()
+
+        # Criar usuário: só admin
+        state_create_user = "normal" if is_admin else "disabled"
+        self.entry_newuser_username.config(state=state_create_user)
+        self.entry_newuser_password.config(state=state_create_user)
+        for w in self.frame_create_user.children.values():
+            if isinstance(w, tk.OptionMenu):
+                w.config(state=state_create_user)
+            if isinstance(w, tk.Button) and w.cget("text") == "Criar":
+                w.config(state=state_create_user)
+
+        # Cadastrar e modificar veículos: só admin
+        state_vehicle_admin = "normal" if is_admin else "disabled"
+        self.entry_veic_nome.config(state=state_vehicle_admin)
+        self.entry_veic_marca.config(state=state_vehicle_admin)
+        self.entry_veic_ano.config(state=state_vehicle_admin)
+        self.entry_veic_placa.config(state=state_vehicle_admin)
+
+        self.entry_mod_id.config(state=state_vehicle_admin)
+        self.entry_mod_nome.config(state=state_vehicle_admin)
+        self.entry_mod_marca.config(state=state_vehicle_admin)
+        self.entry_mod_ano.config(state=state_vehicle_admin)
+        self.entry_mod_placa.config(state=state_vehicle_admin)
+
+        for w in self.frame_vehicle.children.values():
+            if isinstance(w, tk.Button) and w.cget("text") == "Cadastrar":
+                w.config(state=state_vehicle_admin)
+        for w in self.frame_mod_vehicle.children.values():
+            if isinstance(w, tk.Button) and w.cget("text") == "Modificar":
+                w.config(state=state_vehicle_admin)
+
+        # Alugar e devolver: qualquer usuário logado
+        state_rent_return = "normal" if is_logged_in else "disabled"
+        self.entry_rent_id.config(state=state_rent_return)
+        self.entry_rent_nome.config(state=state_rent_return)
+        self.entry_rent_cpf.config(state=state_rent_return)
+        self.entry_rent_whatsapp.config(state=state_rent_return)
+        self.entry_rent_dias.config(state=state_rent_return)
+        self.entry_rent_valordia.config(state=state_rent_return)
+        self.entry_return_id.config(state=state_rent_return)
+
+        for w in self.frame_rent.children.values():
+            if isinstance(w, tk.Button) and w.cget("text") == "Alugar":
+                w.config(state=state_rent_return)
+        for w in self.frame_return.children.values():
+            if isinstance(w, tk.Button) and w.cget("text") == "Devolver":
+                w.config(state=state_rent_return)
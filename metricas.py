@@ -0,0 +1,132 @@
+import datetime
+import functools
+import json
+import threading
+import time
+
+# ---------------------------------------------------------------------------------------
+# Metricas - contagem de chamadas, histograma de latência e bytes gravados por operação
+# ---------------------------------------------------------------------------------------
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 1000 ms"
+LIMITES_MS = (0.01, 0.1, 1, 10, 100, 1000)
+
+# Intervalo padrão (segundos) entre as gravações periódicas no arquivo de métricas
+INTERVALO_GRAVACAO = 60
+
+def _faixa(ms):
+    for (i, limite) in enumerate(LIMITES_MS):
+        if ms <= limite:
+            return i
+    return len(LIMITES_MS)
+
+class EstatisticaOperacao:
+    __slots__ = ("chamadas", "total_ms", "max_ms", "faixas", "bytes")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.faixas = [0] * (len(LIMITES_MS) + 1)
+        self.bytes = 0
+
+    def to_dict(self):
+        nomes = [f"<={limite}ms" for limite in LIMITES_MS] + [f">{LIMITES_MS[-1]}ms"]
+        return {
+            "chamadas": self.chamadas,
+            "total_ms": round(self.total_ms, 4),
+            "media_ms": round(self.total_ms / self.chamadas, 4) if self.chamadas else 0.0,
+            "max_ms": round(self.max_ms, 4),
+            "histograma": dict(zip(nomes, self.faixas)),
+            "bytes_gravados": self.bytes,
+        }
+
+class Metricas:
+    """
+    Acumula, por nome de operação, a quantidade de chamadas, o tempo total e
+    máximo, um histograma de latência e os bytes gravados durante a chamada.
+    `bytes_gravados` é uma função que retorna o total já gravado pelo
+    armazenamento; a diferença antes/depois de cada chamada é atribuída a ela.
+
+    instrumentar() troca os métodos de um objeto por versões medidas apenas
+    naquela instância: sem métricas ligadas, as chamadas não passam por aqui.
+    """
+    def __init__(self, bytes_gravados=None):
+        self._ops = {}
+        self._lock = threading.Lock()
+        self._bytes_gravados = bytes_gravados
+        self._inicio = datetime.datetime.now()
+        self._thread = None
+        self._parar = threading.Event()
+
+    def registrar(self, nome, ms, nbytes=0):
+        with self._lock:
+            op = self._ops.get(nome)
+            if op is None:
+                op = self._ops[nome] = EstatisticaOperacao()
+            op.chamadas += 1
+            op.total_ms += ms
+            if ms > op.max_ms:
+                op.max_ms = ms
+            op.faixas[_faixa(ms)] += 1
+            op.bytes += nbytes
+
+    def medir(self, nome, func):
+        """
+        Retorna func envolvida por uma versão que registra cada chamada em `nome`.
+        """
+        bytes_gravados = self._bytes_gravados
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            b0 = bytes_gravados() if bytes_gravados else 0
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ms = (time.perf_counter() - t0) * 1000
+                self.registrar(nome, ms, (bytes_gravados() - b0) if bytes_gravados else 0)
+        return wrapper
+
+    def instrumentar(self, obj, nomes, prefixo=""):
+        for nome in nomes:
+            setattr(obj, nome, self.medir(prefixo + nome, getattr(obj, nome)))
+
+    @staticmethod
+    def desinstrumentar(obj, nomes):
+        for nome in nomes:
+            obj.__dict__.pop(nome, None)
+
+    def snapshot(self):
+        """
+        Retorna as métricas acumuladas como dict (pronto para JSON).
+        """
+        with self._lock:
+            operacoes = {nome: op.to_dict() for (nome, op) in sorted(self._ops.items())}
+        return {
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "desde": self._inicio.isoformat(timespec="seconds"),
+            "bytes_gravados": self._bytes_gravados() if self._bytes_gravados else 0,
+            "operacoes": operacoes,
+        }
+
+    # ------------------ Gravação periódica ------------------
+    def gravar(self, path):
+        """
+        Acrescenta o snapshot atual como uma linha JSON ao arquivo de métricas.
+        """
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot(), ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def iniciar_gravacao(self, path, intervalo=INTERVALO_GRAVACAO):
+        def loop():
+            while not self._parar.wait(intervalo):
+                self.gravar(path)
+        self._parar.clear()
+        self._thread = threading.Thread(target=loop, name="metricas", daemon=True)
+        self._thread.start()
+
+    def parar_gravacao(self):
+        if self._thread is not None:
+            self._parar.set()
+            self._thread.join()
+            self._thread = None
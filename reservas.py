@@ -0,0 +1,90 @@
+import bisect
+
+# ---------------------------------------------------------------------------------------
+# AgendaVeiculos - intervalos ocupados de cada veículo (reservas e aluguel em aberto)
+# ---------------------------------------------------------------------------------------
+# Os intervalos são semiabertos, [inicio, fim). As reservas de um mesmo veículo
+# nunca se sobrepõem (o CarRentalSystem recusa conflitos), então a lista ordenada pelo
+# início também está ordenada pelo fim e uma busca binária basta para achar
+# o único intervalo que poderia colidir com um período novo.
+
+# Situação de uma reserva; só as ativas ocupam a agenda
+RESERVA_ATIVA = "ativa"
+RESERVA_CANCELADA = "cancelada"
+RESERVA_RETIRADA = "retirada"      # virou aluguel (reserva["rental_id"])
+
+class AgendaVeiculos:
+    """
+    Por veículo: lista ordenada de reservas (inicio, fim, reserva_id) e o
+    aluguel em aberto (retirada, devolução estimada, rental_id). Um aluguel
+    em aberto ocupa o veículo até a devolução estimada ou, se estiver
+    atrasado, até `agora` (o carro ainda não voltou).
+    """
+    def __init__(self):
+        self.reconstruir((), ())
+
+    def reconstruir(self, reservas, alugueis_abertos):
+        self._reservas = {}   # vehicle_id -> [(inicio, fim, reserva_id)], ordenada
+        self._em_uso = {}     # vehicle_id -> (retirada, devolução estimada, rental_id)
+        for b in reservas:
+            self.adicionar_reserva(b["vehicle_id"], b["inicio"], b["fim"], b["reserva_id"])
+        for r in alugueis_abertos:
+            self.iniciar_uso(r["vehicle_id"], r["data_retirada"], r["data_devolucao_estimada"],
+                             r["rental_id"])
+
+    # ------------------ Reservas ------------------
+    def adicionar_reserva(self, vehicle_id, inicio, fim, reserva_id):
+        bisect.insort(self._reservas.setdefault(vehicle_id, []), (inicio, fim, reserva_id))
+
+    def remover_reserva(self, vehicle_id, inicio, fim, reserva_id):
+        lista = self._reservas.get(vehicle_id)
+        if not lista:
+            return
+        i = bisect.bisect_left(lista, (inicio, fim, reserva_id))
+        if i < len(lista) and lista[i] == (inicio, fim, reserva_id):
+            del lista[i]
+            if not lista:
+                del self._reservas[vehicle_id]
+
+    def reservas(self, vehicle_id):
+        return list(self._reservas.get(vehicle_id, ()))
+
+    # ------------------ Aluguel em aberto ------------------
+    def iniciar_uso(self, vehicle_id, retirada, fim_estimado, rental_id):
+        self._em_uso[vehicle_id] = (retirada, fim_estimado, rental_id)
+
+    def encerrar_uso(self, vehicle_id, rental_id):
+        uso = self._em_uso.get(vehicle_id)
+        if uso is not None and uso[2] == rental_id:
+            del self._em_uso[vehicle_id]
+
+    # ------------------ Consultas ------------------
+    def conflito(self, vehicle_id, inicio, fim, agora, ignorar_reserva=None):
+        """
+        Retorna o que ocupa o veículo em [inicio, fim): ("aluguel", rental_id),
+        ("reserva", reserva_id) ou None se estiver livre. O(log n) nas reservas
+        do veículo.
+        """
+        uso = self._em_uso.get(vehicle_id)
+        if uso is not None:
+            (retirada, fim_estimado, rental_id) = uso
+            if retirada < fim and inicio < max(fim_estimado, agora):
+                return ("aluguel", rental_id)
+        lista = self._reservas.get(vehicle_id)
+        if lista:
+            # Reservas que começam antes de `fim`: só as últimas podem terminar depois de `inicio`
+            i = bisect.bisect_left(lista, (fim,))
+            while i > 0:
+                i -= 1
+                (b_inicio, b_fim, reserva_id) = lista[i]
+                if b_fim <= inicio:
+                    break
+                if reserva_id != ignorar_reserva:
+                    return ("reserva", reserva_id)
+        return None
+
+    def livres(self, vehicle_ids, inicio, fim, agora):
+        """
+        Filtra os ids dos veículos sem nada marcado em [inicio, fim).
+        """
+        return [vid for vid in vehicle_ids if self.conflito(vid, inicio, fim, agora) is None]
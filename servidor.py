@@ -0,0 +1,460 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import secrets
+import sys
+import threading
+import time
+import traceback
+from http import HTTPStatus
+
+from armazenamento import datetime_to_str, rental_to_json, GROUP_COMMIT_MAX_DELAY
+from sistema_de_alugueis import CarRentalSystem
+
+# ---------------------------------------------------------------------------------------
+# Servidor HTTP/JSON (asyncio) para vários balcões usando o mesmo CarRentalSystem
+# ---------------------------------------------------------------------------------------
+# Rotas:
+#   POST /login                       {"username", "password"} -> {"token", ...}
+#   POST /logout
+#   GET  /veiculos
+#   POST /veiculos                    {"nome", "marca", "ano", "placa"}        (admin)
+#   PUT  /veiculos/<id>               {"nome", "marca", "ano", "placa"}        (admin)
+#   POST /usuarios                    {"username", "password", "role"}         (admin)
+#   POST /alugueis                    {"vehicle_id", "nome_cliente", "cpf", "whatsapp",
+#                                      "dias", "valor_por_dia"} -> {"mensagem", "rental_id"}
+#   POST /alugueis/<id>/devolucao
+#   GET  /alugueis/abertos
+#   GET  /alugueis/atrasados
+#   GET  /clientes/<cpf>
+#   GET  /estatisticas
+#   GET  /metricas                    (com --metricas)
+# As rotas autenticadas esperam o cabeçalho "Authorization: Bearer <token>".
+
+MAX_BODY = 1 << 20
+SYNC_INTERVAL = 2.0   # segundos entre sincronizações no modo compartilhado
+
+class HTTPError(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+class RentalHTTPServer:
+    """
+    Expõe um CarRentalSystem por HTTP/JSON. As mutações (e o sync do modo
+    compartilhado) entram em uma fila atendida por uma única thread de escrita,
+    então nunca há duas mutações ao mesmo tempo. As leituras são respondidas no
+    loop quando não há mutação em andamento; senão, em uma thread de leitura.
+    Leituras e mutações se excluem pela trava do estado em memória (`_estado`),
+    que a thread de escrita pega depois de obter a trava do arquivo: uma leitura
+    nunca vê uma mutação pela metade. O loop de eventos nunca espera por essa
+    trava nem pela do arquivo, então uma gravação ou recarga demorada não para
+    as outras conexões.
+    Cada sessão (token) tem o seu usuário logado, aplicado ao sistema só
+    durante a mutação.
+    """
+    def __init__(self, system):
+        self.system = system
+        self.sessions = {}            # token -> username
+        self._writes = None           # asyncio.Queue de (função, args, future)
+        self._executor = None         # thread única de escrita
+        self._leitor = None           # thread de leitura
+        self._estado = threading.Lock()
+        self._tasks = []
+        self._server = None
+
+    # ------------------ Ciclo de vida ------------------
+    async def start(self, host="127.0.0.1", port=8080):
+        self._writes = asyncio.Queue()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                               thread_name_prefix="escrita")
+        self._leitor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                             thread_name_prefix="leitura")
+        self._tasks.append(asyncio.create_task(self._writer()))
+        if self.system.shared:
+            self._tasks.append(asyncio.create_task(self._sync_loop()))
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        # Termina as mutações já enfileiradas antes de parar a tarefa de escrita
+        await self._writes.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._executor.shutdown()
+        self._leitor.shutdown()
+
+    async def serve_forever(self, host="127.0.0.1", port=8080):
+        (host, port) = await self.start(host, port)
+        print(f"Servidor em http://{host}:{port}")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # ------------------ Escrita única ------------------
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            (func, args, future) = await self._writes.get()
+            try:
+                if not future.cancelled():
+                    resultado = await loop.run_in_executor(self._executor, self._execute, func, args)
+                    if not future.cancelled():
+                        future.set_result(resultado)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self._writes.task_done()
+
+    def _execute(self, func, args):
+        # Na thread de escrita. No modo compartilhado, espera a trava do arquivo
+        # (reentrante: _mutation a pega de novo) antes de bloquear as leituras
+        if self.system.shared:
+            with self.system.storage.lock(), self._estado:
+                return func(*args)
+        with self._estado:
+            return func(*args)
+
+    async def _read(self, func, *args):
+        # Devolve o JSON já codificado: os objetos do sistema só são percorridos
+        # enquanto nenhuma mutação está em andamento. Sem mutação, responde ali
+        # mesmo; com uma em andamento, o loop não espera: a leitura vai para a
+        # thread de leitura, que aguarda a trava
+        if self._estado.acquire(blocking=False):
+            try:
+                return self._encode(func, args)
+            finally:
+                self._estado.release()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._leitor, self._consultar, func, args)
+
+    def _consultar(self, func, args):
+        with self._estado:
+            return self._encode(func, args)
+
+    @staticmethod
+    def _encode(func, args):
+        return json.dumps(func(*args), ensure_ascii=False).encode("utf-8")
+
+    def _write(self, func, *args):
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((func, args, future))
+        return future
+
+    def _as_user(self, username, method, *args):
+        # Executado pela tarefa de escrita: usa o usuário da sessão só nesta chamada
+        anterior = self.system.current_user
+        self.system.current_user = self.system.get_user(username)
+        try:
+            return method(*args)
+        finally:
+            self.system.current_user = anterior
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            await self._write(self.system.sync)
+
+    # ------------------ HTTP ------------------
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                (method, path, headers, body) = request
+                try:
+                    (status, payload) = await self.dispatch(method, path, headers, body)
+                except HTTPError as e:
+                    (status, payload) = (e.status, {"erro": e.mensagem})
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+                    (status, payload) = (HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "Erro interno."})
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            self._write_response(writer, e.status, {"erro": e.mensagem}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            self._write_response(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "Erro interno."}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            (method, target, _) = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Requisição inválida.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            (name, _, value) = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if length > MAX_BODY:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo muito grande.")
+        body = await reader.readexactly(length) if length else b""
+        return (method.upper(), target.split("?", 1)[0], headers, body)
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        # payload: objeto JSON ou bytes já codificados (ver _read)
+        status = HTTPStatus(status)
+        if isinstance(payload, bytes):
+            data = payload
+        else:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+
+    # ------------------ Rotas ------------------
+    async def dispatch(self, method, path, headers, body):
+        """
+        Executa uma requisição e retorna (status, objeto JSON).
+        """
+        partes = [p for p in path.split("/") if p]
+        dados = self._json(body) if method in ("POST", "PUT") else {}
+
+        if partes == ["login"] and method == "POST":
+            return self.login(dados)
+
+        username = self._session(headers)
+        if partes == ["logout"] and method == "POST":
+            self.sessions.pop(headers["authorization"][7:], None)
+            return (HTTPStatus.OK, {"mensagem": "Logout realizado."})
+
+        s = self.system
+        if partes == ["veiculos"]:
+            if method == "GET":
+                return (HTTPStatus.OK, await self._read(s.list_vehicles))
+            if method == "POST":
+                msg = await self._write(self._as_user, username, s.register_vehicle,
+                                        dados.get("nome", ""), dados.get("marca", ""),
+                                        dados.get("ano", ""), dados.get("placa", ""))
+                return (HTTPStatus.OK, {"mensagem": msg})
+        elif len(partes) == 2 and partes[0] == "veiculos" and method == "PUT":
+            msg = await self._write(self._as_user, username, s.modify_vehicle, self._id(partes[1]),
+                                    dados.get("nome", ""), dados.get("marca", ""),
+                                    dados.get("ano", ""), dados.get("placa", ""))
+            return (HTTPStatus.OK, {"mensagem": msg})
+        elif partes == ["usuarios"] and method == "POST":
+            msg = await self._write(self._as_user, username, s.create_user,
+                                    dados.get("username", ""), dados.get("password", ""),
+                                    dados.get("role", ""))
+            return (HTTPStatus.OK, {"mensagem": msg})
+        elif partes == ["alugueis"] and method == "POST":
+            try:
+                args = (int(dados["vehicle_id"]), dados.get("nome_cliente", ""), dados.get("cpf", ""),
+                        dados.get("whatsapp", ""), int(dados["dias"]), float(dados["valor_por_dia"]))
+            except (KeyError, TypeError, ValueError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                "Informe vehicle_id, dias e valor_por_dia numéricos.")
+            (msg, rental_id) = await self._write(self._as_user, username, self._rent, *args)
+            return (HTTPStatus.OK, {"mensagem": msg, "rental_id": rental_id})
+        elif len(partes) == 3 and partes[0] == "alugueis" and partes[2] == "devolucao" and method == "POST":
+            msg = await self._write(self._as_user, username, s.return_vehicle, self._id(partes[1]))
+            return (HTTPStatus.OK, {"mensagem": msg})
+        elif partes == ["alugueis", "abertos"] and method == "GET":
+            return (HTTPStatus.OK, await self._read(lambda: [rental_to_json(r) for r in s.list_open_rentals()]))
+        elif partes == ["alugueis", "atrasados"] and method == "GET":
+            return (HTTPStatus.OK, await self._read(lambda: [rental_to_json(r) for r in s.list_overdue_rentals()]))
+        elif len(partes) == 2 and partes[0] == "clientes" and method == "GET":
+            return (HTTPStatus.OK, await self._read(self.customer, partes[1]))
+        elif partes == ["estatisticas"] and method == "GET":
+            return (HTTPStatus.OK, await self._read(self.statistics))
+        elif partes == ["metricas"] and method == "GET":
+            return (HTTPStatus.OK, await self._read(self.metrics))
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"Rota não encontrada: {method} {path}")
+
+    def login(self, dados):
+        user = self.system.get_user(dados.get("username"))
+        if user is None or user["password"] != dados.get("password"):
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Usuário ou senha inválidos.")
+        token = secrets.token_hex(16)
+        self.sessions[token] = user["username"]
+        return (HTTPStatus.OK, {"token": token, "username": user["username"], "role": user["role"]})
+
+    def _rent(self, *args):
+        # Na thread de escrita: o id do aluguel é lido logo depois, na mesma mutação
+        msg = self.system.rent_vehicle(*args)
+        return (msg, self.system.last_rental_id)
+
+    def customer(self, cpf):
+        perfil = self.system.get_customer(cpf)
+        if perfil is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Cliente não encontrado.")
+        return dict(perfil, ultima_retirada=datetime_to_str(perfil["ultima_retirada"]))
+
+    def metrics(self):
+        metricas = self.system.get_metrics()
+        if metricas is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Métricas desligadas (use --metricas).")
+        return metricas
+
+    def statistics(self):
+        """
+        Os mesmos dados da tela Visão Geral.
+        """
+        s = self.system
+        (labels, values) = s.get_7days_faturamento()
+        return {
+            "ultimos_7_dias": [dict(rental_to_json(r), status=status)
+                               for (r, status) in s.list_rentals_last_7_days()],
+            "semana_atual": [dict(rental_to_json(r), status=status)
+                             for (r, status) in s.list_rentals_current_week()],
+            "top_5_veiculos_mes": s.get_top_5_veiculos_mes(),
+            "top_5_clientes_mes": s.get_top_5_clientes_mes(),
+            "faturamento_7_dias": dict(zip(labels, values)),
+        }
+
+    def _session(self, headers):
+        auth = headers.get("authorization", "")
+        username = self.sessions.get(auth[7:]) if auth.startswith("Bearer ") else None
+        if username is None or self.system.get_user(username) is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Faça login para usar esta rota.")
+        return username
+
+    @staticmethod
+    def _json(body):
+        if not body:
+            return {}
+        try:
+            dados = json.loads(body)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Corpo JSON inválido.")
+        if not isinstance(dados, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "O corpo deve ser um objeto JSON.")
+        return dados
+
+    @staticmethod
+    def _id(texto):
+        try:
+            return int(texto)
+        except ValueError:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Id inválido: {texto}")
+
+# ---------------------------------------------------------------------------------------
+# Medição de vazão e latência contra o servidor
+# ---------------------------------------------------------------------------------------
+async def _request(reader, writer, method, path, dados=None, token=None):
+    body = json.dumps(dados).encode("utf-8") if dados is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    if token:
+        head += f"Authorization: Bearer {token}\r\n"
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return (status, json.loads(await reader.readexactly(length)))
+
+async def benchmark(host="127.0.0.1", port=8080, requisicoes=2000, conexoes=20, leituras=0.8):
+    """
+    Abre `conexoes` conexões keep-alive (cada uma um "balcão" logado como admin)
+    e faz `requisicoes` requisições no total: `leituras` de fração são leituras
+    (/veiculos, /alugueis/abertos, /estatisticas), o resto aluga ou devolve.
+    Retorna um dict com vazão (req/s) e latências (ms).
+    """
+    latencias = []
+    por_conexao = requisicoes // conexoes
+
+    async def balcao(n):
+        (reader, writer) = await asyncio.open_connection(host, port)
+        (_, login) = await _request(reader, writer, "POST", "/login",
+                                    {"username": "admin", "password": "admin"})
+        token = login["token"]
+        for i in range(por_conexao):
+            inicio = time.perf_counter()
+            if (i * 7919 + n) % 100 < leituras * 100:
+                rota = ("/veiculos", "/alugueis/abertos", "/estatisticas")[i % 3]
+                await _request(reader, writer, "GET", rota, token=token)
+            else:
+                (_, abertos) = await _request(reader, writer, "GET", "/alugueis/abertos", token=token)
+                if i % 2 and abertos:
+                    await _request(reader, writer, "POST",
+                                   f"/alugueis/{abertos[0]['rental_id']}/devolucao", token=token)
+                else:
+                    (_, veiculos) = await _request(reader, writer, "GET", "/veiculos", token=token)
+                    livres = [v for v in veiculos if v["disponivel"]]
+                    if livres:
+                        await _request(reader, writer, "POST", "/alugueis", {
+                            "vehicle_id": livres[n % len(livres)]["id"], "nome_cliente": f"Cliente {n}",
+                            "cpf": f"{n:011d}", "whatsapp": "", "dias": 1 + i % 5,
+                            "valor_por_dia": 100.0}, token=token)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        writer.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(balcao(n) for n in range(conexoes)))
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "requisicoes": len(latencias),
+        "segundos": round(total, 3),
+        "req_por_segundo": round(len(latencias) / total, 1),
+        "latencia_media_ms": round(sum(latencias) / len(latencias), 3),
+        "latencia_p50_ms": round(latencias[len(latencias) // 2], 3),
+        "latencia_p99_ms": round(latencias[int(len(latencias) * 0.99)], 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON do sistema de aluguéis.")
+    parser.add_argument("--arquivo", default="data.json", help="arquivo de dados (.json, .bin ou .db)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--compartilhado", action="store_true",
+                        help="permite outras instâncias (GUI ou servidores) no mesmo arquivo")
+    parser.add_argument("--metricas", help="liga as métricas e as grava neste arquivo (JSONL)")
+    parser.add_argument("--bench", action="store_true",
+                        help="mede vazão e latência de um servidor já em execução")
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--conexoes", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.bench:
+        resultado = asyncio.run(benchmark(args.host, args.porta, args.requisicoes, args.conexoes))
+        for (chave, valor) in resultado.items():
+            print(f"{chave}: {valor}")
+        return
+
+    system = CarRentalSystem(args.arquivo, flush_delay=GROUP_COMMIT_MAX_DELAY,
+                             shared=args.compartilhado, metrics_path=args.metricas)
+    try:
+        asyncio.run(RentalHTTPServer(system).serve_forever(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        system.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,401 @@
-import tkinter as tk
-from tkinter import messagebox, simpledialog
+import bisect
 import datetime
-import json
-import os
+import functools
+import heapq
+import itertools
+from collections import Counter
 
-# Para o gráfico (matplotlib)
-import matplotlib
-matplotlib.use("Agg")  # caso queira rodar sem interface de backend
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.ticker as ticker
+from armazenamento import (datetime_to_str, str_to_datetime, open_storage, Rental,
+                           GroupCommitStorage, JOURNAL_COMPACT_THRESHOLD, GROUP_COMMIT_MAX_DELAY)
+from busca import IndiceVeiculos
+from clientes import IndiceClientes, combinar
+from historico import HistoricoMensal, historico_dir
+from metricas import Metricas, INTERVALO_GRAVACAO
+from reservas import AgendaVeiculos, RESERVA_ATIVA, RESERVA_CANCELADA, RESERVA_RETIRADA
+from utilizacao import calcular_utilizacao, inicio_do_periodo, proximo_periodo, PERIODOS
 
-# ---------------------------------------------------------------------------------------
-# Funções auxiliares para lidar com datas (datetime <-> string ISO-8601)
-# ---------------------------------------------------------------------------------------
-def datetime_to_str(dt):
-    return dt.isoformat() if dt else None
+# Registros gravados de uma vez pelas importações em lote
+IMPORT_BATCH_SIZE = 5000
 
-def str_to_datetime(s):
-    return datetime.datetime.fromisoformat(s) if s else None
+# Janela padrão (dias) do relatório de utilização e do painel da Visão Geral
+DIAS_UTILIZACAO = 30
 
-# ---------------------------------------------------------------------------------------
-# Definições de fonte, cores e estilos (para Tkinter)
-# ---------------------------------------------------------------------------------------
-DEFAULT_FONT = ("Arial", 13)
-BG_MAIN  = "#ECECEC"       # Fundo principal da janela
-BG_FRAME = "#FFFFFF"       # Fundo dos frames
-FG_TEXT  = "#333333"       # Cor do texto
-
-# Botões pretos
-BUTTON_BG   = "#000000"
-BUTTON_FG   = "#FFFFFF"
-BUTTON_STYLE = {
-    "font":             DEFAULT_FONT,
-    "bg":               BUTTON_BG,
-    "fg":               BUTTON_FG,
-    "activebackground": "#333333",
-    "cursor":           "hand2"
-}
-
-ENTRY_STYLE = {
-    "font":   DEFAULT_FONT,
-    "fg":     FG_TEXT,
-    "bg":     "#FFFFFF",
-    "bd":     2,
-    "relief": "solid"
-}
+# Idade padrão (dias desde a devolução) a partir da qual um aluguel vai para o histórico
+ARCHIVE_AFTER_DAYS = 90
 
 # ---------------------------------------------------------------------------------------
 # CarRentalSystem - Lógica principal
 # ---------------------------------------------------------------------------------------
+def _mutation(method):
+    """
+    No modo compartilhado, executa a mutação sob a trava do armazenamento e
+    depois de incorporar o que as outras instâncias gravaram (ids e
+    disponibilidade sempre conferidos com os dados mais recentes).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.shared:
+            return method(self, *args, **kwargs)
+        with self.storage.lock():
+            self.sync()
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class CarRentalSystem:
     """
-    Gerencia dados (usuários, veículos e aluguéis) em um arquivo JSON.
+    Gerencia dados (usuários, veículos e aluguéis) em um arquivo JSON ou banco SQLite.
+    O armazenamento é escolhido pela extensão do arquivo (ver armazenamento.open_storage)
+    ou passado pronto em `storage`.
+    Com `flush_delay` (segundos), as gravações saem da thread que chama os métodos
+    e são agrupadas por uma thread de gravação (ver armazenamento.GroupCommitStorage).
+    Com `shared=True`, várias instâncias (processos) podem usar o mesmo arquivo:
+    cada mutação trava o arquivo, incorpora as gravações das outras (sync) e grava
+    na hora; nesse modo `flush_delay` é ignorado.
+    Com `metrics_path`, as métricas de cada método são ligadas desde a carga e
+    gravadas periodicamente nesse arquivo (ver enable_metrics).
+    Os aluguéis encerrados há muito tempo ficam fora do arquivo principal, em
+    partições mensais (historico.HistoricoMensal, ver archive_rentals) lidas só
+    pelas consultas de histórico que cobrem os seus meses. Com `archive_after_days`,
+    os aluguéis devolvidos há mais dias que isso são arquivados já na carga.
     """
-    def __init__(self, json_file_path="data.json"):
+    def __init__(self, json_file_path="data.json", compact_threshold=JOURNAL_COMPACT_THRESHOLD,
+                 storage=None, flush_delay=None, shared=False, metrics_path=None,
+                 archive_after_days=None):
         self.json_file_path = json_file_path
+        self.shared = shared
+        self.storage = storage or open_storage(json_file_path, compact_threshold=compact_threshold)
+        if flush_delay is not None and not shared:
+            self.storage = GroupCommitStorage(self.storage, max_delay=flush_delay)
         self.users = []
         self.vehicles = []
         self.rentals = []
+        self.reservations = []
+        self.archive = HistoricoMensal(historico_dir(json_file_path))
         self.current_user = None
+        # rental_id do aluguel aberto pela última chamada de rent_vehicle/pickup_reservation
+        # (None se ela não alugou); lido logo depois da chamada por quem precisa do id
+        self.last_rental_id = None
+        # Índices em memória (mantidos a cada mutação e reconstruídos no load_data)
+        self._vehicles_by_id = {}
+        self._vehicles_by_placa = {}   # placa em minúsculas -> veículo
+        self._rentals_by_id = {}
+        self._next_rental_id = 1       # maior rental_id já usado (inclusive no histórico) + 1
+        self._users_by_username = {}
+        self._reservations_by_id = {}
+        self._vehicle_search = IndiceVeiculos()   # busca por nome/marca/ano/placa/disponibilidade
+        self._agenda = AgendaVeiculos()           # reservas ativas e aluguéis em aberto por veículo
+        self._customers = IndiceClientes()        # cpf -> perfil (só os aluguéis do arquivo principal)
+        # Aluguéis em aberto e fila de prioridade pela devolução estimada
+        self._open_rentals = {}        # rental_id -> aluguel em aberto (ordem de abertura)
+        self._due_heap = []            # (data_devolucao_estimada, rental_id) ainda não vencidos
+        self._overdue_rentals = {}     # rental_id -> aluguel em aberto já vencido
+        # Aluguéis em ordem de data_retirada (e as datas, para busca binária)
+        self._timeline = []
+        self._timeline_keys = []
+        # Aluguéis devolvidos em ordem de data_devolucao_efetiva (idem)
+        self._returns = []
+        self._returns_keys = []
+        # Agregados materializados: faturamento por dia e contagens por mês
+        self._faturamento_por_dia = {}   # date -> soma de valor_total
+        self._veiculos_por_mes = {}      # (ano, mês) -> Counter(vehicle_id)
+        self._clientes_por_mes = {}      # (ano, mês) -> Counter(cpf)
+        self._agregados_ate = 0          # maior rental_id já contabilizado
+        self._agregados_gravados = None  # (ate_rental_id, quantidade) dos agregados no disco
+        self._analytics = None
+        self.metrics = None
+        self._metrics_path = None
+        if metrics_path is not None:
+            self.enable_metrics(metrics_path)
         self.load_data()
-        
+        self._create_default_admin()
+        if archive_after_days is not None:
+            self.archive_rentals(archive_after_days)
+
+    @_mutation
+    def _create_default_admin(self):
         # Cria admin padrão se não existir
         if not any(u["role"] == "admin" for u in self.users):
-            self.users.append({"username": "admin", "password": "admin", "role": "admin"})
-            self.save_data()
+            admin = {"username": "admin", "password": "admin", "role": "admin"}
+            self.users.append(admin)
+            self._users_by_username[admin["username"]] = admin
+            self.storage.append(("u", admin))
 
     def load_data(self):
-        if os.path.exists(self.json_file_path):
-            with open(self.json_file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.users = data.get("users", [])
-            self.vehicles = data.get("vehicles", [])
-            for r in data.get("rentals", []):
-                self.rentals.append({
-                    "rental_id":  r["rental_id"],
-                    "vehicle_id": r["vehicle_id"],
-                    "nome_cliente": r.get("nome_cliente", ""),
-                    "user_alugou": r["user_alugou"],
-                    "cpf":         r["cpf"],
-                    "whatsapp":    r["whatsapp"],
-                    "dias":        r["dias"],
-                    "valor_por_dia": r["valor_por_dia"],
-                    "valor_total":   r["valor_total"],
-                    "data_retirada": str_to_datetime(r["data_retirada"]),
-                    "data_devolucao_estimada": str_to_datetime(r["data_devolucao_estimada"]),
-                    "data_devolucao_efetiva":  str_to_datetime(r["data_devolucao_efetiva"])
-                })
+        (self.users, self.vehicles, self.rentals, self.reservations) = self.storage.load()
+        self._analytics = None
+        self.rebuild_indexes()
+        self.load_aggregates()
+
+    def sync(self):
+        """
+        Incorpora as mutações gravadas por outras instâncias no mesmo arquivo.
+        Atualiza listas, índices e agregados só com os registros novos; se o
+        armazenamento pedir, recarrega tudo (mantendo o usuário logado).
+        Retorna True se algo mudou.
+        """
+        records = self.storage.sync()
+        if records is None:
+            username = self.current_user["username"] if self.current_user else None
+            self.load_data()
+            if username is not None:
+                self.current_user = self._users_by_username.get(username)
+            return True
+        for (t, d) in records:
+            self._apply_record(t, d)
+        return bool(records)
+
+    def _apply_record(self, t, d):
+        """
+        Aplica um registro (tipo, dados) vindo de outra instância: atualiza o
+        item existente no lugar (as referências continuam válidas) ou inclui um novo.
+        """
+        if t == "u":
+            user = self._users_by_username.get(d["username"])
+            if user is None:
+                self.users.append(d)
+                self._users_by_username[d["username"]] = d
+            else:
+                user.update(d)
+        elif t == "b":
+            b = self._reservations_by_id.get(d["reserva_id"])
+            if b is None:
+                b = d
+                self.reservations.append(b)
+                self._reservations_by_id[b["reserva_id"]] = b
+            else:
+                if b["status"] == RESERVA_ATIVA:
+                    self._agenda.remover_reserva(b["vehicle_id"], b["inicio"], b["fim"], b["reserva_id"])
+                b.update(d)
+            if b["status"] == RESERVA_ATIVA:
+                self._agenda.adicionar_reserva(b["vehicle_id"], b["inicio"], b["fim"], b["reserva_id"])
+        elif t == "v":
+            v = self._vehicles_by_id.get(d["id"])
+            if v is None:
+                self.vehicles.append(d)
+                self._vehicles_by_id[d["id"]] = d
+                self._vehicles_by_placa[d["placa"].lower()] = d
+                self._vehicle_search.adicionar(d)
+            else:
+                if self._vehicles_by_placa.get(v["placa"].lower()) is v:
+                    del self._vehicles_by_placa[v["placa"].lower()]
+                v.update(d)
+                self._vehicles_by_placa[v["placa"].lower()] = v
+                self._vehicle_search.adicionar(v)
+        else:
+            rental_id = d["rental_id"]
+            r = self._rentals_by_id.get(rental_id)
+            if r is None:
+                r = d
+                self.rentals.append(r)
+                if len(self.rentals) > 1 and self.rentals[-2]["rental_id"] > rental_id:
+                    self.rentals.sort(key=lambda x: x["rental_id"])
+                self._rentals_by_id[rental_id] = r
+                self._next_rental_id = max(self._next_rental_id, rental_id + 1)
+                self._add_to_timeline(r)
+                self._add_to_aggregates(r)
+                self._customers.adicionar(r)
+                if r["data_devolucao_efetiva"] is not None:
+                    self._add_to_returns(r)
+                else:
+                    self._open_rentals[rental_id] = r
+                    heapq.heappush(self._due_heap, (r["data_devolucao_estimada"], rental_id))
+                    self._agenda.iniciar_uso(r["vehicle_id"], r["data_retirada"],
+                                             r["data_devolucao_estimada"], rental_id)
+            elif r["data_devolucao_efetiva"] is None and d["data_devolucao_efetiva"] is not None:
+                r["data_devolucao_efetiva"] = d["data_devolucao_efetiva"]
+                self._add_to_returns(r)
+                self._customers.devolver(r)
+            else:
+                r["data_devolucao_efetiva"] = d["data_devolucao_efetiva"]
+            if r["data_devolucao_efetiva"] is not None:
+                self._open_rentals.pop(rental_id, None)
+                self._overdue_rentals.pop(rental_id, None)
+                self._agenda.encerrar_uso(r["vehicle_id"], rental_id)
+
+    def rebuild_indexes(self):
+        """
+        Reconstrói os índices id/placa/rental_id/username, a busca de veículos, a
+        agenda de reservas e os perfis dos clientes a partir das listas.
+        """
+        self._vehicles_by_id = {v["id"]: v for v in self.vehicles}
+        self._vehicles_by_placa = {v["placa"].lower(): v for v in self.vehicles}
+        self._vehicle_search.reconstruir(self.vehicles)
+        self._rentals_by_id = {r["rental_id"]: r for r in self.rentals}
+        self.archive.recarregar()
+        self._next_rental_id = max(max(self._rentals_by_id, default=0), self.archive.max_rental_id) + 1
+        self._users_by_username = {u["username"]: u for u in self.users}
+        self._open_rentals = {r["rental_id"]: r for r in self.rentals
+                              if r["data_devolucao_efetiva"] is None}
+        self._due_heap = [(r["data_devolucao_estimada"], rid) for (rid, r) in self._open_rentals.items()]
+        heapq.heapify(self._due_heap)
+        self._overdue_rentals = {}
+        self._timeline = sorted(self.rentals, key=lambda r: r["data_retirada"])
+        self._timeline_keys = [r["data_retirada"] for r in self._timeline]
+        self._returns = sorted((r for r in self.rentals if r["data_devolucao_efetiva"] is not None),
+                               key=lambda r: r["data_devolucao_efetiva"])
+        self._returns_keys = [r["data_devolucao_efetiva"] for r in self._returns]
+        self._reservations_by_id = {b["reserva_id"]: b for b in self.reservations}
+        self._agenda.reconstruir([b for b in self.reservations if b["status"] == RESERVA_ATIVA],
+                                 self._open_rentals.values())
+        self._customers.reconstruir(self.rentals)
+
+    # ------------------ Agregados ------------------
+    # Consultas por intervalo usam os períodos inteiros (dias ou meses) dos agregados
+    # e leem um a um (rentals_between) só os aluguéis das pontas do intervalo.
+    @staticmethod
+    def _whole_periods(inicio, fim, periodo):
+        # [de, ate): os períodos inteiros dentro de [inicio, fim), ou None se não houver
+        de = None if inicio is None else inicio_do_periodo(inicio, periodo)
+        if de is not None and de < inicio:
+            de = proximo_periodo(de, periodo)
+        ate = None if fim is None else inicio_do_periodo(fim, periodo)
+        if de is not None and ate is not None and de >= ate:
+            return None
+        return (de, ate)
+
+    def _edges(self, inicio, fim, inteiros):
+        # (antes, depois): os aluguéis de [inicio, fim) fora dos períodos inteiros
+        if inteiros is None:
+            return (self.rentals_between(inicio, fim), [])
+        (de, ate) = inteiros
+        antes = self.rentals_between(inicio, de) if inicio is not None and inicio < de else []
+        depois = self.rentals_between(ate, fim) if fim is not None and ate < fim else []
+        return (antes, depois)
+
+    def _count_by_month(self, tabela, campo, inicio, fim):
+        # Counter de r[campo] em [inicio, fim), com tabela = (ano, mês) -> Counter
+        inteiros = self._whole_periods(inicio, fim, "mes")
+        (antes, depois) = self._edges(inicio, fim, inteiros)
+        contagens = Counter(r[campo] for r in antes)
+        if inteiros is not None:
+            (de, ate) = inteiros
+            for (ano, mes) in sorted(tabela):
+                dt = datetime.datetime(ano, mes, 1)
+                if (de is None or dt >= de) and (ate is None or dt < ate):
+                    contagens.update(tabela[(ano, mes)])
+        contagens.update(r[campo] for r in depois)
+        return contagens
+
+    def period_totals(self, inicio=None, fim=None):
+        """
+        Totais dos aluguéis retirados em [inicio, fim) (None = sem limite), inclusive
+        os do histórico: {"faturamento_por_dia": {date: total}, "veiculos":
+        Counter(vehicle_id), "clientes": Counter(cpf)}.
+        """
+        inteiros = self._whole_periods(inicio, fim, "dia")
+        (antes, depois) = self._edges(inicio, fim, inteiros)
+        faturamento = {}
+        def somar(dia, valor):
+            faturamento[dia] = faturamento.get(dia, 0.0) + valor
+        for r in antes:
+            somar(r["data_retirada"].date(), r["valor_total"])
+        if inteiros is not None:
+            (de, ate) = inteiros
+            for dia in sorted(self._faturamento_por_dia):
+                dt = datetime.datetime(dia.year, dia.month, dia.day)
+                if (de is None or dt >= de) and (ate is None or dt < ate):
+                    somar(dia, self._faturamento_por_dia[dia])
+        for r in depois:
+            somar(r["data_retirada"].date(), r["valor_total"])
+        return {"faturamento_por_dia": faturamento,
+                "veiculos": self._count_by_month(self._veiculos_por_mes, "vehicle_id", inicio, fim),
+                "clientes": self._count_by_month(self._clientes_por_mes, "cpf", inicio, fim)}
+
+    def _add_to_aggregates(self, r):
+        dt = r["data_retirada"]
+        mes = (dt.year, dt.month)
+        dia = dt.date()
+        self._faturamento_por_dia[dia] = self._faturamento_por_dia.get(dia, 0.0) + r["valor_total"]
+        self._veiculos_por_mes.setdefault(mes, Counter())[r["vehicle_id"]] += 1
+        self._clientes_por_mes.setdefault(mes, Counter())[r["cpf"]] += 1
+        if r["rental_id"] > self._agregados_ate:
+            self._agregados_ate = r["rental_id"]
+
+    def rebuild_aggregates(self):
+        """
+        Recalcula os agregados a partir de todos os aluguéis (inclusive os do histórico).
+        """
+        self._faturamento_por_dia = {}
+        self._veiculos_por_mes = {}
+        self._clientes_por_mes = {}
+        self._agregados_ate = 0
+        for r in itertools.chain(self._archived_rentals(), self.rentals):
+            self._add_to_aggregates(r)
+
+    def load_aggregates(self):
+        """
+        Usa os agregados gravados e soma apenas os aluguéis criados depois deles.
+        Se não baterem com os aluguéis carregados, recalcula tudo.
+        """
+        data = self.storage.load_aggregates()
+        self._agregados_gravados = None
+        if data is None:
+            self.rebuild_aggregates()
+            return
+        # Os aluguéis vêm em ordem de rental_id; os novos ficam no final
+        novos = len(self.rentals)
+        while novos > 0 and self.rentals[novos - 1]["rental_id"] > data["ate_rental_id"]:
+            novos -= 1
+        if novos != data["quantidade"]:
+            self.rebuild_aggregates()
+            return
+        self._faturamento_por_dia = {datetime.date.fromisoformat(dia): total
+                                     for (dia, total) in data["faturamento_por_dia"].items()}
+        self._veiculos_por_mes = {}
+        self._clientes_por_mes = {}
+        for (mes, contagens) in data["veiculos_por_mes"].items():
+            self._veiculos_por_mes[(int(mes[:4]), int(mes[5:]))] = Counter(
+                {int(vid): count for (vid, count) in contagens})
+        for (mes, contagens) in data["clientes_por_mes"].items():
+            self._clientes_por_mes[(int(mes[:4]), int(mes[5:]))] = Counter(dict(contagens))
+        self._agregados_ate = data["ate_rental_id"]
+        self._agregados_gravados = (data["ate_rental_id"], data["quantidade"])
+        for r in self.rentals[novos:]:
+            self._add_to_aggregates(r)
+
+    def save_aggregates(self):
+        # Contagens gravadas como listas de pares para preservar a ordem de desempate
+        self._agregados_gravados = (self._agregados_ate, len(self.rentals))
+        self.storage.save_aggregates({
+            "ate_rental_id": self._agregados_ate,
+            "quantidade": len(self.rentals),
+            "faturamento_por_dia": {dia.isoformat(): total
+                                    for (dia, total) in self._faturamento_por_dia.items()},
+            "veiculos_por_mes": {f"{ano:04d}-{mes:02d}": list(contagens.items())
+                                 for ((ano, mes), contagens) in self._veiculos_por_mes.items()},
+            "clientes_por_mes": {f"{ano:04d}-{mes:02d}": list(contagens.items())
+                                 for ((ano, mes), contagens) in self._clientes_por_mes.items()},
+        })
+
+    def refresh_aggregates(self):
+        """
+        Grava os agregados só se os do disco não cobrirem os aluguéis carregados.
+        """
+        if self._agregados_gravados != (self._agregados_ate, len(self.rentals)):
+            self.save_aggregates()
 
     def save_data(self):
-        data = {
-            "users": self.users,
-            "vehicles": self.vehicles,
-            "rentals": []
-        }
-        for r in self.rentals:
-            data["rentals"].append({
-                "rental_id": r["rental_id"],
-                "vehicle_id": r["vehicle_id"],
-                "nome_cliente": r.get("nome_cliente", ""),
-                "user_alugou": r["user_alugou"],
-                "cpf": r["cpf"],
-                "whatsapp": r["whatsapp"],
-                "dias": r["dias"],
-                "valor_por_dia": r["valor_por_dia"],
-                "valor_total": r["valor_total"],
-                "data_retirada": datetime_to_str(r["data_retirada"]),
-                "data_devolucao_estimada": datetime_to_str(r["data_devolucao_estimada"]),
-                "data_devolucao_efetiva":  datetime_to_str(r["data_devolucao_efetiva"])
-            })
-        with open(self.json_file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        """
+        Grava todos os dados de uma vez (snapshot completo).
+        """
+        self.storage.save(self.users, self.vehicles, self.rentals, self.reservations)
+        self.save_aggregates()
 
+    def flush(self):
+        """
+        Garante que todas as mutações já feitas estão gravadas.
+        """
+        self.storage.flush()
+
+    def close(self):
+        self.refresh_aggregates()
+        self.storage.close()
+        if self.metrics is not None:
+            self.metrics.parar_gravacao()
+            if self._metrics_path is not None:
+                self.metrics.gravar(self._metrics_path)
+
+    @_mutation
     def clear_data(self):
         """
         Apaga todos os dados e recria apenas o admin padrão (admin/admin).
@@ -120,16 +403,51 @@ class CarRentalSystem:
         self.users = []
         self.vehicles = []
         self.rentals = []
+        self.reservations = []
+        self.archive.limpar()
         # Recria admin
         self.users.append({"username": "admin", "password": "admin", "role": "admin"})
+        self.rebuild_indexes()
+        self.rebuild_aggregates()
+        self._analytics = None
         self.save_data()
 
+    # ------------------ Métricas ------------------
+    def enable_metrics(self, path=None, interval=INTERVALO_GRAVACAO):
+        """
+        Liga a medição (chamadas, histograma de latência e bytes gravados) de todos
+        os métodos públicos desta instância. Com `path`, acrescenta um snapshot por
+        linha nesse arquivo a cada `interval` segundos e ao fechar.
+        Desligadas, as métricas não custam nada: os métodos originais são chamados direto.
+        """
+        if self.metrics is None:
+            self.metrics = Metricas(lambda: getattr(self.storage, "bytes_written", 0))
+            self.metrics.instrumentar(self, _metric_method_names())
+        if path is not None and self._metrics_path is None:
+            self._metrics_path = path
+            self.metrics.iniciar_gravacao(path, interval)
+        return self.metrics
+
+    def disable_metrics(self):
+        if self.metrics is None:
+            return
+        self.metrics.parar_gravacao()
+        Metricas.desinstrumentar(self, _metric_method_names())
+        self.metrics = None
+        self._metrics_path = None
+
+    def get_metrics(self):
+        """
+        Retorna as métricas acumuladas (ver metricas.Metricas.snapshot) ou None se desligadas.
+        """
+        return self.metrics.snapshot() if self.metrics is not None else None
+
     # ------------------ Login / Logout ------------------
     def login(self, username, password):
-        for user in self.users:
-            if user["username"] == username and user["password"] == password:
-                self.current_user = user
-                return True
+        user = self._users_by_username.get(username)
+        if user is not None and user["password"] == password:
+            self.current_user = user
+            return True
         return False
 
     def logout(self):
@@ -142,117 +460,624 @@ class CarRentalSystem:
         return self.current_user and self.current_user.get("role") == "admin"
 
     # ------------------ Usuários ------------------
+    @_mutation
     def create_user(self, username, password, role):
         if not self.is_admin():
             return "Permissão negada. Somente admin pode criar usuários."
-        if any(u["username"] == username for u in self.users):
+        if username in self._users_by_username:
             return "Usuário já existe!"
         if role not in ("admin", "padrao"):
             return "Tipo de usuário inválido! Use 'admin' ou 'padrao'."
-        self.users.append({"username": username, "password": password, "role": role})
-        self.save_data()
+        user = {"username": username, "password": password, "role": role}
+        self.users.append(user)
+        self._users_by_username[username] = user
+        self.storage.append(("u", user))
         return f"Usuário '{username}' criado com sucesso!"
 
+    def get_user(self, username):
+        return self._users_by_username.get(username)
+
     # ------------------ Veículos ------------------
+    @_mutation
     def register_vehicle(self, nome, marca, ano, placa):
         if not self.is_admin():
             return "Somente admin pode cadastrar veículos."
-        if any(v["placa"].lower() == placa.lower() for v in self.vehicles):
+        if placa.lower() in self._vehicles_by_placa:
             return "Já existe um veículo com essa placa!"
-        self.vehicles.append({
+        vehicle = {
             "id": len(self.vehicles) + 1,
             "nome": nome,
             "marca": marca,
             "ano": ano,
             "placa": placa,
             "disponivel": True
-        })
-        self.save_data()
+        }
+        self.vehicles.append(vehicle)
+        self._vehicles_by_id[vehicle["id"]] = vehicle
+        self._vehicles_by_placa[placa.lower()] = vehicle
+        self._vehicle_search.adicionar(vehicle)
+        self.storage.append(("v", vehicle))
         return f"Veículo '{nome}' cadastrado com sucesso!"
 
     def list_vehicles(self):
         return self.vehicles
 
+    def count_vehicles(self):
+        return len(self.vehicles)
+
+    def list_vehicles_page(self, offset=0, limit=None):
+        """
+        Retorna os veículos nas posições [offset, offset + limit) da listagem
+        (ordem de cadastro). Custa O(limit), não importa o tamanho da frota.
+        """
+        end = None if limit is None else offset + limit
+        return self.vehicles[offset:end]
+
+    def get_vehicle(self, vehicle_id):
+        return self._vehicles_by_id.get(vehicle_id)
+
+    def search_vehicles(self, query="", nome=None, marca=None, ano=None, placa=None,
+                        disponivel=None, limit=None):
+        """
+        Busca veículos pelos índices (ver busca.IndiceVeiculos.buscar): `query` são
+        palavras que devem ser prefixo do nome, marca, ano ou placa; nome/marca/ano
+        são valores exatos, `placa` é prefixo e `disponivel` filtra a disponibilidade.
+        Ex.: search_vehicles(marca="Fiat", placa="ERF", disponivel=True).
+        Retorna os veículos em ordem de id (no máximo `limit`).
+        """
+        ids = self._vehicle_search.buscar(query, nome, marca, ano, placa, disponivel, limit)
+        return [self._vehicles_by_id[vid] for vid in ids]
+
+    @_mutation
     def modify_vehicle(self, vehicle_id, nome, marca, ano, placa):
         if not self.is_admin():
             return "Somente admin pode modificar veículos."
-        for v in self.vehicles:
-            if v["id"] == vehicle_id:
-                if placa:
-                    # Verifica placa duplicada
-                    for other in self.vehicles:
-                        if other["placa"].lower() == placa.lower() and other["id"] != vehicle_id:
-                            return "Já existe outro veículo com essa placa!"
-                if nome:  v["nome"]  = nome
-                if marca: v["marca"] = marca
-                if ano:   v["ano"]   = ano
-                if placa: v["placa"] = placa
-                self.save_data()
-                return "Veículo modificado com sucesso!"
-        return "Veículo não encontrado!"
+        v = self._vehicles_by_id.get(vehicle_id)
+        if v is None:
+            return "Veículo não encontrado!"
+        if placa:
+            # Verifica placa duplicada
+            other = self._vehicles_by_placa.get(placa.lower())
+            if other is not None and other["id"] != vehicle_id:
+                return "Já existe outro veículo com essa placa!"
+        if nome:  v["nome"]  = nome
+        if marca: v["marca"] = marca
+        if ano:   v["ano"]   = ano
+        if placa:
+            if self._vehicles_by_placa.get(v["placa"].lower()) is v:
+                del self._vehicles_by_placa[v["placa"].lower()]
+            v["placa"] = placa
+            self._vehicles_by_placa[placa.lower()] = v
+        self._vehicle_search.adicionar(v)
+        self.storage.append(("v", v))
+        return "Veículo modificado com sucesso!"
 
     # ------------------ Aluguéis ------------------
+    @_mutation
     def rent_vehicle(self, vehicle_id, nome_cliente, cpf, whatsapp, dias, valor_por_dia):
+        """
+        Retorna a mensagem do resultado; o id do novo aluguel fica em last_rental_id.
+        """
+        self.last_rental_id = None
         if not self.current_user:
             return "É necessário estar logado para alugar!"
-        for v in self.vehicles:
-            if v["id"] == vehicle_id:
-                if not v["disponivel"]:
-                    return "Veículo indisponível para aluguel."
-                v["disponivel"] = False
-                data_retirada = datetime.datetime.now()
-                valor_total = dias * valor_por_dia
-                self.rentals.append({
-                    "rental_id": len(self.rentals) + 1,
-                    "vehicle_id": v["id"],
-                    "nome_cliente": nome_cliente,
-                    "user_alugou": self.current_user["username"],
-                    "cpf": cpf,
-                    "whatsapp": whatsapp,
-                    "dias": dias,
-                    "valor_por_dia": valor_por_dia,
-                    "valor_total": valor_total,
-                    "data_retirada": data_retirada,
-                    "data_devolucao_estimada": data_retirada + datetime.timedelta(days=dias),
-                    "data_devolucao_efetiva": None
-                })
-                self.save_data()
-                return (f"Aluguel realizado!\n"
-                        f"Cliente: {nome_cliente}\n"
-                        f"Carro: {v['nome']}\n"
-                        f"Total: R$ {valor_total:.2f}\n"
-                        f"Retirada: {data_retirada.strftime('%d/%m/%Y %H:%M')}\n"
-                        f"Devolução Estimada: "
-                        f"{(data_retirada + datetime.timedelta(days=dias)).strftime('%d/%m/%Y %H:%M')}")
-        return "Veículo não encontrado!"
-
+        v = self._vehicles_by_id.get(vehicle_id)
+        if v is None:
+            return "Veículo não encontrado!"
+        return self._rent(v, nome_cliente, cpf, whatsapp, dias, valor_por_dia)
+
+    def _rent(self, v, nome_cliente, cpf, whatsapp, dias, valor_por_dia, reserva=None):
+        # Abre o aluguel (de uma reserva, se dada), desde que não colida com outras reservas
+        if not v["disponivel"]:
+            return "Veículo indisponível para aluguel."
+        data_retirada = datetime.datetime.now()
+        data_devolucao_estimada = data_retirada + datetime.timedelta(days=dias)
+        ocupado = self._agenda.conflito(v["id"], data_retirada, data_devolucao_estimada, data_retirada,
+                                        ignorar_reserva=reserva["reserva_id"] if reserva else None)
+        if ocupado is not None:
+            return self._conflict_message(ocupado)
+        v["disponivel"] = False
+        self._vehicle_search.definir_disponivel(v["id"], False)
+        valor_total = dias * valor_por_dia
+        rental = Rental(
+            rental_id=self._next_rental_id,
+            vehicle_id=v["id"],
+            nome_cliente=nome_cliente,
+            user_alugou=self.current_user["username"],
+            cpf=cpf,
+            whatsapp=whatsapp,
+            dias=dias,
+            valor_por_dia=valor_por_dia,
+            valor_total=valor_total,
+            data_retirada=data_retirada,
+            data_devolucao_estimada=data_devolucao_estimada,
+            data_devolucao_efetiva=None
+        )
+        self.rentals.append(rental)
+        self._rentals_by_id[rental["rental_id"]] = rental
+        self._next_rental_id += 1
+        self._open_rentals[rental["rental_id"]] = rental
+        heapq.heappush(self._due_heap, (rental["data_devolucao_estimada"], rental["rental_id"]))
+        self._add_to_timeline(rental)
+        self._add_to_aggregates(rental)
+        self._customers.adicionar(rental)
+        self._agenda.iniciar_uso(v["id"], data_retirada, data_devolucao_estimada, rental["rental_id"])
+        records = [("r", rental), ("v", v)]
+        if reserva is not None:
+            self._agenda.remover_reserva(v["id"], reserva["inicio"], reserva["fim"], reserva["reserva_id"])
+            reserva["status"] = RESERVA_RETIRADA
+            reserva["rental_id"] = rental["rental_id"]
+            records.append(("b", reserva))
+        self.storage.append(*records)
+        self.last_rental_id = rental["rental_id"]
+        return (f"Aluguel realizado!\n"
+                f"Cliente: {nome_cliente}\n"
+                f"Carro: {v['nome']}\n"
+                f"Total: R$ {valor_total:.2f}\n"
+                f"Retirada: {data_retirada.strftime('%d/%m/%Y %H:%M')}\n"
+                f"Devolução Estimada: "
+                f"{data_devolucao_estimada.strftime('%d/%m/%Y %H:%M')}")
+
+    @_mutation
     def return_vehicle(self, rental_id):
         if not self.current_user:
             return "É necessário estar logado para devolver!"
-        for r in self.rentals:
-            if r["rental_id"] == rental_id and r["data_devolucao_efetiva"] is None:
-                r["data_devolucao_efetiva"] = datetime.datetime.now()
-                for v in self.vehicles:
-                    if v["id"] == r["vehicle_id"]:
-                        v["disponivel"] = True
-                        break
-                self.save_data()
-                return (f"Devolução realizada!\nAluguel ID: {rental_id}\n"
-                        f"Data/hora: {r['data_devolucao_efetiva'].strftime('%d/%m/%Y %H:%M')}")
-        return "Aluguel não encontrado ou já devolvido!"
+        r = self._rentals_by_id.get(rental_id)
+        if r is None or r["data_devolucao_efetiva"] is not None:
+            return "Aluguel não encontrado ou já devolvido!"
+        r["data_devolucao_efetiva"] = datetime.datetime.now()
+        self._add_to_returns(r)
+        # A entrada no heap é descartada quando chegar ao topo
+        self._open_rentals.pop(rental_id, None)
+        self._overdue_rentals.pop(rental_id, None)
+        self._customers.devolver(r)
+        records = [("r", r)]
+        v = self._vehicles_by_id.get(r["vehicle_id"])
+        self._agenda.encerrar_uso(r["vehicle_id"], rental_id)
+        if v is not None:
+            v["disponivel"] = True
+            self._vehicle_search.definir_disponivel(v["id"], True)
+            records.append(("v", v))
+        self.storage.append(*records)
+        return (f"Devolução realizada!\nAluguel ID: {rental_id}\n"
+                f"Data/hora: {r['data_devolucao_efetiva'].strftime('%d/%m/%Y %H:%M')}")
+
+    def get_rental(self, rental_id):
+        r = self._rentals_by_id.get(rental_id)
+        return r if r is not None else self.archive.buscar(rental_id)
+
+    def all_rentals(self):
+        """
+        Percorre todos os aluguéis: os do histórico (partição por partição) e
+        depois os do arquivo principal.
+        """
+        return itertools.chain(self._archived_rentals(), self.rentals)
+
+    def _archived_rentals(self):
+        # Um aluguel arquivado que também está no arquivo principal (queda entre a
+        # gravação da partição e a do arquivo principal) conta só uma vez
+        return (r for r in self.archive.todos() if r["rental_id"] not in self._rentals_by_id)
+
+    @_mutation
+    def archive_rentals(self, older_than_days=ARCHIVE_AFTER_DAYS):
+        """
+        Move os aluguéis devolvidos há mais de `older_than_days` dias para as
+        partições mensais do histórico e regrava o arquivo principal só com o
+        restante. Os agregados não mudam (os aluguéis continuam contados).
+        """
+        corte = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+        # As devoluções estão ordenadas: as anteriores ao corte são um prefixo
+        antigos = self._returns[:bisect.bisect_left(self._returns_keys, corte)]
+        if not antigos:
+            return "Nenhum aluguel para arquivar."
+        meses = self.archive.arquivar(antigos)
+        arquivados = {r["rental_id"] for r in antigos}
+        self.rentals = [r for r in self.rentals if r["rental_id"] not in arquivados]
+        self.rebuild_indexes()
+        self.save_data()
+        return f"{len(antigos)} aluguéis arquivados em {len(meses)} partições mensais."
+
+    # ------------------ Clientes ------------------
+    # Os perfis por cpf (clientes.IndiceClientes) do arquivo principal são mantidos a cada
+    # aluguel/devolução; os do histórico vêm do resumo das partições (HistoricoMensal.clientes).
+    def get_customer(self, cpf):
+        """
+        Perfil do cliente (ver clientes.novo_perfil) somando o arquivo principal e o
+        histórico, ou None se o cpf nunca alugou. Custa O(aluguéis do cliente).
+        """
+        return combinar(self.archive.clientes().perfil(cpf), self._customers.perfil(cpf),
+                        self._rentals_by_id)
+
+    def top_customers(self, n=5, inicio=None, fim=None):
+        """
+        Os n clientes com mais aluguéis retirados em [inicio, fim) (None = sem limite),
+        como [(cpf, quantidade)]. Os meses inteiros vêm das contagens mensais
+        materializadas; só os aluguéis dos meses das pontas são contados um a um.
+        """
+        return self._count_by_month(self._clientes_por_mes, "cpf", inicio, fim).most_common(n)
+
+    def top_customers_by_value(self, n=5):
+        """
+        Os n clientes com maior total gasto (todos os aluguéis), como [(cpf, total)].
+        Ordena os totais dos perfis sem ler aluguéis. Um aluguel presente no arquivo
+        principal e no histórico só pode diminuir o total somado, então os candidatos
+        são conferidos (get_customer) em ordem até nenhum outro poder entrar.
+        """
+        arquivados = self.archive.clientes()
+        totais = Counter()
+        for p in itertools.chain(arquivados.perfis(), self._customers.perfis()):
+            totais[p["cpf"]] += p["total_gasto"]
+        resultado = []
+        for (cpf, limite) in totais.most_common():
+            if len(resultado) == n and limite <= resultado[-1][1]:
+                break
+            perfil = combinar(arquivados.perfil(cpf), self._customers.perfil(cpf), self._rentals_by_id)
+            resultado.append((cpf, perfil["total_gasto"]))
+            resultado.sort(key=lambda item: item[1], reverse=True)
+            del resultado[n:]
+        return resultado
+
+    # ------------------ Reservas ------------------
+    # Uma reserva ativa ocupa o veículo em [inicio, fim) na agenda (reservas.AgendaVeiculos),
+    # junto com o aluguel em aberto; rent_vehicle recusa períodos que colidam com ela.
+    @_mutation
+    def reserve_vehicle(self, vehicle_id, nome_cliente, cpf, whatsapp, inicio, fim, valor_por_dia):
+        if not self.current_user:
+            return "É necessário estar logado para reservar!"
+        v = self._vehicles_by_id.get(vehicle_id)
+        if v is None:
+            return "Veículo não encontrado!"
+        if fim <= inicio:
+            return "O fim da reserva deve ser depois do início."
+        agora = datetime.datetime.now()
+        if fim <= agora:
+            return "O período da reserva já passou."
+        ocupado = self._agenda.conflito(vehicle_id, inicio, fim, agora)
+        if ocupado is not None:
+            return self._conflict_message(ocupado)
+        reserva = {
+            "reserva_id": len(self.reservations) + 1,
+            "vehicle_id": vehicle_id,
+            "nome_cliente": nome_cliente,
+            "user_reservou": self.current_user["username"],
+            "cpf": cpf,
+            "whatsapp": whatsapp,
+            "valor_por_dia": valor_por_dia,
+            "inicio": inicio,
+            "fim": fim,
+            "status": RESERVA_ATIVA,
+            "rental_id": None
+        }
+        self.reservations.append(reserva)
+        self._reservations_by_id[reserva["reserva_id"]] = reserva
+        self._agenda.adicionar_reserva(vehicle_id, inicio, fim, reserva["reserva_id"])
+        self.storage.append(("b", reserva))
+        return (f"Reserva realizada!\n"
+                f"Reserva ID: {reserva['reserva_id']}\n"
+                f"Carro: {v['nome']}\n"
+                f"Período: {inicio.strftime('%d/%m/%Y %H:%M')} a {fim.strftime('%d/%m/%Y %H:%M')}")
+
+    @_mutation
+    def cancel_reservation(self, reserva_id):
+        if not self.current_user:
+            return "É necessário estar logado para cancelar reservas!"
+        b = self._reservations_by_id.get(reserva_id)
+        if b is None or b["status"] != RESERVA_ATIVA:
+            return "Reserva não encontrada ou não está ativa!"
+        self._agenda.remover_reserva(b["vehicle_id"], b["inicio"], b["fim"], reserva_id)
+        b["status"] = RESERVA_CANCELADA
+        self.storage.append(("b", b))
+        return f"Reserva {reserva_id} cancelada."
+
+    @_mutation
+    def pickup_reservation(self, reserva_id):
+        """
+        Transforma a reserva em aluguel a partir de agora, pela quantidade de
+        dias do período reservado (arredondada para cima). Como em rent_vehicle,
+        o id do novo aluguel fica em last_rental_id.
+        """
+        self.last_rental_id = None
+        if not self.current_user:
+            return "É necessário estar logado para alugar!"
+        b = self._reservations_by_id.get(reserva_id)
+        if b is None or b["status"] != RESERVA_ATIVA:
+            return "Reserva não encontrada ou não está ativa!"
+        v = self._vehicles_by_id.get(b["vehicle_id"])
+        if v is None:
+            return "Veículo não encontrado!"
+        dias = max(1, -(-(b["fim"] - b["inicio"]) // datetime.timedelta(days=1)))
+        return self._rent(v, b["nome_cliente"], b["cpf"], b["whatsapp"], dias, b["valor_por_dia"],
+                          reserva=b)
+
+    def get_reservation(self, reserva_id):
+        return self._reservations_by_id.get(reserva_id)
+
+    def list_reservations(self, vehicle_id=None):
+        """
+        Retorna as reservas ativas (de um veículo ou de todos), em ordem de início.
+        """
+        if vehicle_id is not None:
+            return [self._reservations_by_id[bid] for (_, _, bid) in self._agenda.reservas(vehicle_id)]
+        ativas = [b for b in self.reservations if b["status"] == RESERVA_ATIVA]
+        ativas.sort(key=lambda b: (b["inicio"], b["reserva_id"]))
+        return ativas
+
+    def is_vehicle_free(self, vehicle_id, inicio, fim):
+        return self._agenda.conflito(vehicle_id, inicio, fim, datetime.datetime.now()) is None
+
+    def free_vehicles(self, inicio, fim):
+        """
+        Retorna os veículos sem reserva ativa nem aluguel em [inicio, fim).
+        O(log n) por veículo, com n = reservas do veículo.
+        """
+        livres = self._agenda.livres((v["id"] for v in self.vehicles), inicio, fim,
+                                     datetime.datetime.now())
+        return [self._vehicles_by_id[vid] for vid in livres]
+
+    def _conflict_message(self, ocupado):
+        (tipo, chave) = ocupado
+        if tipo == "aluguel":
+            return f"Veículo alugado no período (aluguel {chave})."
+        b = self._reservations_by_id[chave]
+        return (f"Veículo já reservado de {b['inicio'].strftime('%d/%m/%Y %H:%M')} "
+                f"a {b['fim'].strftime('%d/%m/%Y %H:%M')} (reserva {chave}).")
+
+    def _add_to_timeline(self, rental):
+        # Normalmente o novo aluguel é o mais recente: a inserção vira um append
+        pos = bisect.bisect_right(self._timeline_keys, rental["data_retirada"])
+        self._timeline_keys.insert(pos, rental["data_retirada"])
+        self._timeline.insert(pos, rental)
+
+    def _add_to_returns(self, rental):
+        # Idem para as devoluções: a mais recente costuma ir para o fim
+        pos = bisect.bisect_right(self._returns_keys, rental["data_devolucao_efetiva"])
+        self._returns_keys.insert(pos, rental["data_devolucao_efetiva"])
+        self._returns.insert(pos, rental)
 
     def list_open_rentals(self):
-        return [r for r in self.rentals if r["data_devolucao_efetiva"] is None]
+        return list(self._open_rentals.values())
+
+    def count_open_rentals(self):
+        return len(self._open_rentals)
+
+    def list_open_rentals_page(self, offset=0, limit=None):
+        """
+        Retorna os aluguéis em aberto nas posições [offset, offset + limit),
+        na ordem de abertura, sem copiar a lista inteira.
+        """
+        end = None if limit is None else offset + limit
+        return list(itertools.islice(self._open_rentals.values(), offset, end))
+
+    def list_overdue_rentals(self, now=None):
+        """
+        Retorna os aluguéis em aberto com devolução estimada anterior a `now`,
+        ordenados pela devolução estimada. Só retira do heap os que venceram
+        desde a última chamada, sem percorrer o histórico.
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        heap = self._due_heap
+        while heap and heap[0][0] < now:
+            (_, rental_id) = heapq.heappop(heap)
+            r = self._open_rentals.get(rental_id)
+            if r is not None:
+                self._overdue_rentals[rental_id] = r
+        atrasados = [r for r in self._overdue_rentals.values() if r["data_devolucao_estimada"] < now]
+        atrasados.sort(key=lambda r: r["data_devolucao_estimada"])
+        return atrasados
+
+    # ------------------ Importação em lote ------------------
+    # `rows` é qualquer iterável de dicts (ex.: linhas de um CSV lidas sob demanda).
+    # Cada linha é validada contra os índices em memória, e o armazenamento recebe
+    # um único append a cada `batch_size` registros.
+    def _append_batch(self, batch, batch_size):
+        if len(batch) >= batch_size:
+            self.storage.append(*batch)
+            batch.clear()
+
+    @_mutation
+    def import_users(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Cria usuários (username, password, role). Usuários já existentes são ignorados.
+        """
+        if not self.is_admin():
+            return "Somente admin pode importar usuários."
+        (batch, erros, total) = ([], [], 0)
+        for (linha, row) in enumerate(rows, start=1):
+            username = str(row.get("username") or "").strip()
+            role = row.get("role") or "padrao"
+            if not username:
+                erros.append(f"Registro {linha}: usuário vazio.")
+            elif username in self._users_by_username:
+                erros.append(f"Registro {linha}: usuário '{username}' já existe.")
+            elif role not in ("admin", "padrao"):
+                erros.append(f"Registro {linha}: tipo de usuário inválido ({role}).")
+            else:
+                user = {"username": username, "password": str(row.get("password") or ""), "role": role}
+                self.users.append(user)
+                self._users_by_username[username] = user
+                batch.append(("u", user))
+                total += 1
+                self._append_batch(batch, batch_size)
+        if batch:
+            self.storage.append(*batch)
+        return import_summary(total, "usuários", erros)
+
+    @_mutation
+    def import_vehicles(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Cadastra veículos (nome, marca, ano, placa). Placas repetidas, na base ou
+        no próprio arquivo, são rejeitadas pelo índice de placas.
+        """
+        if not self.is_admin():
+            return "Somente admin pode importar veículos."
+        (batch, erros, total) = ([], [], 0)
+        for (linha, row) in enumerate(rows, start=1):
+            placa = str(row.get("placa") or "").strip()
+            if not placa:
+                erros.append(f"Registro {linha}: placa vazia.")
+                continue
+            if placa.lower() in self._vehicles_by_placa:
+                erros.append(f"Registro {linha}: já existe um veículo com a placa {placa}.")
+                continue
+            vehicle = {
+                "id": len(self.vehicles) + 1,
+                "nome": row.get("nome") or "",
+                "marca": row.get("marca") or "",
+                "ano": row.get("ano") or "",
+                "placa": placa,
+                "disponivel": True
+            }
+            self.vehicles.append(vehicle)
+            self._vehicles_by_id[vehicle["id"]] = vehicle
+            self._vehicles_by_placa[placa.lower()] = vehicle
+            self._vehicle_search.adicionar(vehicle)
+            batch.append(("v", vehicle))
+            total += 1
+            self._append_batch(batch, batch_size)
+        if batch:
+            self.storage.append(*batch)
+        return import_summary(total, "veículos", erros)
+
+    @_mutation
+    def import_rentals(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Importa aluguéis históricos (ou em aberto, sem data_devolucao_efetiva).
+        Campos: vehicle_id, nome_cliente, cpf, whatsapp, dias, valor_por_dia,
+        data_retirada e, opcionais, user_alugou, valor_total, data_devolucao_estimada
+        e data_devolucao_efetiva. Os rental_id são atribuídos na ordem do arquivo.
+        """
+        if not self.is_admin():
+            return "Somente admin pode importar aluguéis."
+        (batch, erros, novos) = ([], [], [])
+        agora = datetime.datetime.now()
+        for (linha, row) in enumerate(rows, start=1):
+            try:
+                vehicle_id = int(row["vehicle_id"])
+                dias = int(row["dias"])
+                valor_por_dia = float(row["valor_por_dia"])
+                valor_total = float(row.get("valor_total") or dias * valor_por_dia)
+                data_retirada = str_to_datetime(row["data_retirada"])
+                data_devolucao_estimada = (str_to_datetime(row.get("data_devolucao_estimada"))
+                                           or data_retirada + datetime.timedelta(days=dias))
+                data_devolucao_efetiva = str_to_datetime(row.get("data_devolucao_efetiva"))
+            except (KeyError, TypeError, ValueError) as e:
+                erros.append(f"Registro {linha}: dados inválidos ({e}).")
+                continue
+            if data_retirada is None:
+                erros.append(f"Registro {linha}: data_retirada vazia.")
+                continue
+            v = self._vehicles_by_id.get(vehicle_id)
+            if v is None:
+                erros.append(f"Registro {linha}: veículo {vehicle_id} não encontrado.")
+                continue
+            if data_devolucao_efetiva is None:
+                if not v["disponivel"]:
+                    erros.append(f"Registro {linha}: veículo {vehicle_id} já está alugado.")
+                    continue
+                # Como em rent_vehicle: o aluguel aberto não pode colidir com uma reserva
+                # (um aluguel atrasado ocupa o veículo até agora)
+                ocupado = self._agenda.conflito(vehicle_id, data_retirada,
+                                                max(data_devolucao_estimada, agora), agora)
+                if ocupado is not None:
+                    erros.append(f"Registro {linha}: {self._conflict_message(ocupado)}")
+                    continue
+                v["disponivel"] = False
+                self._vehicle_search.definir_disponivel(vehicle_id, False)
+            rental = Rental(
+                rental_id=self._next_rental_id,
+                vehicle_id=vehicle_id,
+                nome_cliente=row.get("nome_cliente") or "",
+                user_alugou=row.get("user_alugou") or self.current_user["username"],
+                cpf=str(row.get("cpf") or ""),
+                whatsapp=str(row.get("whatsapp") or ""),
+                dias=dias,
+                valor_por_dia=valor_por_dia,
+                valor_total=valor_total,
+                data_retirada=data_retirada,
+                data_devolucao_estimada=data_devolucao_estimada,
+                data_devolucao_efetiva=data_devolucao_efetiva
+            )
+            self.rentals.append(rental)
+            self._rentals_by_id[rental["rental_id"]] = rental
+            self._next_rental_id += 1
+            if data_devolucao_efetiva is None:
+                self._open_rentals[rental["rental_id"]] = rental
+                heapq.heappush(self._due_heap, (data_devolucao_estimada, rental["rental_id"]))
+                self._agenda.iniciar_uso(vehicle_id, data_retirada, data_devolucao_estimada,
+                                         rental["rental_id"])
+                batch.append(("v", v))
+            self._add_to_aggregates(rental)
+            self._customers.adicionar(rental)
+            novos.append(rental)
+            batch.append(("r", rental))
+            self._append_batch(batch, batch_size)
+        if batch:
+            self.storage.append(*batch)
+        # Uma ordenação só no final (o timsort junta as duas sequências já ordenadas)
+        # em vez de uma inserção na linha do tempo por aluguel
+        novos.sort(key=lambda r: r["data_retirada"])
+        self._timeline.extend(novos)
+        self._timeline.sort(key=lambda r: r["data_retirada"])
+        self._timeline_keys = [r["data_retirada"] for r in self._timeline]
+        self._returns.extend(r for r in novos if r["data_devolucao_efetiva"] is not None)
+        self._returns.sort(key=lambda r: r["data_devolucao_efetiva"])
+        self._returns_keys = [r["data_devolucao_efetiva"] for r in self._returns]
+        return import_summary(len(novos), "aluguéis", erros)
 
     # ------------------ Estatísticas ------------------
+    def rentals_between(self, start=None, end=None):
+        """
+        Retorna os aluguéis com data_retirada em [start, end), em ordem cronológica.
+        start/end = None deixam o intervalo aberto. Custa O(log n + k), mais a leitura
+        das partições do histórico que cobrem o intervalo (se houver).
+        """
+        lo = 0 if start is None else bisect.bisect_left(self._timeline_keys, start)
+        hi = len(self._timeline_keys) if end is None else bisect.bisect_left(self._timeline_keys, end)
+        arquivados = [r for r in self.archive.alugueis_entre(start, end)
+                      if r["rental_id"] not in self._rentals_by_id]
+        if not arquivados:
+            return self._timeline[lo:hi]
+        return list(heapq.merge(arquivados, self._timeline[lo:hi], key=lambda r: r["data_retirada"]))
+
+    def rentals_overlapping(self, start, end):
+        """
+        Retorna os aluguéis que ocupam algum instante de [start, end): os devolvidos
+        depois de start (busca binária nas devoluções) e os em aberto, em ambos os
+        casos com retirada antes de end, mais os do histórico nesse intervalo.
+        Custa O(log n + devolvidos desde start) fora as partições lidas.
+        """
+        lo = bisect.bisect_right(self._returns_keys, start)
+        resultado = [r for r in itertools.islice(self._returns, lo, None) if r["data_retirada"] < end]
+        resultado.extend(r for r in self._open_rentals.values() if r["data_retirada"] < end)
+        resultado.extend(r for r in self.archive.alugueis_sobrepostos(start, end)
+                         if r["rental_id"] not in self._rentals_by_id)
+        return resultado
+
+    def utilization_report(self, inicio=None, fim=None, periodo="dia"):
+        """
+        Relatório de utilização da frota entre inicio e fim (padrão: últimos 30 dias),
+        por "dia", "semana" ou "mes": % do tempo em aluguel por veículo e período e
+        lacunas ociosas (ver utilizacao.calcular_utilizacao). Aluguéis em aberto contam
+        até agora. Uma ordenação e uma varredura sobre os aluguéis do intervalo.
+        """
+        agora = datetime.datetime.now()
+        if fim is None:
+            fim = agora
+        if inicio is None:
+            inicio = fim - datetime.timedelta(days=DIAS_UTILIZACAO)
+        intervalos = [(r["vehicle_id"], r["data_retirada"], r["data_devolucao_efetiva"] or agora)
+                      for r in self.rentals_overlapping(inicio, fim)]
+        return calcular_utilizacao(intervalos, [v["id"] for v in self.vehicles],
+                                   inicio, fim, periodo)
+
     def list_rentals_last_7_days(self):
         agora = datetime.datetime.now()
         sete_dias_atras = agora - datetime.timedelta(days=7)
         rentals_7d = []
-        for r in self.rentals:
-            if r["data_retirada"] >= sete_dias_atras:
-                status = "Em aberto" if r["data_devolucao_efetiva"] is None else "Devolvido"
-                rentals_7d.append((r, status))
+        for r in self.rentals_between(sete_dias_atras):
+            status = "Em aberto" if r["data_devolucao_efetiva"] is None else "Devolvido"
+            rentals_7d.append((r, status))
         return rentals_7d
 
     def list_rentals_current_week(self):
@@ -260,43 +1085,29 @@ class CarRentalSystem:
         weekday = agora.weekday()  # seg=0, dom=6
         start_of_week = agora - datetime.timedelta(days=weekday)
         start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_week = start_of_week + datetime.timedelta(days=6, hours=23, minutes=59, seconds=59)
+        end_of_week = start_of_week + datetime.timedelta(days=7)
 
         weekly_list = []
-        for r in self.rentals:
-            if start_of_week <= r["data_retirada"] <= end_of_week:
-                status = "Em aberto" if r["data_devolucao_efetiva"] is None else "Devolvido"
-                rentals_7d.append((r, status))
+        for r in self.rentals_between(start_of_week, end_of_week):
+            status = "Em aberto" if r["data_devolucao_efetiva"] is None else "Devolvido"
+            weekly_list.append((r, status))
         return weekly_list
 
     def get_top_5_veiculos_mes(self):
-        from collections import Counter
         agora = datetime.datetime.now()
-        mes = agora.month
-        ano = agora.year
-        filtered = [r for r in self.rentals 
-                    if r["data_retirada"].year == ano and r["data_retirada"].month == mes]
-        contagens = Counter(r["vehicle_id"] for r in filtered)
+        contagens = self._veiculos_por_mes.get((agora.year, agora.month), Counter())
         top5 = contagens.most_common(5)
         resultado = []
         for (vid, count) in top5:
-            nome_veic = None
-            for v in self.vehicles:
-                if v["id"] == vid:
-                    nome_veic = v["nome"]
-                    break
+            v = self._vehicles_by_id.get(vid)
+            nome_veic = v["nome"] if v is not None else None
             if nome_veic:
                 resultado.append((nome_veic, count))
         return resultado
 
     def get_top_5_clientes_mes(self):
-        from collections import Counter
         agora = datetime.datetime.now()
-        mes = agora.month
-        ano = agora.year
-        filtered = [r for r in self.rentals 
-                    if r["data_retirada"].year == ano and r["data_retirada"].month == mes]
-        contagens = Counter(r["cpf"] for r in filtered)
+        contagens = self._clientes_por_mes.get((agora.year, agora.month), Counter())
         return contagens.most_common(5)
 
     def get_7days_faturamento(self):
@@ -312,12 +1123,7 @@ class CarRentalSystem:
         daily_totals = {}
         for d in datas:
             key = d.date()
-            daily_totals[key] = 0.0
-
-        for r in self.rentals:
-            data_r = r["data_retirada"].date()
-            if data_r in daily_totals:
-                daily_totals[data_r] += r["valor_total"]
+            daily_totals[key] = self._faturamento_por_dia.get(key, 0.0)
 
         labels = []
         values = []
@@ -327,646 +1133,272 @@ class CarRentalSystem:
 
         return (labels, values)
 
-# ---------------------------------------------------------------------------------------
-# Segunda Tela: VisaoGeralWindow
-# ---------------------------------------------------------------------------------------
-class VisaoGeralWindow(tk.Toplevel):
+    def dashboard_snapshot(self, now=None):
+        """
+        Copia os dados da Visão Geral (aluguéis desde o início da semana ou dos
+        últimos 7 dias, contagens do mês, faturamento dos 7 dias e intervalos
+        de aluguel dos últimos 30 dias) para serem processados em outra thread
+        sem enxergar mutações feitas depois.
+        Custa O(aluguéis do período + itens das contagens do mês + veículos).
+        """
+        agora = now if now is not None else datetime.datetime.now()
+        inicio_semana = (agora - datetime.timedelta(days=agora.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        desde = min(inicio_semana, agora - datetime.timedelta(days=7))
+        alugueis = [(r["rental_id"], r["vehicle_id"], r["nome_cliente"], r["data_retirada"],
+                     "Em aberto" if r["data_devolucao_efetiva"] is None else "Devolvido")
+                    for r in self.rentals_between(desde)]
+        mes = (agora.year, agora.month)
+        veiculos_mes = Counter(self._veiculos_por_mes.get(mes, ()))
+        inicio_utilizacao = agora - datetime.timedelta(days=DIAS_UTILIZACAO)
+        intervalos = [(r["vehicle_id"], r["data_retirada"], r["data_devolucao_efetiva"] or agora)
+                      for r in self.rentals_overlapping(inicio_utilizacao, agora)]
+        return {
+            "agora": agora,
+            "inicio_semana": inicio_semana,
+            "alugueis": alugueis,
+            "veiculos_mes": veiculos_mes,
+            "nomes_veiculos": {vid: self._vehicles_by_id[vid]["nome"]
+                               for vid in veiculos_mes if vid in self._vehicles_by_id},
+            "clientes_mes": Counter(self._clientes_por_mes.get(mes, ())),
+            "faturamento_7_dias": self.get_7days_faturamento(),
+            "inicio_utilizacao": inicio_utilizacao,
+            "intervalos_utilizacao": intervalos,
+            "veiculos": [(v["id"], v["nome"]) for v in self.vehicles],
+        }
+
+    def get_analytics(self):
+        """
+        Retorna o motor de análise vetorizada (analise.AnaliseVetorizada, requer numpy),
+        já atualizado com os aluguéis criados desde a última chamada. Na primeira
+        chamada o histórico arquivado é lido inteiro.
+        """
+        from analise import AnaliseVetorizada
+        if self._analytics is None:
+            self._analytics = AnaliseVetorizada()
+            self._analytics.extend(self._archived_rentals())
+            self._analytics.extend(self.rentals)
+        self._analytics.refresh(self.rentals)
+        return self._analytics
+
+def _metric_method_names():
+    # Métodos públicos medidos por enable_metrics
+    return [nome for (nome, attr) in vars(CarRentalSystem).items()
+            if callable(attr) and not nome.startswith("_")
+            and nome not in ("enable_metrics", "disable_metrics", "get_metrics")]
+
+def import_summary(total, nome, erros, max_erros=10):
     """
-    Exibe:
-      - Aluguéis por Semana (Últimos 7 dias ou Semana Atual)
-      - Top 5 Carros no Mês
-      - Top 5 Clientes no Mês
-      - Gráfico de Linhas (últimos 7 dias, sem y negativo)
+    Mensagem de resultado das importações em lote (com os primeiros erros).
     """
-    def __init__(self, master, system, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.master = master
-        self.system = system
-        self.title("Visão Geral - Estatísticas (Últimos 7 dias)")
-        self.configure(bg=BG_MAIN)
-        self.geometry("1000x700")
-
-        container = tk.Frame(self, bg=BG_MAIN)
-        container.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # 2 linhas × 2 colunas
-        for r in range(2):
-            container.rowconfigure(r, weight=1, minsize=300)
-        for c in range(2):
-            container.columnconfigure(c, weight=1, minsize=450)
-
-        # Frame Aluguéis por Semana
-        frame_semana = tk.LabelFrame(container, text="Aluguéis por Semana",
-                                     font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        frame_semana.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-        self.setup_semana(frame_semana)
-
-        # Frame Gráfico
-        frame_grafico = tk.LabelFrame(container, text="Faturamento (Últimos 7 dias)",
-                                      font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        frame_grafico.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
-        self.setup_grafico(frame_grafico)
-
-        # Frame Top 5 Carros
-        frame_top_veic = tk.LabelFrame(container, text="Top 5 Carros no Mês",
-                                       font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        frame_top_veic.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
-        self.setup_top_veic(frame_top_veic)
-
-        # Frame Top 5 Clientes
-        frame_top_clients = tk.LabelFrame(container, text="Top 5 Clientes no Mês",
-                                          font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        frame_top_clients.grid(row=1, column=1, sticky="nsew", padx=5, pady=5)
-        self.setup_top_clients(frame_top_clients)
-
-        # Atualiza tudo
-        self.update_all()
-
-    def setup_semana(self, parent):
-        parent.rowconfigure(1, weight=1)
-        parent.columnconfigure(0, weight=1)
-
-        self.semana_var = tk.StringVar(value="last7")
-
-        radio_ultimos7 = tk.Radiobutton(parent, text="Últimos 7 dias",
-                                        variable=self.semana_var, value="last7",
-                                        font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT,
-                                        command=self.update_semana)
-        radio_ultimos7.grid(row=0, column=0, padx=5, pady=2, sticky="w")
-
-        radio_semana_atual = tk.Radiobutton(parent, text="Semana Atual",
-                                            variable=self.semana_var, value="currentweek",
-                                            font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT,
-                                            command=self.update_semana)
-        radio_semana_atual.grid(row=0, column=0, padx=5, pady=2, sticky="e")
-
-        self.text_semana = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
-        self.text_semana.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
-
-    def update_semana(self):
-        self.text_semana.delete("1.0", tk.END)
-        choice = self.semana_var.get()
-        if choice == "last7":
-            rentals_7d = self.system.list_rentals_last_7_days()
-            if not rentals_7d:
-                self.text_semana.insert(tk.END, "Nenhum aluguel encontrado nos últimos 7 dias.\n")
-                return
-            for (r, status) in rentals_7d:
-                dt_ret = r["data_retirada"].strftime('%d/%m/%Y %H:%M')
-                self.text_semana.insert(tk.END,
-                    f"Aluguel ID: {r['rental_id']} | Veículo ID: {r['vehicle_id']} | "
-                    f"Cliente: {r['nome_cliente']} | Retirada: {dt_ret} | Status: {status}\n"
-                )
-        else:
-            rentals_week = self.system.list_rentals_current_week()
-            if not rentals_week:
-                self.text_semana.insert(tk.END, "Nenhum aluguel encontrado na semana atual.\n")
-                return
-            for (r, status) in rentals_week:
-                dt_ret = r["data_retirada"].strftime('%d/%m/%Y %H:%M')
-                self.text_semana.insert(tk.END,
-                    f"Aluguel ID: {r['rental_id']} | Veículo ID: {r['vehicle_id']} | "
-                    f"Cliente: {r['nome_cliente']} | Retirada: {dt_ret} | Status: {status}\n"
-                )
-
-    def setup_grafico(self, parent):
-        parent.rowconfigure(0, weight=1)
-        parent.columnconfigure(0, weight=1)
-        self.frame_chart = tk.Frame(parent, bg=BG_FRAME)
-        self.frame_chart.grid(row=0, column=0, sticky="nsew")
-
-        self.fig = None
-        self.canvas_mpl = None
-
-    def update_chart(self):
-        (labels, values) = self.system.get_7days_faturamento()
-        if self.canvas_mpl:
-            self.canvas_mpl.get_tk_widget().destroy()
-            self.canvas_mpl = None
-            self.fig = None
-
-        self.fig = Figure(figsize=(5,3), dpi=100)
-        ax = self.fig.add_subplot(111)
-
-        # Plot
-        ax.plot(labels, values, marker='o', color='#000000', linewidth=2, markersize=8)
-        ax.set_title("Faturamento dos Últimos 7 Dias", fontsize=14, fontweight='bold', pad=10)
-        ax.set_xlabel("Dia", fontsize=12)
-        ax.set_ylabel("Valor (R$)", fontsize=12)
-        ax.grid(True, linestyle='--', alpha=0.6)
-
-        ax.set_ylim(bottom=0)
-
-        def formato_moeda(x, pos):
-            return f"R$ {x:,.2f}"
-        ax.yaxis.set_major_formatter(ticker.FuncFormatter(formato_moeda))
-
-        self.fig.tight_layout()
-
-        self.canvas_mpl = FigureCanvasTkAgg(self.fig, master=self.frame_chart)
-        self.canvas_mpl.draw()
-        self.canvas_mpl.get_tk_widget().pack(fill="both", expand=True)
-
-    def setup_top_veic(self, parent):
-        parent.rowconfigure(1, weight=1)
-        parent.columnconfigure(0, weight=1)
-        self.top_veic_text = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
-        self.top_veic_text.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
-
-    def update_top_veic(self):
-        self.top_veic_text.delete("1.0", tk.END)
-        top5 = self.system.get_top_5_veiculos_mes()
-        if not top5:
-            self.top_veic_text.insert(tk.END, "Nenhum aluguel este mês.\n")
-            return
-        for (nome, count) in top5:
-            self.top_veic_text.insert(tk.END, f"{nome} - {count} aluguéis\n")
-
-    def setup_top_clients(self, parent):
-        parent.rowconfigure(1, weight=1)
-        parent.columnconfigure(0, weight=1)
-        self.top_clients_text = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
-        self.top_clients_text.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
-
-    def update_top_clients(self):
-        self.top_clients_text.delete("1.0", tk.END)
-        top5 = self.system.get_top_5_clientes_mes()
-        if not top5:
-            self.top_clients_text.insert(tk.END, "Nenhum aluguel este mês.\n")
-            return
-        for (cpf, count) in top5:
-            self.top_clients_text.insert(tk.END, f"CPF: {cpf} - {count} aluguéis\n")
-
-    def update_all(self):
-        self.update_semana()
-        self.update_top_veic()
-        self.update_top_clients()
-        self.update_chart()
+    msg = f"{total} {nome} importados."
+    if erros:
+        msg += f"\n{len(erros)} linhas ignoradas:\n" + "\n".join(erros[:max_erros])
+        if len(erros) > max_erros:
+            msg += f"\n... e mais {len(erros) - max_erros}."
+    return msg
 
 # ---------------------------------------------------------------------------------------
-# Tela Principal (CarRentalApp)
+# Interface gráfica (interface.py) - importada só quando usada
 # ---------------------------------------------------------------------------------------
-class CarRentalApp(tk.Tk):
-    """
-    Tela Principal (3 colunas, 3 linhas).
-    Seção "Alugar Veículo" com Nome do Cliente.
-    Na listagem de aluguéis abertos, mostra "Devolução Estimada".
-    Botão "Apagar Base de Dados" agora abaixo do botão "Visão Geral".
-    """
-    def __init__(self, system, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.system = system
-
-        self.title("Sistema de Aluguel de Carros - Tela Principal")
-        self.configure(bg=BG_MAIN)
-        self.geometry("1200x700")
-
-        container = tk.Frame(self, bg=BG_MAIN)
-        container.pack(fill="both", expand=True, padx=10, pady=10)
-
-        for r in range(3):
-            container.rowconfigure(r, weight=1, minsize=200)
-        for c in range(3):
-            container.columnconfigure(c, weight=1, minsize=370)
-
-        # Coluna 0
-        self.frame_login = tk.LabelFrame(container, text="Login / Logout", font=DEFAULT_FONT,
-                                         bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_login.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-        self.setup_login_logout(self.frame_login)
-
-        self.frame_create_user = tk.LabelFrame(container, text="Criar Usuário (Admin)",
-                                              font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_create_user.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
-        self.setup_criar_usuario(self.frame_create_user)
-
-        self.frame_vehicle = tk.LabelFrame(container, text="Cadastrar Veículo (Admin)",
-                                           font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_vehicle.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
-        self.setup_cadastrar_veiculo(self.frame_vehicle)
-
-        # Coluna 1
-        self.frame_mod_vehicle = tk.LabelFrame(container, text="Modificar Veículo (Admin)",
-                                               font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_mod_vehicle.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
-        self.setup_modificar_veiculo(self.frame_mod_vehicle)
-
-        self.frame_rent = tk.LabelFrame(container, text="Alugar Veículo", font=DEFAULT_FONT,
-                                        bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_rent.grid(row=1, column=1, sticky="nsew", padx=5, pady=5)
-        self.setup_alugar(self.frame_rent)
-
-        self.frame_return = tk.LabelFrame(container, text="Devolução de Veículo", font=DEFAULT_FONT,
-                                          bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_return.grid(row=2, column=1, sticky="nsew", padx=5, pady=5)
-        self.setup_devolver(self.frame_return)
-
-        # Coluna 2
-        self.frame_listings = tk.LabelFrame(container, text="Listagens Gerais", font=DEFAULT_FONT,
-                                            bg=BG_FRAME, fg=FG_TEXT)
-        self.frame_listings.grid(row=0, column=2, rowspan=2, sticky="nsew", padx=5, pady=5)
-        self.setup_listagens(self.frame_listings)
-
-        # Frame col=2, row=2 - para Visão Geral + Apagar Base
-        self.frame_visao_geral = tk.Frame(container, bg=BG_MAIN)
-        self.frame_visao_geral.grid(row=2, column=2, sticky="nsew", padx=5, pady=5)
-        self.setup_visao_geral_button(self.frame_visao_geral)
-
-        self.update_ui()
-
-    # ------------------ Métodos de Setup ------------------
-    def setup_login_logout(self, parent):
-        parent.columnconfigure(1, weight=1)
-        tk.Label(parent, text="Usuário:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
-        self.entry_username = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_username.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Senha:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
-        self.entry_password = tk.Entry(parent, show="*", **ENTRY_STYLE)
-        self.entry_password.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
-
-        btn_login = tk.Button(parent, text="Login", **BUTTON_STYLE, command=self.handle_login)
-        btn_login.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
-
-        btn_logout = tk.Button(parent, text="Logout", **BUTTON_STYLE, command=self.handle_logout)
-        btn_logout.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
-
-        self.label_logged_user = tk.Label(parent, text="Não logado", fg="red",
-                                          font=(DEFAULT_FONT[0], DEFAULT_FONT[1], "italic"), bg=BG_FRAME)
-        self.label_logged_user.grid(row=3, column=0, columnspan=2, pady=5)
-
-    def setup_criar_usuario(self, parent):
-        parent.columnconfigure(1, weight=1)
-        tk.Label(parent, text="Username:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
-        self.entry_newuser_username = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_newuser_username.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Senha:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
-        self.entry_newuser_password = tk.Entry(parent, show="*", **ENTRY_STYLE)
-        self.entry_newuser_password.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Tipo:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
-        self.role_var = tk.StringVar(value="padrao")
-        role_options = ["admin", "padrao"]
-        option_role = tk.OptionMenu(parent, self.role_var, *role_options)
-        option_role.config(font=DEFAULT_FONT, bg="#FFFFFF", fg=FG_TEXT, bd=2, relief="solid")
-        option_role.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
-
-        btn_createuser = tk.Button(parent, text="Criar", **BUTTON_STYLE, command=self.handle_create_user)
-        btn_createuser.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-
-    def setup_cadastrar_veiculo(self, parent):
-        parent.columnconfigure(1, weight=1)
-        tk.Label(parent, text="Nome:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
-        self.entry_veic_nome = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_veic_nome.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Marca:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
-        self.entry_veic_marca = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_veic_marca.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Ano:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
-        self.entry_veic_ano = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_veic_ano.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Placa:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=3, column=0, sticky="e", padx=5, pady=3)
-        self.entry_veic_placa = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_veic_placa.grid(row=3, column=1, sticky="ew", padx=5, pady=3)
-
-        btn_register_veic = tk.Button(parent, text="Cadastrar", **BUTTON_STYLE, command=self.handle_register_vehicle)
-        btn_register_veic.grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-
-    def setup_modificar_veiculo(self, parent):
-        parent.columnconfigure(1, weight=1)
-        tk.Label(parent, text="ID:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
-        self.entry_mod_id = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_mod_id.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Novo Nome:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
-        self.entry_mod_nome = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_mod_nome.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Nova Marca:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
-        self.entry_mod_marca = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_mod_marca.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Novo Ano:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=3, column=0, sticky="e", padx=5, pady=3)
-        self.entry_mod_ano = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_mod_ano.grid(row=3, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Nova Placa:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=4, column=0, sticky="e", padx=5, pady=3)
-        self.entry_mod_placa = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_mod_placa.grid(row=4, column=1, sticky="ew", padx=5, pady=3)
-
-        btn_mod_vehicle = tk.Button(parent, text="Modificar", **BUTTON_STYLE, command=self.handle_modify_vehicle)
-        btn_mod_vehicle.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-
-    def setup_alugar(self, parent):
-        parent.columnconfigure(1, weight=1)
-
-        tk.Label(parent, text="ID Veículo:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
-        self.entry_rent_id = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_rent_id.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Nome do Cliente:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=1, column=0, sticky="e", padx=5, pady=3)
-        self.entry_rent_nome = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_rent_nome.grid(row=1, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="CPF:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=2, column=0, sticky="e", padx=5, pady=3)
-        self.entry_rent_cpf = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_rent_cpf.grid(row=2, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="WhatsApp:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=3, column=0, sticky="e", padx=5, pady=3)
-        self.entry_rent_whatsapp = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_rent_whatsapp.grid(row=3, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="Dias:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=4, column=0, sticky="e", padx=5, pady=3)
-        self.entry_rent_dias = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_rent_dias.grid(row=4, column=1, sticky="ew", padx=5, pady=3)
-
-        tk.Label(parent, text="R$/dia:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=5, column=0, sticky="e", padx=5, pady=3)
-        self.entry_rent_valordia = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_rent_valordia.grid(row=5, column=1, sticky="ew", padx=5, pady=3)
-
-        btn_rent = tk.Button(parent, text="Alugar", **BUTTON_STYLE, command=self.handle_rent_vehicle)
-        btn_rent.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-
-    def setup_devolver(self, parent):
-        parent.columnconfigure(1, weight=1)
-        tk.Label(parent, text="ID Aluguel:", font=DEFAULT_FONT, bg=BG_FRAME, fg=FG_TEXT)\
-            .grid(row=0, column=0, sticky="e", padx=5, pady=3)
-        self.entry_return_id = tk.Entry(parent, **ENTRY_STYLE)
-        self.entry_return_id.grid(row=0, column=1, sticky="ew", padx=5, pady=3)
-
-        btn_return = tk.Button(parent, text="Devolver", **BUTTON_STYLE, command=self.handle_return_vehicle)
-        btn_return.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-
-    def setup_listagens(self, parent):
-        parent.rowconfigure(2, weight=1)
-        parent.columnconfigure(0, weight=1)
-
-        btn_list_vehicles = tk.Button(parent, text="Listar Veículos", **BUTTON_STYLE,
-                                      command=self.handle_list_vehicles)
-        btn_list_vehicles.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
-
-        btn_list_open_rentals = tk.Button(parent, text="Listar Aluguéis em Aberto",
-                                          **BUTTON_STYLE, command=self.handle_list_open_rentals)
-        btn_list_open_rentals.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
-
-        self.text_list = tk.Text(parent, wrap="word", font=DEFAULT_FONT, bg="#F9F9F9", fg=FG_TEXT)
-        self.text_list.grid(row=2, column=0, padx=5, pady=5, sticky="nsew")
-
-    def setup_visao_geral_button(self, parent):
-        # Botão "Visão Geral"
-        btn_visao = tk.Button(parent, text="Visão Geral", **BUTTON_STYLE,
-                              command=self.open_visao_geral)
-        btn_visao.pack(fill="x", padx=5, pady=5)
-
-        # Botão "Apagar Base de Dados" abaixo do "Visão Geral"
-        btn_clear_db = tk.Button(parent, text="Apagar Base de Dados", **BUTTON_STYLE,
-                                 command=self.handle_clear_database)
-        btn_clear_db.pack(fill="x", padx=5, pady=5)
-
-    # ------------------ Métodos-Handler ------------------
-    def open_visao_geral(self):
-        if not self.system.get_current_user():
-            messagebox.showerror("Erro", "É necessário estar logado para abrir a Visão Geral!")
-            return
-        visao = VisaoGeralWindow(self, self.system)
-        visao.grab_set()
-
-    def handle_login(self):
-        user = self.entry_username.get().strip()
-        pw   = self.entry_password.get().strip()
-        if self.system.login(user, pw):
-            messagebox.showinfo("Login", f"Bem-vindo, {user}!")
-        else:
-            messagebox.showerror("Erro", "Usuário ou senha incorretos.")
-        self.update_ui()
-
-    def handle_logout(self):
-        self.system.logout()
-        self.update_ui()
-
-    def handle_create_user(self):
-        username = self.entry_newuser_username.get().strip()
-        password = self.entry_newuser_password.get().strip()
-        role     = self.role_var.get().strip()
-        msg = self.system.create_user(username, password, role)
-        messagebox.showinfo("Criar Usuário", msg)
-        self.update_ui()
-
-    def handle_register_vehicle(self):
-        nome  = self.entry_veic_nome.get().strip()
-        marca = self.entry_veic_marca.get().strip()
-        ano   = self.entry_veic_ano.get().strip()
-        placa = self.entry_veic_placa.get().strip()
-        msg   = self.system.register_vehicle(nome, marca, ano, placa)
-        messagebox.showinfo("Cadastro de Veículo", msg)
-        self.update_ui()
-
-    def handle_modify_vehicle(self):
-        try:
-            vehicle_id = int(self.entry_mod_id.get().strip())
-        except ValueError:
-            messagebox.showerror("Erro", "ID do veículo inválido!")
-            return
-        nome  = self.entry_mod_nome.get().strip()
-        marca = self.entry_mod_marca.get().strip()
-        ano   = self.entry_mod_ano.get().strip()
-        placa = self.entry_mod_placa.get().strip()
-        msg   = self.system.modify_vehicle(vehicle_id, nome, marca, ano, placa)
-        messagebox.showinfo("Modificar Veículo", msg)
-        self.update_ui()
-
-    def handle_rent_vehicle(self):
-        try:
-            vehicle_id = int(self.entry_rent_id.get().strip())
-        except ValueError:
-            messagebox.showerror("Erro", "ID do veículo inválido!")
-            return
-
-        nome_cliente = self.entry_rent_nome.get().strip()
-        cpf          = self.entry_rent_cpf.get().strip()
-        whatsapp     = self.entry_rent_whatsapp.get().strip()
-
-        try:
-            dias          = int(self.entry_rent_dias.get().strip())
-            valor_por_dia = float(self.entry_rent_valordia.get().strip())
-        except ValueError:
-            messagebox.showerror("Erro", "Dias ou valor por dia inválidos!")
-            return
-
-        msg = self.system.rent_vehicle(vehicle_id, nome_cliente, cpf, whatsapp, dias, valor_por_dia)
-        messagebox.showinfo("Aluguel", msg)
+# tkinter e matplotlib não são carregados por quem só usa CarRentalSystem;
+# os nomes continuam acessíveis por aqui (ex.: sistema_de_alugueis.CarRentalApp).
+_GUI_NAMES = ("CarRentalApp", "VisaoGeralWindow", "DEFAULT_FONT", "BG_MAIN", "BG_FRAME",
+              "FG_TEXT", "BUTTON_BG", "BUTTON_FG", "BUTTON_STYLE", "ENTRY_STYLE", "SYNC_INTERVAL_MS")
 
-        # Limpar campos após alugar
-        self.entry_rent_id.delete(0, tk.END)
-        self.entry_rent_nome.delete(0, tk.END)
-        self.entry_rent_cpf.delete(0, tk.END)
-        self.entry_rent_whatsapp.delete(0, tk.END)
-        self.entry_rent_dias.delete(0, tk.END)
-        self.entry_rent_valordia.delete(0, tk.END)
+def __getattr__(name):
+    if name in _GUI_NAMES:
+        import interface
+        return getattr(interface, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-        self.update_ui()
+# ---------------------------------------------------------------------------------------
+# Linha de comando
+# ---------------------------------------------------------------------------------------
+def run_gui(system):
+    from interface import CarRentalApp
+    app = CarRentalApp(system)
+    app.mainloop()
 
-    def handle_return_vehicle(self):
+def format_rental(r):
+    devolucao = r["data_devolucao_estimada"].strftime('%d/%m/%Y %H:%M')
+    return (f"Aluguel ID: {r['rental_id']} | Veículo ID: {r['vehicle_id']} | "
+            f"Cliente: {r['nome_cliente']} | CPF: {r['cpf']} | Devolução Estimada: {devolucao}")
+
+def print_stats(system):
+    print("Aluguéis dos últimos 7 dias:")
+    for (r, status) in system.list_rentals_last_7_days():
+        print(f"  {format_rental(r)} | Status: {status}")
+    print("Top 5 carros no mês:")
+    for (nome, count) in system.get_top_5_veiculos_mes():
+        print(f"  {nome}: {count}")
+    print("Top 5 clientes no mês:")
+    for (cpf, count) in system.get_top_5_clientes_mes():
+        print(f"  {cpf}: {count}")
+    print("Faturamento dos últimos 7 dias:")
+    for (label, valor) in zip(*system.get_7days_faturamento()):
+        print(f"  {label}: R$ {valor:.2f}")
+
+def print_customer(perfil):
+    ultima = perfil["ultima_retirada"]
+    print(f"Cliente: {perfil['nome']} | CPF: {perfil['cpf']} | WhatsApp: {perfil['whatsapp']}")
+    print(f"Aluguéis: {len(perfil['alugueis'])} | Total gasto: R$ {perfil['total_gasto']:.2f} | "
+          f"Devoluções atrasadas: {perfil['atrasos']}")
+    print(f"Último aluguel: {perfil['ultimo_aluguel']} em {ultima.strftime('%d/%m/%Y %H:%M')}")
+    print(f"Em aberto: {', '.join(map(str, perfil['em_aberto'])) or 'nenhum'}")
+
+def print_utilization(relatorio):
+    formato = "%d/%m/%Y" if relatorio["periodo"] != "mes" else "%m/%Y"
+    print(f"Utilização de {relatorio['inicio'].strftime('%d/%m/%Y %H:%M')} "
+          f"a {relatorio['fim'].strftime('%d/%m/%Y %H:%M')}: "
+          f"{relatorio['ocupacao_frota']:.1f}% da frota alugada")
+    for (inicio, pct) in zip(relatorio["periodos"], relatorio["frota"]):
+        print(f"  {inicio.strftime(formato)}: {pct:.1f}%")
+    print("Por veículo:")
+    for (vid, uso) in sorted(relatorio["veiculos"].items()):
+        lacuna = uso["maior_lacuna"]
+        maior = (f" | maior lacuna: {lacuna[0].strftime('%d/%m %H:%M')} a "
+                 f"{lacuna[1].strftime('%d/%m %H:%M')}" if lacuna else "")
+        print(f"  ID {vid}: {uso['ocupacao_total']:.1f}% | {uso['horas_alugado']:.1f} h alugado, "
+              f"{uso['horas_ocioso']:.1f} h ocioso em {uso['lacunas']} lacunas{maior}")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Sistema de aluguel de carros.")
+    parser.add_argument("--arquivo", default="data.json", help="arquivo de dados (.json, .bin ou .db)")
+    parser.add_argument("--compartilhado", action="store_true",
+                        help="permite várias instâncias usando o mesmo arquivo")
+    parser.add_argument("--metricas", help="liga as métricas e as grava neste arquivo (JSONL)")
+    parser.add_argument("--arquivar-apos", type=int, metavar="DIAS",
+                        help="ao abrir, arquiva os aluguéis devolvidos há mais de DIAS dias")
+    parser.add_argument("--usuario", default="admin", help="usuário para alugar/devolver")
+    parser.add_argument("--senha", default="admin")
+    sub = parser.add_subparsers(dest="comando")
+    sub.add_parser("gui", help="abre a interface gráfica (padrão)")
+    rent = sub.add_parser("rent", help="aluga um veículo")
+    rent.add_argument("vehicle_id", type=int)
+    rent.add_argument("--cliente", required=True)
+    rent.add_argument("--cpf", required=True)
+    rent.add_argument("--whatsapp", default="")
+    rent.add_argument("--dias", type=int, required=True)
+    rent.add_argument("--valor-dia", type=float, required=True)
+    ret = sub.add_parser("return", help="devolve um aluguel")
+    ret.add_argument("rental_id", type=int)
+    reserve = sub.add_parser("reserve", help="reserva um veículo para um período futuro")
+    reserve.add_argument("vehicle_id", type=int)
+    reserve.add_argument("inicio", type=datetime.datetime.fromisoformat, help="AAAA-MM-DD[THH:MM]")
+    reserve.add_argument("fim", type=datetime.datetime.fromisoformat, help="AAAA-MM-DD[THH:MM]")
+    reserve.add_argument("--cliente", required=True)
+    reserve.add_argument("--cpf", required=True)
+    reserve.add_argument("--whatsapp", default="")
+    reserve.add_argument("--valor-dia", type=float, required=True)
+    cancel = sub.add_parser("cancel-reservation", help="cancela uma reserva")
+    cancel.add_argument("reserva_id", type=int)
+    pickup = sub.add_parser("pickup", help="retira o veículo de uma reserva (abre o aluguel)")
+    pickup.add_argument("reserva_id", type=int)
+    free = sub.add_parser("free", help="lista os veículos livres em um período")
+    free.add_argument("inicio", type=datetime.datetime.fromisoformat)
+    free.add_argument("fim", type=datetime.datetime.fromisoformat)
+    sub.add_parser("list-open", help="lista os aluguéis em aberto")
+    archive = sub.add_parser("archive", help="move os aluguéis antigos para o histórico mensal")
+    archive.add_argument("--dias", type=int, default=ARCHIVE_AFTER_DAYS,
+                         help=f"idade mínima desde a devolução (padrão: {ARCHIVE_AFTER_DAYS})")
+    util = sub.add_parser("utilization", help="mostra a utilização da frota por veículo e período")
+    util.add_argument("--inicio", type=datetime.datetime.fromisoformat,
+                      help=f"AAAA-MM-DD[THH:MM] (padrão: {DIAS_UTILIZACAO} dias antes do fim)")
+    util.add_argument("--fim", type=datetime.datetime.fromisoformat, help="padrão: agora")
+    util.add_argument("--periodo", choices=PERIODOS, default="dia")
+    sub.add_parser("stats", help="mostra as estatísticas da Visão Geral")
+    customer = sub.add_parser("customer", help="mostra o perfil de um cliente")
+    customer.add_argument("cpf")
+    top = sub.add_parser("top-customers", help="ranking de clientes por aluguéis ou total gasto")
+    top.add_argument("-n", type=int, default=5)
+    top.add_argument("--inicio", type=datetime.datetime.fromisoformat, help="AAAA-MM-DD[THH:MM]")
+    top.add_argument("--fim", type=datetime.datetime.fromisoformat)
+    top.add_argument("--valor", action="store_true", help="ordena pelo total gasto (todo o histórico)")
+    imp = sub.add_parser("import", help="importa usuários, veículos ou aluguéis (CSV/JSONL)")
+    imp.add_argument("tipo", choices=("usuarios", "veiculos", "alugueis"))
+    imp.add_argument("caminho")
+    exp = sub.add_parser("export", help="exporta usuários, veículos ou aluguéis (CSV/JSONL)")
+    exp.add_argument("tipo", choices=("usuarios", "veiculos", "alugueis"))
+    exp.add_argument("caminho")
+    args = parser.parse_args(argv)
+
+    if args.comando in (None, "gui"):
+        # Gravação agrupada em segundo plano: a interface não espera pelo disco
+        system = CarRentalSystem(args.arquivo, flush_delay=GROUP_COMMIT_MAX_DELAY,
+                                 shared=args.compartilhado, metrics_path=args.metricas,
+                                 archive_after_days=args.arquivar_apos)
         try:
-            rental_id = int(self.entry_return_id.get().strip())
-        except ValueError:
-            messagebox.showerror("Erro", "ID do aluguel inválido!")
-            return
-        msg = self.system.return_vehicle(rental_id)
-        messagebox.showinfo("Devolução", msg)
-        self.update_ui()
-
-    def handle_list_vehicles(self):
-        self.text_list.delete("1.0", tk.END)
-        vehicles = self.system.list_vehicles()
-        if not vehicles:
-            self.text_list.insert(tk.END, "Nenhum veículo cadastrado.\n")
-            return
-        for v in vehicles:
-            status = "Disponível" if v["disponivel"] else "Indisponível"
-            linha = (f"ID: {v['id']} | {v['nome']} - {v['marca']} "
-                     f"- {v['ano']} - {v['placa']} [{status}]\n")
-            self.text_list.insert(tk.END, linha)
-
-    def handle_list_open_rentals(self):
-        self.text_list.delete("1.0", tk.END)
-        open_rentals = self.system.list_open_rentals()
-        if not open_rentals:
-            self.text_list.insert(tk.END, "Não há aluguéis em aberto.\n")
-            return
-        for r in open_rentals:
-            dt_ret = r["data_retirada"].strftime('%d/%m/%Y %H:%M')
-            dt_dev_est = r["data_devolucao_estimada"].strftime('%d/%m/%Y %H:%M')
-            linha = (f"Aluguel ID: {r['rental_id']} | Veículo ID: {r['vehicle_id']} | "
-                     f"Cliente: {r['nome_cliente']} | CPF: {r['cpf']} | Dias: {r['dias']} | "
-                     f"Retirada: {dt_ret} | Devolução Estimada: {dt_dev_est}\n")
-            self.text_list.insert(tk.END, linha)
-
-    def handle_clear_database(self):
-        """
-        Botão "Apagar Base de Dados" (agora abaixo do botão "Visão Geral"):
-        - Verifica se o usuário é admin
-        - Pede confirmação (messagebox.askyesno)
-        - Pede senha do admin (simpledialog.askstring)
-        - Se ok, chama system.clear_data()
-        """
-        if not self.system.is_admin():
-            messagebox.showerror("Erro", "Somente admin pode apagar a base de dados.")
-            return
-
-        confirm = messagebox.askyesno("Confirmação", 
-                                      "Você tem certeza que deseja APAGAR TODOS OS DADOS?\nEsta ação é irreversível!")
-        if not confirm:
-            return
-
-        # Pede senha do admin
-        admin_pass = simpledialog.askstring("Senha do Admin", 
-                                            "Por favor, insira a senha do admin para confirmar:",
-                                            show='*')
-        if admin_pass is None:
-            # Usuário cancelou o input
-            return
-
-        # Verifica se a senha está correta
-        # Precisamos achar o user admin ("admin") e verificar a password
-        admin_user = None
-        for u in self.system.users:
-            if u["role"] == "admin" and u["username"] == "admin":
-                admin_user = u
-                break
-
-        if admin_user is not None and admin_user["password"] == admin_pass:
-            self.system.clear_data()
-            messagebox.showinfo("Sucesso", "Base de dados apagada com sucesso. Admin recriado (admin/admin).")
-        else:
-            messagebox.showerror("Erro", "Senha de admin incorreta. Base de dados não foi apagada.")
-
-    def update_ui(self):
-        user = self.system.get_current_user()
-        if user:
-            self.label_logged_user.config(text=f"Logado como: {user['username']}", fg="green")
+            run_gui(system)
+        finally:
+            system.close()
+        return 0
+
+    system = CarRentalSystem(args.arquivo, shared=args.compartilhado, metrics_path=args.metricas,
+                             archive_after_days=args.arquivar_apos)
+    try:
+        if args.comando in ("rent", "return", "import", "reserve", "cancel-reservation", "pickup"):
+            if not system.login(args.usuario, args.senha):
+                print("Usuário ou senha inválidos!")
+                return 1
+            if args.comando == "rent":
+                print(system.rent_vehicle(args.vehicle_id, args.cliente, args.cpf, args.whatsapp,
+                                          args.dias, args.valor_dia))
+            elif args.comando == "return":
+                print(system.return_vehicle(args.rental_id))
+            elif args.comando == "reserve":
+                print(system.reserve_vehicle(args.vehicle_id, args.cliente, args.cpf, args.whatsapp,
+                                             args.inicio, args.fim, args.valor_dia))
+            elif args.comando == "cancel-reservation":
+                print(system.cancel_reservation(args.reserva_id))
+            elif args.comando == "pickup":
+                print(system.pickup_reservation(args.reserva_id))
+            else:
+                from transferencia import import_file
+                print(import_file(system, args.tipo, args.caminho))
+        elif args.comando == "export":
+            from transferencia import export_file
+            total = export_file(system, args.tipo, args.caminho)
+            print(f"{total} registros exportados para {args.caminho}.")
+        elif args.comando == "free":
+            livres = system.free_vehicles(args.inicio, args.fim)
+            if not livres:
+                print("Nenhum veículo livre no período.")
+            for v in livres:
+                print(f"ID: {v['id']} | {v['nome']} - {v['marca']} - {v['ano']} - {v['placa']}")
+        elif args.comando == "list-open":
+            abertos = system.list_open_rentals()
+            if not abertos:
+                print("Nenhum aluguel em aberto.")
+            for r in abertos:
+                print(format_rental(r))
+        elif args.comando == "archive":
+            print(system.archive_rentals(args.dias))
+        elif args.comando == "customer":
+            perfil = system.get_customer(args.cpf)
+            if perfil is None:
+                print("Cliente não encontrado.")
+                return 1
+            print_customer(perfil)
+        elif args.comando == "top-customers":
+            if args.valor:
+                for (cpf, total) in system.top_customers_by_value(args.n):
+                    print(f"  {cpf}: R$ {total:.2f}")
+            else:
+                for (cpf, count) in system.top_customers(args.n, args.inicio, args.fim):
+                    print(f"  {cpf}: {count}")
+        elif args.comando == "utilization":
+            try:
+                print_utilization(system.utilization_report(args.inicio, args.fim, args.periodo))
+            except ValueError as e:
+                print(e)
+                return 1
         else:
-            self.label_logged_user.config(text="Não logado", fg="red")
-
-        is_logged_in = bool(user)
-        is_admin = self.system.is_admin()
-
-        # Criar usuário: só admin
-        state_create_user = "normal" if is_admin else "disabled"
-        self.entry_newuser_username.config(state=state_create_user)
-        self.entry_newuser_password.config(state=state_create_user)
-        for w in self.frame_create_user.children.values():
-            if isinstance(w, tk.OptionMenu):
-                w.config(state=state_create_user)
-            if isinstance(w, tk.Button) and w.cget("text") == "Criar":
-                w.config(state=state_create_user)
-
-        # Cadastrar e modificar veículos: só admin
-        state_vehicle_admin = "normal" if is_admin else "disabled"
-        self.entry_veic_nome.config(state=state_vehicle_admin)
-        self.entry_veic_marca.config(state=state_vehicle_admin)
-        self.entry_veic_ano.config(state=state_vehicle_admin)
-        self.entry_veic_placa.config(state=state_vehicle_admin)
-
-        self.entry_mod_id.config(state=state_vehicle_admin)
-        self.entry_mod_nome.config(state=state_vehicle_admin)
-        self.entry_mod_marca.config(state=state_vehicle_admin)
-        self.entry_mod_ano.config(state=state_vehicle_admin)
-        self.entry_mod_placa.config(state=state_vehicle_admin)
-
-        for w in self.frame_vehicle.children.values():
-            if isinstance(w, tk.Button) and w.cget("text") == "Cadastrar":
-                w.config(state=state_vehicle_admin)
-        for w in self.frame_mod_vehicle.children.values():
-            if isinstance(w, tk.Button) and w.cget("text") == "Modificar":
-                w.config(state=state_vehicle_admin)
-
-        # Alugar e devolver: qualquer usuário logado
-        state_rent_return = "normal" if is_logged_in else "disabled"
-        self.entry_rent_id.config(state=state_rent_return)
-        self.entry_rent_nome.config(state=state_rent_return)
-        self.entry_rent_cpf.config(state=state_rent_return)
-        self.entry_rent_whatsapp.config(state=state_rent_return)
-        self.entry_rent_dias.config(state=state_rent_return)
-        self.entry_rent_valordia.config(state=state_rent_return)
-        self.entry_return_id.config(state=state_rent_return)
-
-        for w in self.frame_rent.children.values():
-            if isinstance(w, tk.Button) and w.cget("text") == "Alugar":
-                w.config(state=state_rent_return)
-        for w in self.frame_return.children.values():
-            if isinstance(w, tk.Button) and w.cget("text") == "Devolver":
-                w.config(state=state_rent_return)
-
-
-def main():
-    system = CarRentalSystem("data.json")
-    app = CarRentalApp(system)
-    app.mainloop()
+            print_stats(system)
+    finally:
+        system.close()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
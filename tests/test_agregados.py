@@ -0,0 +1,102 @@
+import datetime
+import random
+from collections import Counter
+
+from armazenamento import convert_storage, open_storage
+from sistema_de_alugueis import CarRentalSystem
+
+def _um_aluguel(path, valor):
+    system = CarRentalSystem(str(path))
+    system.login("admin", "admin")
+    system.register_vehicle("Gol", "VW", 2020, "ABC1234")
+    system.rent_vehicle(1, "Ana", "111", "", 1, valor)
+    system.close()
+
+def test_formatos_no_mesmo_diretorio_tem_agregados_separados(tmp_path):
+    # Mesma quantidade de aluguéis e mesmo rental_id: só o caminho separa os agregados
+    _um_aluguel(tmp_path / "dados.json", 10.0)
+    _um_aluguel(tmp_path / "dados.bin", 99.0)
+    for (nome, valor) in (("dados.json", 10.0), ("dados.bin", 99.0)):
+        system = CarRentalSystem(str(tmp_path / nome))
+        assert list(system._faturamento_por_dia.values()) == [valor]
+        assert system.get_top_5_clientes_mes() == [("111", 1)]
+        system.close()
+
+def test_agregados_gravados_batem_com_o_recalculo(tmp_path):
+    path = tmp_path / "dados.json"
+    system = CarRentalSystem(str(path))
+    system.login("admin", "admin")
+    for i in range(3):
+        system.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+        system.rent_vehicle(i + 1, "Cliente", f"{i % 2}", "", 1 + i, 10.0)
+    system.close()
+    reaberto = CarRentalSystem(str(path))
+    gravados = (reaberto._faturamento_por_dia, reaberto._veiculos_por_mes, reaberto._clientes_por_mes)
+    reaberto.rebuild_aggregates()
+    assert (reaberto._faturamento_por_dia, reaberto._veiculos_por_mes, reaberto._clientes_por_mes) == gravados
+    assert sum(reaberto._faturamento_por_dia.values()) == 10.0 + 20.0 + 30.0
+    reaberto.close()
+
+def test_totais_por_intervalo_batem_com_a_contagem_direta(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.login("admin", "admin")
+    for i in range(3):
+        system.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+    rng = random.Random(3)
+    inicio = datetime.datetime(2024, 1, 1)
+    linhas = []
+    for vid in (1, 2, 3):
+        retirada = inicio + datetime.timedelta(hours=rng.randrange(48))
+        for _ in range(40):
+            dias = rng.randint(1, 4)
+            devolucao = retirada + datetime.timedelta(days=dias)
+            linhas.append({"vehicle_id": vid, "nome_cliente": "Cliente", "cpf": str(rng.randrange(6)),
+                           "whatsapp": "", "dias": dias, "valor_por_dia": rng.randint(1, 9),
+                           "data_retirada": retirada.isoformat(),
+                           "data_devolucao_efetiva": devolucao.isoformat()})
+            retirada = devolucao + datetime.timedelta(minutes=rng.randrange(3000))
+    system.import_rentals(linhas)
+    alugueis = system.rentals_between()
+    intervalos = [(None, None), (inicio, None), (None, datetime.datetime(2024, 3, 1))]
+    for _ in range(30):
+        a = inicio + datetime.timedelta(minutes=rng.randrange(300 * 1440))
+        intervalos.append((a, a + datetime.timedelta(minutes=rng.randrange(1, 120 * 1440))))
+    for (a, b) in intervalos:
+        dentro = [r for r in alugueis if (a is None or r["data_retirada"] >= a)
+                  and (b is None or r["data_retirada"] < b)]
+        faturamento = {}
+        for r in dentro:
+            dia = r["data_retirada"].date()
+            faturamento[dia] = faturamento.get(dia, 0.0) + r["valor_total"]
+        totais = system.period_totals(a, b)
+        assert totais["faturamento_por_dia"] == faturamento
+        assert totais["veiculos"] == Counter(r["vehicle_id"] for r in dentro)
+        assert totais["clientes"] == Counter(r["cpf"] for r in dentro)
+    system.close()
+
+def test_agregados_so_regravados_quando_desatualizados(tmp_path):
+    path = tmp_path / "dados.json"
+    _um_aluguel(path, 10.0)
+    system = CarRentalSystem(str(path))
+    gravacoes = []
+    system.storage.save_aggregates = gravacoes.append
+    system.refresh_aggregates()
+    assert gravacoes == []
+    system.login("admin", "admin")
+    system.return_vehicle(1)
+    system.rent_vehicle(1, "Bia", "222", "", 1, 5.0)
+    system.refresh_aggregates()
+    assert [g["ate_rental_id"] for g in gravacoes] == [2]
+    system.close()
+    assert len(gravacoes) == 1
+
+def test_conversao_leva_os_agregados(tmp_path):
+    _um_aluguel(tmp_path / "dados.json", 10.0)
+    for destino in ("dados.bin", "dados.db"):
+        convert_storage(str(tmp_path / "dados.json"), str(tmp_path / destino))
+        storage = open_storage(str(tmp_path / destino))
+        assert storage.load_aggregates() is not None
+        storage.close()
+        system = CarRentalSystem(str(tmp_path / destino))
+        assert list(system._faturamento_por_dia.values()) == [10.0]
+        system.close()
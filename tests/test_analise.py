@@ -0,0 +1,62 @@
+import datetime
+import random
+from collections import Counter
+
+import pytest
+
+from analise import AnaliseVetorizada
+from armazenamento import Rental
+from utilizacao import inicio_do_periodo
+
+def _alugueis(rng, n, inicio):
+    alugueis = []
+    for i in range(1, n + 1):
+        retirada = inicio + datetime.timedelta(minutes=rng.randrange(200 * 1440))
+        dias = rng.randint(1, 7)
+        devolucao = retirada + datetime.timedelta(days=dias)
+        alugueis.append(Rental(i, rng.randint(1, 8), "Cliente", "admin", str(rng.randrange(12)), "",
+                               dias, 10.0, 10.0 * dias, retirada, devolucao, devolucao))
+    return alugueis
+
+def test_relatorios_batem_com_a_contagem_direta():
+    rng = random.Random(8)
+    inicio = datetime.datetime(2024, 1, 1)
+    alugueis = _alugueis(rng, 300, inicio)
+    analise = AnaliseVetorizada(capacidade=16)
+    # Fora de ordem e em dois lotes: as colunas crescem e são reordenadas
+    analise.extend(alugueis[150:])
+    analise.refresh(alugueis[:150])
+    analise.extend(alugueis[:150])
+    assert len(analise) == 300
+    for _ in range(20):
+        a = inicio + datetime.timedelta(minutes=rng.randrange(220 * 1440))
+        b = a + datetime.timedelta(minutes=rng.randrange(1, 90 * 1440))
+        dentro = [r for r in alugueis if a <= r["data_retirada"] < b]
+        for periodo in ("dia", "semana", "mes"):
+            (labels, values) = analise.faturamento(a, b, periodo)
+            esperado = Counter()
+            for r in dentro:
+                esperado[inicio_do_periodo(r["data_retirada"], periodo).date()] += r["valor_total"]
+            assert labels[0] == inicio_do_periodo(a, periodo).date()
+            assert labels == sorted(set(labels))
+            assert {d: v for (d, v) in zip(labels, values) if v} == dict(esperado)
+        contagens = Counter(r["vehicle_id"] for r in dentro)
+        assert [count for (_, count) in analise.top_veiculos(a, b, 3)] == \
+            [count for (_, count) in contagens.most_common(3)]
+        top = analise.top_clientes(a, b, 3)
+        clientes = Counter(r["cpf"] for r in dentro)
+        assert all(clientes[cpf] == count for (cpf, count) in top)
+        assert [count for (_, count) in top] == [count for (_, count) in clientes.most_common(3)]
+        media = sum(r["dias"] for r in dentro) / len(dentro) if dentro else 0.0
+        assert analise.media_dias(a, b) == pytest.approx(media)
+
+def test_faturamento_recusa_intervalo_invertido():
+    analise = AnaliseVetorizada()
+    analise.extend(_alugueis(random.Random(1), 10, datetime.datetime(2024, 1, 1)))
+    inicio = datetime.datetime(2024, 3, 10)
+    with pytest.raises(ValueError):
+        analise.faturamento(inicio, inicio - datetime.timedelta(days=40), "mes")
+    with pytest.raises(ValueError):
+        analise.faturamento(inicio, inicio, "dia")
+    with pytest.raises(ValueError):
+        analise.faturamento(inicio, inicio + datetime.timedelta(days=1), "ano")
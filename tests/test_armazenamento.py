@@ -0,0 +1,241 @@
+import datetime
+import os
+import threading
+import time
+
+import pytest
+
+from armazenamento import (BinaryStorage, convert_storage, decode_binary_snapshot,
+                           encode_binary_snapshot, GroupCommitStorage, JsonStorage, open_storage,
+                           Rental)
+
+AGORA = datetime.datetime(2024, 8, 20, 14, 30, 15, 123456)
+
+def _dados():
+    users = [{"username": "admin", "password": "admin", "role": "admin"},
+             {"username": "joão", "password": "ç@ã€", "role": "padrao"}]
+    vehicles = [{"id": 1, "nome": "Gol", "marca": "VW", "ano": "2020", "placa": "ABC1234", "disponivel": True},
+                {"id": 2, "nome": "Ônix Plus", "marca": "Chevrolet", "ano": "2023", "placa": "BRA2E19",
+                 "disponivel": False}]
+    rentals = [Rental(1, 1, "Ana Maria", "admin", "12345678900", "(11) 91234-5678", 3, 120.0, 360.0,
+                      AGORA - datetime.timedelta(days=10), AGORA - datetime.timedelta(days=7),
+                      AGORA - datetime.timedelta(days=7, hours=2)),
+               Rental(2, 2, "", "joão", "98765432100", "", 2, 99.9, 199.8,
+                      AGORA, AGORA + datetime.timedelta(days=2), None)]
+    reservations = [{"reserva_id": 1, "vehicle_id": 1, "nome_cliente": "Bia", "user_reservou": "admin",
+                     "cpf": "222", "whatsapp": "", "valor_por_dia": 100.0,
+                     "inicio": AGORA + datetime.timedelta(days=5), "fim": AGORA + datetime.timedelta(days=6),
+                     "status": "ativa", "rental_id": None},
+                    {"reserva_id": 2, "vehicle_id": 2, "nome_cliente": "Caio", "user_reservou": "admin",
+                     "cpf": "333", "whatsapp": "1", "valor_por_dia": 80.0, "inicio": AGORA,
+                     "fim": AGORA + datetime.timedelta(days=2), "status": "retirada", "rental_id": 2}]
+    return (users, vehicles, rentals, reservations)
+
+def _iguais(a, b):
+    assert a[0] == b[0]
+    assert a[1] == b[1]
+    assert [r.to_dict() for r in a[2]] == [r.to_dict() for r in b[2]]
+    assert a[3] == b[3]
+
+def _abrir(path):
+    storage = open_storage(str(path))
+    dados = storage.load()
+    return (storage, dados)
+
+# ------------------ Snapshot + journal ------------------
+@pytest.mark.parametrize("extensao", [".json", ".bin", ".db"])
+def test_journal_reaplicado_na_carga(tmp_path, extensao):
+    path = tmp_path / f"dados{extensao}"
+    (storage, _) = _abrir(path)
+    (users, vehicles, rentals, reservations) = _dados()
+    storage.save(users, vehicles, rentals[:1], reservations[:1])
+    # Upserts: registro novo e registro alterado depois de gravado
+    storage.append(("r", rentals[1]), ("v", vehicles[1]))
+    storage.append(("b", reservations[1]))
+    rentals[1]["data_devolucao_efetiva"] = AGORA + datetime.timedelta(days=1)
+    vehicles[1]["disponivel"] = True
+    storage.append(("r", rentals[1]), ("v", vehicles[1]))
+    storage.close()
+
+    (storage, dados) = _abrir(path)
+    storage.close()
+    _iguais(dados, (users, vehicles, rentals, reservations))
+
+@pytest.mark.parametrize("extensao", [".json", ".bin"])
+def test_final_truncado_do_journal_descartado(tmp_path, extensao):
+    path = tmp_path / f"dados{extensao}"
+    (storage, _) = _abrir(path)
+    (users, vehicles, rentals, _) = _dados()
+    storage.save(users, vehicles[:1], [])
+    storage.append(("r", rentals[0]))
+    storage.close()
+    journal = str(path) + ".journal"
+    tamanho = os.path.getsize(journal)
+    # Queda no meio da escrita do próximo registro
+    with open(journal, "ab") as f:
+        f.write(b'{"t":"r","d":{"rental_id":2,"vehicle')
+
+    (storage, dados) = _abrir(path)
+    assert [r["rental_id"] for r in dados[2]] == [1]
+    assert os.path.getsize(journal) == tamanho
+    # O próximo registro fica legível depois do final descartado
+    storage.append(("r", rentals[1]))
+    storage.close()
+    (storage, dados) = _abrir(path)
+    storage.close()
+    assert [r.to_dict() for r in dados[2]] == [r.to_dict() for r in rentals]
+
+def test_compactacao_interrompida_e_retomada(tmp_path):
+    path = str(tmp_path / "dados.json")
+    storage = JsonStorage(path)
+    storage.load()
+    (users, vehicles, rentals, reservations) = _dados()
+    storage.save(users, [], [])
+    storage.append(*(("v", v) for v in vehicles))
+    storage.close()
+    # Parou depois de rotacionar o journal, antes de gravar o snapshot
+    os.replace(path + ".journal", path + ".journal.compactando")
+    storage = JsonStorage(path)
+    storage.append(*(("r", r) for r in rentals))
+    assert storage.load()[1] == vehicles
+    storage.close()
+    assert not os.path.exists(path + ".journal.compactando")
+    (storage, dados) = _abrir(path)
+    storage.close()
+    assert dados[1] == vehicles
+    assert [r.to_dict() for r in dados[2]] == [r.to_dict() for r in rentals]
+
+@pytest.mark.parametrize("extensao", [".json", ".bin"])
+def test_compactacao_por_limite_de_registros(tmp_path, extensao):
+    path = str(tmp_path / f"dados{extensao}")
+    storage = open_storage(path, compact_threshold=10)
+    storage.load()
+    (users, vehicles, _, _) = _dados()
+    storage.save(users, [], [])
+    esperados = []
+    for i in range(1, 36):
+        v = dict(vehicles[0], id=i, placa=f"PLC{i:04d}")
+        esperados.append(v)
+        storage.append(("v", v))
+    storage.close()
+    # Parte dos registros já está no snapshot, sem o journal
+    assert len(storage._read_tables(path)["v"]) >= 10
+    (storage, dados) = _abrir(path)
+    storage.close()
+    assert dados[1] == esperados
+
+def test_conversao_entre_formatos(tmp_path):
+    dados = _dados()
+    origem = open_storage(str(tmp_path / "a.json"))
+    origem.save(*dados)
+    origem.close()
+    caminho = [tmp_path / "a.json", tmp_path / "b.bin", tmp_path / "c.db", tmp_path / "d.json"]
+    for (src, dst) in zip(caminho, caminho[1:]):
+        assert convert_storage(str(src), str(dst)) == (2, 2, 2, 2)
+    (storage, final) = _abrir(caminho[-1])
+    storage.close()
+    _iguais(final, dados)
+
+# ------------------ Registro compacto de aluguel ------------------
+def test_rental_compacto_com_acesso_por_chave():
+    cpf = "".join(["123", "456"])
+    a = Rental(1, 2, "Ana", "admin", cpf, "", 1, 10.0, 10.0, AGORA, AGORA)
+    b = Rental(2, 2, "Ana", "admin", "".join(["12", "3456"]), "", 1, 10.0, 10.0, AGORA, AGORA)
+    assert not hasattr(a, "__dict__")
+    assert a["cpf"] is b["cpf"]
+    assert a["data_devolucao_efetiva"] is None and a.get("placa", "-") == "-"
+    a["data_devolucao_efetiva"] = AGORA
+    assert a.data_devolucao_efetiva == AGORA
+    with pytest.raises(KeyError):
+        a["placa"]
+    with pytest.raises(KeyError):
+        a["placa"] = "ABC1234"
+    assert "cpf" in a and list(a) == list(a.keys())
+    assert a == dict(a.to_dict()) and a != b
+    assert Rental(**a.to_dict()) == a
+
+# ------------------ Gravação agrupada ------------------
+class _Gravacoes:
+    # Armazenamento falso: guarda cada lote recebido por append
+    def __init__(self):
+        self.lotes = []
+        self.gravou = threading.Event()
+
+    def append(self, *records):
+        self.lotes.append([(t, dict(d)) for (t, d) in records])
+        self.gravou.set()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_gravacao_agrupada_junta_a_rajada():
+    destino = _Gravacoes()
+    storage = GroupCommitStorage(destino, max_delay=60)
+    v = {"id": 1, "nome": "Gol", "disponivel": True}
+    storage.append(("v", v))
+    v["disponivel"] = False
+    storage.append(("v", v), ("u", {"username": "bia", "role": "padrao"}))
+    # A cópia enfileirada não muda com o item
+    v["nome"] = "Outro"
+    assert destino.lotes == []
+    storage.flush()
+    assert destino.lotes == [[("v", {"id": 1, "nome": "Gol", "disponivel": False}),
+                              ("u", {"username": "bia", "role": "padrao"})]]
+    storage.append(("v", v))
+    storage.close()
+    assert len(destino.lotes) == 2 and destino.lotes[1][0][1]["nome"] == "Outro"
+
+def test_gravacao_agrupada_respeita_o_prazo():
+    destino = _Gravacoes()
+    storage = GroupCommitStorage(destino, max_delay=0.05)
+    inicio = time.monotonic()
+    storage.append(("v", {"id": 1}))
+    assert destino.gravou.wait(5)
+    assert time.monotonic() - inicio >= 0.04
+    assert destino.lotes == [[("v", {"id": 1})]]
+    storage.close()
+
+# ------------------ Formato binário ------------------
+def test_codec_binario_ida_e_volta():
+    (users, vehicles, rentals, reservations) = _dados()
+    # ano inteiro volta inteiro, ano texto volta texto
+    vehicles[0]["ano"] = 2020
+    tables = decode_binary_snapshot(encode_binary_snapshot(users, vehicles, rentals, reservations))
+    assert list(tables["u"].values()) == users
+    assert list(tables["v"].values()) == vehicles
+    assert type(tables["v"][1]["ano"]) is int and type(tables["v"][2]["ano"]) is str
+    assert [r.to_dict() for r in tables["r"].values()] == [r.to_dict() for r in rentals]
+    assert list(tables["r"]) == [1, 2]
+    assert list(tables["b"].values()) == reservations
+
+def test_codec_binario_vazio_e_strings_repetidas():
+    tables = decode_binary_snapshot(encode_binary_snapshot([], [], []))
+    assert tables == {"u": {}, "v": {}, "r": {}, "b": {}}
+    (_, _, rentals, _) = _dados()
+    muitos = [Rental(i, 1, "Ana Maria", "admin", "123", "", 1, 1.0, 1.0, AGORA, AGORA, None)
+              for i in range(1, 1001)]
+    # Cada string diferente é gravada uma vez só
+    assert len(encode_binary_snapshot([], [], muitos)) < 1000 * 100
+
+@pytest.mark.parametrize("estrago", ["magic", "crc", "truncado"])
+def test_codec_binario_recusa_arquivo_estragado(estrago):
+    data = bytearray(encode_binary_snapshot(*_dados()))
+    if estrago == "magic":
+        data[:4] = b"XXXX"
+    elif estrago == "crc":
+        data[-1] ^= 0xFF
+    else:
+        data = data[:len(data) // 2]
+    with pytest.raises(ValueError):
+        decode_binary_snapshot(bytes(data))
+
+def test_binary_storage_le_o_proprio_snapshot(tmp_path):
+    path = str(tmp_path / "dados.bin")
+    storage = BinaryStorage(path)
+    storage.save(*_dados())
+    storage.close()
+    with open(path, "rb") as f:
+        assert f.read(4) == b"ALGB"
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from busca import IndiceVeiculos
+from gerador import MARCAS, placa_mercosul
+
+# buscar() é comparado com uma varredura direta da frota
+
+def _frota(rng, n):
+    modelos = [(marca, nome) for (marca, nomes) in MARCAS.items() for nome in nomes]
+    vehicles = []
+    for vid in range(1, n + 1):
+        (marca, nome) = rng.choice(modelos)
+        vehicles.append({"id": vid, "nome": nome, "marca": marca, "ano": str(rng.randint(2015, 2025)),
+                         "placa": placa_mercosul(rng.randrange(5000)) + str(vid),
+                         "disponivel": rng.random() < 0.6})
+    return vehicles
+
+def _varredura(vehicles, texto="", nome=None, marca=None, ano=None, placa=None, disponivel=None,
+               limite=None):
+    resultado = []
+    for v in sorted(vehicles, key=lambda v: v["id"]):
+        palavras = {p for campo in ("nome", "marca", "ano") for p in str(v[campo]).lower().split()}
+        if any(not (v["placa"].lower().startswith(t) or any(p.startswith(t) for p in palavras))
+               for t in texto.lower().split()):
+            continue
+        if any(valor and str(v[campo]).lower() != str(valor).lower()
+               for (campo, valor) in (("nome", nome), ("marca", marca), ("ano", ano))):
+            continue
+        if placa and not v["placa"].lower().startswith(placa.lower()):
+            continue
+        if disponivel is not None and v["disponivel"] != disponivel:
+            continue
+        resultado.append(v["id"])
+    return resultado[:limite]
+
+CONSULTAS = [
+    {},
+    {"texto": "fiat"},
+    {"texto": "on 20"},
+    {"texto": "HB"},
+    {"texto": "a"},
+    {"texto": "nada"},
+    {"nome": "onix"},
+    {"marca": "Toyota", "ano": "2020"},
+    {"placa": "aa"},
+    {"placa": "AAB0"},
+    {"disponivel": True},
+    {"disponivel": False},
+    {"texto": "s", "disponivel": True},
+    {"marca": "fiat", "disponivel": False, "limite": 3},
+    {"texto": "2021", "placa": "a", "disponivel": True},
+    {"nome": "Gol", "marca": "Volkswagen", "disponivel": True, "limite": 2},
+]
+
+@pytest.mark.parametrize("consulta", CONSULTAS)
+def test_buscar_igual_a_varredura(consulta):
+    vehicles = _frota(random.Random(1), 400)
+    indice = IndiceVeiculos(vehicles)
+    assert indice.buscar(**consulta) == _varredura(vehicles, **consulta)
+
+def test_indice_acompanha_alteracoes():
+    rng = random.Random(2)
+    vehicles = _frota(rng, 300)
+    indice = IndiceVeiculos(vehicles)
+    for v in rng.sample(vehicles, 60):
+        v["disponivel"] = not v["disponivel"]
+        indice.definir_disponivel(v["id"], v["disponivel"])
+    for v in rng.sample(vehicles, 30):
+        # Alterado no lugar: o índice tira as chaves antigas ao reindexar
+        v["nome"] = "Kwid"
+        v["marca"] = "Renault"
+        indice.adicionar(v)
+    removidos = rng.sample(vehicles, 40)
+    for v in removidos:
+        indice.remover(v["id"])
+        vehicles.remove(v)
+    novos = [dict(v, id=v["id"] + 1000) for v in _frota(rng, 20)]
+    for v in novos:
+        indice.adicionar(v)
+    vehicles += novos
+    assert len(indice) == len(vehicles)
+    for consulta in CONSULTAS:
+        assert indice.buscar(**consulta) == _varredura(vehicles, **consulta), consulta
+    # A palavra que ficou sem veículos sai do vocabulário
+    assert all(indice.buscar(texto=p) for p in indice._vocabulario)
+
+def test_mapa_de_disponibilidade():
+    indice = IndiceVeiculos()
+    indice.adicionar({"id": 5, "nome": "Gol", "marca": "VW", "ano": 2020, "placa": "ABC1234",
+                      "disponivel": True})
+    assert indice.disponivel(5)
+    # ids fora do mapa e ids sem veículo contam como indisponíveis
+    assert not indice.disponivel(3)
+    assert not indice.disponivel(100)
+    indice.definir_disponivel(5, False)
+    assert indice.buscar(disponivel=True) == []
+    assert indice.buscar(disponivel=False) == [5]
+    indice.remover(5)
+    assert indice.buscar(disponivel=False) == []
+    assert indice.buscar() == []
@@ -0,0 +1,120 @@
+import datetime
+import random
+from collections import Counter
+
+from armazenamento import Rental
+from clientes import atrasado, combinar, IndiceClientes
+from sistema_de_alugueis import CarRentalSystem
+
+BASE = datetime.datetime(2024, 1, 1)
+
+def _alugueis(rng, n):
+    alugueis = []
+    for rental_id in range(1, n + 1):
+        retirada = BASE + datetime.timedelta(hours=rng.randrange(24 * 365))
+        dias = rng.randint(1, 10)
+        estimada = retirada + datetime.timedelta(days=dias)
+        efetiva = None if rng.random() < 0.2 else estimada + datetime.timedelta(hours=rng.randint(-30, 30))
+        alugueis.append(Rental(rental_id, rng.randint(1, 20), f"Nome {rental_id}", "admin",
+                               str(rng.randrange(25)), f"9{rental_id}", dias, 100.0, 100.0 * dias,
+                               retirada, estimada, efetiva))
+    return alugueis
+
+def _perfil_direto(alugueis, cpf):
+    meus = [r for r in alugueis if r["cpf"] == cpf]
+    if not meus:
+        return None
+    ultimo = max(meus, key=lambda r: (r["data_retirada"], r["rental_id"]))
+    return {
+        "cpf": cpf,
+        "nome": ultimo["nome_cliente"],
+        "whatsapp": ultimo["whatsapp"],
+        "alugueis": sorted(r["rental_id"] for r in meus),
+        "total_gasto": sum(r["valor_total"] for r in meus),
+        "ultimo_aluguel": ultimo["rental_id"],
+        "ultima_retirada": ultimo["data_retirada"],
+        "em_aberto": [r["rental_id"] for r in meus if r["data_devolucao_efetiva"] is None],
+        "atrasos": sum(atrasado(r) for r in meus),
+    }
+
+def _comparar(obtido, esperado):
+    assert (obtido is None) == (esperado is None)
+    if obtido is not None:
+        assert dict(obtido, em_aberto=sorted(obtido["em_aberto"]),
+                    total_gasto=round(obtido["total_gasto"], 6)) == \
+            dict(esperado, total_gasto=round(esperado["total_gasto"], 6))
+
+def test_indice_igual_a_percorrer_os_alugueis():
+    rng = random.Random(8)
+    alugueis = _alugueis(rng, 600)
+    # Incremental: os aluguéis chegam fora de ordem e os em aberto são devolvidos depois
+    indice = IndiceClientes()
+    abertos = []
+    for r in rng.sample(alugueis, len(alugueis)):
+        efetiva = r["data_devolucao_efetiva"]
+        if efetiva is not None and rng.random() < 0.3:
+            r["data_devolucao_efetiva"] = None
+            indice.adicionar(r)
+            r["data_devolucao_efetiva"] = efetiva
+            abertos.append(r)
+        else:
+            indice.adicionar(r)
+    for r in abertos:
+        indice.devolver(r)
+    reconstruido = IndiceClientes()
+    reconstruido.reconstruir(alugueis)
+    carregado = IndiceClientes()
+    carregado.carregar(reconstruido.exportar())
+    for cpf in map(str, range(26)):
+        esperado = _perfil_direto(alugueis, cpf)
+        for i in (indice, reconstruido, carregado):
+            _comparar(i.perfil(cpf), esperado)
+
+def test_combinar_conta_uma_vez_o_que_esta_nos_dois_lados():
+    rng = random.Random(9)
+    alugueis = sorted(_alugueis(rng, 300), key=lambda r: r["rental_id"])
+    for r in alugueis[:200]:
+        if r["data_devolucao_efetiva"] is None:
+            r["data_devolucao_efetiva"] = r["data_devolucao_estimada"]
+    # 150-199 estão nos dois: no histórico e ainda no arquivo principal
+    (arquivo, principal) = (IndiceClientes(), IndiceClientes())
+    arquivo.reconstruir(alugueis[:200])
+    principal.reconstruir(alugueis[150:])
+    por_id = {r["rental_id"]: r for r in alugueis[150:]}
+    for cpf in map(str, range(26)):
+        _comparar(combinar(arquivo.perfil(cpf), principal.perfil(cpf), por_id),
+                  _perfil_direto(alugueis, cpf))
+
+def test_sistema_ranking_de_clientes(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.login("admin", "admin")
+    for i in range(10):
+        system.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+    rng = random.Random(10)
+    linhas = []
+    retirada = datetime.datetime(2024, 1, 3, 10)
+    for i in range(400):
+        dias = rng.randint(1, 4)
+        linhas.append({"vehicle_id": i % 10 + 1, "nome_cliente": "Cliente", "cpf": str(rng.randrange(12)),
+                       "whatsapp": "", "dias": dias, "valor_por_dia": rng.choice((80, 120)),
+                       "data_retirada": retirada.isoformat(),
+                       "data_devolucao_efetiva": (retirada + datetime.timedelta(days=dias)).isoformat()})
+        retirada += datetime.timedelta(hours=rng.randint(1, 30))
+    system.import_rentals(linhas)
+    alugueis = list(system.all_rentals())
+    for (inicio, fim) in ((None, None), (datetime.datetime(2024, 2, 10, 12), datetime.datetime(2024, 5, 20)),
+                          (datetime.datetime(2024, 3, 1), datetime.datetime(2024, 4, 1)),
+                          (datetime.datetime(2024, 3, 5), datetime.datetime(2024, 3, 9))):
+        contagem = Counter(r["cpf"] for r in alugueis
+                           if (inicio is None or r["data_retirada"] >= inicio)
+                           and (fim is None or r["data_retirada"] < fim))
+        obtido = system.top_customers(5, inicio, fim)
+        assert [n for (_, n) in obtido] == [n for (_, n) in contagem.most_common(5)]
+        assert all(contagem[cpf] == n for (cpf, n) in obtido)
+    totais = Counter()
+    for r in alugueis:
+        totais[r["cpf"]] += r["valor_total"]
+    assert system.top_customers_by_value(3) == totais.most_common(3)
+    _comparar(system.get_customer("3"), _perfil_direto(alugueis, "3"))
+    assert system.get_customer("nenhum") is None
+    system.close()
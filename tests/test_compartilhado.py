@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from armazenamento import FileLock, open_storage
+from sistema_de_alugueis import CarRentalSystem
+
+# Várias instâncias no modo compartilhado usando o mesmo arquivo (ver JsonStorage.sync)
+
+VEICULOS = 40
+
+def _abrir(path, **opcoes):
+    system = CarRentalSystem(str(path), shared=True, **opcoes)
+    system.login("admin", "admin")
+    return system
+
+def _alugueis(system):
+    return {r["rental_id"]: (r["vehicle_id"], r["data_devolucao_efetiva"]) for r in system.rentals}
+
+# Uma exceção na thread de compactação também é falha
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+@pytest.mark.parametrize("extensao", [".json", ".bin"])
+def test_duas_instancias_no_mesmo_processo_compactando(tmp_path, extensao):
+    # Com compactações frequentes, as duas instâncias compactam ao mesmo tempo em
+    # threads do mesmo processo: nenhuma pode perder registros nem reusar rental_id
+    for rodada in range(8):
+        path = tmp_path / f"dados{rodada}{extensao}"
+        a = _abrir(path, compact_threshold=5)
+        for i in range(VEICULOS):
+            a.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+        b = _abrir(path, compact_threshold=5)
+        erros = []
+
+        def alugar(system, deslocamento):
+            try:
+                for i in range(150):
+                    system.rent_vehicle((i * 7 + deslocamento) % VEICULOS + 1, "Cliente", "1", "", 1, 10.0)
+                    abertos = system.list_open_rentals()
+                    if i % 3 == 0 and abertos:
+                        system.return_vehicle(abertos[0]["rental_id"])
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=alugar, args=(a, 0)),
+                   threading.Thread(target=alugar, args=(b, 3))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert erros == []
+        a.sync()
+        b.sync()
+        assert _alugueis(a) == _alugueis(b)
+        a.close()
+        b.close()
+
+        c = CarRentalSystem(str(path))
+        assert _alugueis(c) == _alugueis(a)
+        assert c.count_open_rentals() == sum(not v["disponivel"] for v in c.vehicles)
+        c.close()
+
+def _veiculo(vid):
+    return {"id": vid, "nome": "Gol", "marca": "VW", "ano": "2020", "placa": f"PLC{vid:04d}",
+            "disponivel": True}
+
+# O SqliteStorage devolve usuários, veículos e reservas completos (ver SqliteStorage.sync)
+@pytest.mark.parametrize("extensao", [".json", ".bin"])
+def test_sync_devolve_so_os_registros_das_outras_instancias(tmp_path, extensao):
+    path = str(tmp_path / f"dados{extensao}")
+    a = open_storage(path)
+    a.load()
+    a.save([], [_veiculo(1)], [])
+    b = open_storage(path)
+    b.load()
+    assert b.sync() == []
+    a.append(("v", _veiculo(2)))
+    a.append(("v", _veiculo(3)))
+    assert [d["id"] for (t, d) in b.sync()] == [2, 3]
+    assert b.sync() == []
+    b.append(("v", _veiculo(4)))
+    assert [d["id"] for (t, d) in a.sync()] == [4]
+    # Snapshot regravado por save(): a outra instância precisa recarregar tudo
+    a.save([], [_veiculo(1)], [])
+    assert b.sync() is None
+    a.close()
+    b.close()
+
+def test_trava_exclusiva_entre_instancias_do_mesmo_processo(tmp_path):
+    path = str(tmp_path / "dados.json.lock")
+    (a, b) = (FileLock(path), FileLock(path))
+    eventos = []
+    segurando = threading.Event()
+
+    def segurar():
+        with a:
+            # Reentrante na mesma instância
+            with a:
+                segurando.set()
+                time.sleep(0.2)
+                eventos.append("a solta")
+
+    t = threading.Thread(target=segurar)
+    t.start()
+    segurando.wait(3)
+    with b:
+        eventos.append("b pega")
+    t.join()
+    assert eventos == ["a solta", "b pega"]
+
+def test_instancia_ve_aluguel_da_outra(tmp_path):
+    path = tmp_path / "dados.json"
+    a = _abrir(path)
+    a.register_vehicle("Gol", "VW", 2020, "ABC1234")
+    b = _abrir(path)
+    a.rent_vehicle(1, "Ana", "111", "", 2, 100.0)
+    rental_id = a.last_rental_id
+    # A mutação sincroniza antes de conferir a disponibilidade
+    assert b.rent_vehicle(1, "Bia", "222", "", 2, 100.0) == "Veículo indisponível para aluguel."
+    assert b.last_rental_id is None
+    assert b.get_rental(rental_id)["cpf"] == "111"
+    assert a.return_vehicle(rental_id).startswith("Devolução realizada")
+    b.rent_vehicle(1, "Bia", "222", "", 2, 100.0)
+    assert b.last_rental_id == rental_id + 1
+    a.sync()
+    assert _alugueis(a) == _alugueis(b)
+    a.close()
+    b.close()
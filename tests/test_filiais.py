@@ -0,0 +1,80 @@
+import datetime
+from collections import Counter
+
+import pytest
+
+from filiais import BranchNetwork, separar_chave
+
+@pytest.fixture
+def rede(tmp_path):
+    rede = BranchNetwork(str(tmp_path / "rede.json"))
+    for (nome, extensao) in (("centro", ".json"), ("aeroporto", ".bin")):
+        system = rede.add_branch(nome, nome + extensao)
+        system.login("admin", "admin")
+        for i in range(4):
+            system.register_vehicle(f"Carro {i}", "Marca", 2020, f"{nome[:3].upper()}{i:04d}")
+    rede.login("admin", "admin")
+    yield rede
+    rede.close()
+
+def test_chaves_da_rede(rede):
+    (msg, chave) = rede.rent_vehicle("centro:2", "Ana", "111", "", 2, 50.0)
+    assert msg.startswith("Aluguel realizado")
+    assert separar_chave(chave) == ("centro", 1)
+    assert rede.get_rental(chave)["vehicle_id"] == 2
+    assert rede.get_vehicle("centro:2")["disponivel"] is False
+    assert rede.get_vehicle("aeroporto:2")["disponivel"] is True
+    assert [c for (c, _) in rede.list_open_rentals()] == [chave]
+    assert rede.rent_vehicle("norte:1", "Ana", "111", "", 1, 1.0) == ("Filial ou veículo não encontrado!", None)
+    assert rede.rent_vehicle("centro:2", "Bia", "222", "", 1, 1.0)[1] is None
+    assert rede.return_vehicle(chave).startswith("Devolução realizada")
+    assert rede.get_vehicle("centro:2")["disponivel"] is True
+
+def test_relatorio_consolidado_soma_as_filiais(rede):
+    for (chave, cpf, valor) in (("centro:1", "111", 10.0), ("centro:2", "222", 20.0),
+                                ("aeroporto:1", "111", 30.0), ("aeroporto:3", "333", 5.0)):
+        assert rede.rent_vehicle(chave, "Cliente", cpf, "", 1, valor)[1] is not None
+    rede.processos = 1
+    serial = rede.consolidated_report()
+    rede.processos = 2
+    paralelo = rede.consolidated_report()
+    assert paralelo == serial
+    assert serial["de"] == datetime.date.today().replace(day=1)
+    assert serial["ate"] == datetime.date.today()
+    assert serial["alugueis"] == 4
+    assert serial["faturamento"] == 65.0
+    assert serial["faturamento_por_filial"] == {"centro": 30.0, "aeroporto": 35.0}
+    assert serial["faturamento_por_dia"] == [(datetime.date.today(), 65.0)]
+    assert serial["top_clientes"][0] == ("111", 2)
+    assert Counter(dict(serial["top_clientes"])) == Counter({"111": 2, "222": 1, "333": 1})
+    assert {(c, nome) for (c, nome, _) in serial["top_veiculos"]} == {
+        ("centro:1", "Carro 0"), ("centro:2", "Carro 1"), ("aeroporto:1", "Carro 0"), ("aeroporto:3", "Carro 2")}
+    # Um aluguel novo aparece no relatório seguinte (os agregados são regravados)
+    rede.rent_vehicle("aeroporto:4", "Cliente", "333", "", 1, 1.0)
+    assert rede.consolidated_report()["faturamento"] == 66.0
+    assert rede.consolidated_report("2000-01", "2000-12")["alugueis"] == 0
+    with pytest.raises(ValueError):
+        rede.consolidated_report("2024-13")
+    with pytest.raises(ValueError):
+        rede.consolidated_report("2024-02-30")
+
+def test_relatorio_por_intervalo_de_dias(rede):
+    retiradas = (("centro", datetime.datetime(2024, 1, 31, 23, 0), 1.0),
+                 ("centro", datetime.datetime(2024, 2, 1, 0, 0), 2.0),
+                 ("aeroporto", datetime.datetime(2024, 2, 29, 23, 59), 4.0),
+                 ("aeroporto", datetime.datetime(2024, 3, 1, 0, 0), 8.0))
+    for (i, (filial, retirada, valor)) in enumerate(retiradas):
+        linha = {"vehicle_id": i + 1, "nome_cliente": "Cliente", "cpf": str(i), "whatsapp": "",
+                 "dias": 1, "valor_por_dia": valor, "data_retirada": retirada.isoformat(),
+                 "data_devolucao_efetiva": (retirada + datetime.timedelta(days=1)).isoformat()}
+        assert rede.branch(filial).import_rentals([linha]) == "1 aluguéis importados."
+    rede.processos = 1
+    for (de, ate, total) in (("2024-02-01", "2024-02-29", 6.0), ("2024-02", "2024-02", 6.0),
+                             ("2024-01-31", "2024-03-01", 15.0), ("2024-01-31", "2024-01-31", 1.0),
+                             ("2024-02-02", "2024-02-28", 0.0), (datetime.date(2024, 3, 1), "2024-03", 8.0)):
+        relatorio = rede.consolidated_report(de, ate)
+        assert relatorio["faturamento"] == total
+        assert relatorio["alugueis"] == len(relatorio["top_clientes"])
+    relatorio = rede.consolidated_report("2024-02", "2024-02")
+    assert (relatorio["de"], relatorio["ate"]) == (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+    assert relatorio["faturamento_por_filial"] == {"centro": 2.0, "aeroporto": 4.0}
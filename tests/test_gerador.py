@@ -0,0 +1,27 @@
+import datetime
+
+import pytest
+
+from gerador import gerar_dados
+
+def test_aluguel_de_um_veiculo_nao_se_sobrepoe():
+    fim = datetime.datetime(2025, 1, 1)
+    (_, vehicles, rentals) = gerar_dados(veiculos=20, alugueis=1500, fim=fim,
+                                         inicio=fim - datetime.timedelta(days=730), semente=7)
+    assert len(rentals) == 1500
+    assert [r["rental_id"] for r in rentals] == list(range(1, 1501))
+    assert all(a["data_retirada"] <= b["data_retirada"] for (a, b) in zip(rentals, rentals[1:]))
+    por_veiculo = {}
+    for r in rentals:
+        por_veiculo.setdefault(r["vehicle_id"], []).append(r)
+    for v in vehicles:
+        alugueis = por_veiculo.get(v["id"], [])
+        for (a, b) in zip(alugueis, alugueis[1:]):
+            assert a["data_devolucao_efetiva"] is not None
+            assert a["data_devolucao_efetiva"] <= b["data_retirada"]
+        aberto = bool(alugueis) and alugueis[-1]["data_devolucao_efetiva"] is None
+        assert v["disponivel"] == (not aberto)
+
+def test_frota_pequena_demais():
+    with pytest.raises(ValueError):
+        gerar_dados(veiculos=2, alugueis=1000, semente=7)
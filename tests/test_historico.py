@@ -0,0 +1,151 @@
+import datetime
+import json
+import os
+import random
+
+from armazenamento import Rental, convert_storage
+from clientes import IndiceClientes
+from historico import HistoricoMensal, historico_dir
+from sistema_de_alugueis import CarRentalSystem
+
+def _aluguel(rental_id, cpf, retirada, dias=2, valor=100.0):
+    devolucao = retirada + datetime.timedelta(days=dias)
+    return Rental(rental_id, 1, "Cliente", "admin", cpf, "", dias, valor, valor * dias,
+                  retirada, devolucao, devolucao)
+
+def test_formatos_no_mesmo_diretorio_tem_historicos_separados(tmp_path):
+    json_path = str(tmp_path / "dados.json")
+    bin_path = str(tmp_path / "dados.bin")
+    assert historico_dir(json_path) != historico_dir(bin_path)
+    HistoricoMensal(historico_dir(json_path)).arquivar([_aluguel(1, "111", datetime.datetime(2024, 1, 5))])
+    HistoricoMensal(historico_dir(bin_path)).arquivar([_aluguel(1, "222", datetime.datetime(2024, 1, 5))])
+    assert [r["cpf"] for r in HistoricoMensal(historico_dir(json_path)).alugueis_entre()] == ["111"]
+    assert [r["cpf"] for r in HistoricoMensal(historico_dir(bin_path)).alugueis_entre()] == ["222"]
+
+def _historico_aleatorio(rng, n, inicio):
+    alugueis = []
+    for rental_id in range(1, n + 1):
+        retirada = inicio + datetime.timedelta(seconds=rng.randrange(180 * 86400))
+        alugueis.append(_aluguel(rental_id, str(rng.randrange(30)), retirada, dias=rng.randint(1, 20),
+                                 valor=float(rng.choice((90, 150)))))
+    return alugueis
+
+def test_consultas_iguais_a_varredura(tmp_path):
+    rng = random.Random(5)
+    inicio = datetime.datetime(2024, 1, 1)
+    alugueis = _historico_aleatorio(rng, 800, inicio)
+    historico = HistoricoMensal(str(tmp_path / "historico"), cache=2)
+    # Em dois lotes: o segundo acrescenta às partições já gravadas
+    assert historico.arquivar(alugueis[:500]) == ["2024-01", "2024-02", "2024-03", "2024-04",
+                                                   "2024-05", "2024-06"]
+    historico.arquivar(alugueis[500:])
+    assert len(historico) == 800
+    assert historico.max_rental_id == 800
+    assert sorted(os.listdir(historico.diretorio)) == sorted(
+        [f"{mes}.bin" for mes in historico.meses()] + ["indice.json", "clientes.json"])
+
+    reaberto = HistoricoMensal(historico.diretorio, cache=2)
+    for h in (historico, reaberto):
+        for _ in range(40):
+            a = inicio + datetime.timedelta(days=rng.randrange(-10, 200))
+            b = a + datetime.timedelta(days=rng.randint(1, 60))
+            entre = h.alugueis_entre(a, b)
+            assert sorted(r["rental_id"] for r in entre) == sorted(
+                r["rental_id"] for r in alugueis if a <= r["data_retirada"] < b)
+            assert all(x["data_retirada"] <= y["data_retirada"] for (x, y) in zip(entre, entre[1:]))
+            assert sorted(r["rental_id"] for r in h.alugueis_sobrepostos(a, b)) == sorted(
+                r["rental_id"] for r in alugueis
+                if r["data_retirada"] < b and r["data_devolucao_efetiva"] > a)
+        assert len(h.alugueis_entre()) == 800
+        assert h.buscar(321) == alugueis[320]
+        assert h.buscar(801) is None
+        assert len(h._particoes) <= 2
+
+def test_arquivar_de_novo_substitui(tmp_path):
+    historico = HistoricoMensal(str(tmp_path / "historico"))
+    r = _aluguel(1, "111", datetime.datetime(2024, 3, 1))
+    historico.arquivar([r])
+    historico.arquivar([r])
+    assert len(historico) == 1
+    assert historico.clientes().perfil("111")["alugueis"] == [1]
+
+def test_resumo_de_clientes_recalculado_se_nao_bater(tmp_path):
+    rng = random.Random(6)
+    alugueis = _historico_aleatorio(rng, 200, datetime.datetime(2024, 1, 1))
+    historico = HistoricoMensal(str(tmp_path / "historico"))
+    historico.arquivar(alugueis)
+    esperado = IndiceClientes()
+    esperado.reconstruir(sorted(alugueis, key=lambda r: r["rental_id"]))
+    with open(historico.clientes_path, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    dados["marca"] = []
+    for p in dados["clientes"]:
+        p["total_gasto"] = -1
+    with open(historico.clientes_path, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    clientes = HistoricoMensal(historico.diretorio).clientes()
+    assert len(clientes) == len(esperado)
+    for p in esperado.perfis():
+        assert clientes.perfil(p["cpf"]) == p
+
+def _sistema_com_historico(path):
+    # 60 aluguéis encerrados do Gol (vehicle_id 1), ao longo dos últimos 300 dias
+    system = CarRentalSystem(path)
+    system.login("admin", "admin")
+    system.register_vehicle("Gol", "VW", 2020, "ABC1234")
+    rng = random.Random(7)
+    retirada = datetime.datetime.now() - datetime.timedelta(days=300)
+    linhas = []
+    for _ in range(60):
+        dias = rng.randint(1, 5)
+        devolucao = retirada + datetime.timedelta(days=dias)
+        linhas.append({"vehicle_id": 1, "nome_cliente": "Cliente", "cpf": str(rng.randrange(5)),
+                       "whatsapp": "", "dias": dias, "valor_por_dia": 100,
+                       "data_retirada": retirada.isoformat(),
+                       "data_devolucao_efetiva": devolucao.isoformat()})
+        retirada = devolucao + datetime.timedelta(days=1)
+    assert system.import_rentals(linhas) == "60 aluguéis importados."
+    return system
+
+def test_sistema_consulta_o_historico(tmp_path):
+    path = str(tmp_path / "dados.json")
+    system = _sistema_com_historico(path)
+    antes = [r["rental_id"] for r in system.rentals_between()]
+    perfis = {cpf: system.get_customer(cpf) for cpf in map(str, range(5))}
+    msg = system.archive_rentals(older_than_days=150)
+    arquivados = len(system.archive)
+    assert msg.startswith(f"{arquivados} aluguéis arquivados")
+    assert 0 < arquivados < 60
+    assert len(system.rentals) == 60 - arquivados
+    system.close()
+
+    system = CarRentalSystem(path)
+    assert [r["rental_id"] for r in system.rentals_between()] == antes
+    assert system.get_rental(1)["rental_id"] == 1
+    assert {cpf: system.get_customer(cpf) for cpf in perfis} == perfis
+    # Os próximos rental_id continuam depois dos arquivados
+    system.login("admin", "admin")
+    system.rent_vehicle(1, "Ana", "9", "", 1, 10.0)
+    assert system.last_rental_id == 61
+    system.close()
+
+def test_conversao_leva_o_historico_e_os_agregados(tmp_path):
+    caminho = [str(tmp_path / nome) for nome in ("a.json", "b.bin", "c.db", "d.json")]
+    system = _sistema_com_historico(caminho[0])
+    system.archive_rentals(older_than_days=150)
+    arquivados = len(system.archive)
+    alugueis = [r["rental_id"] for r in system.rentals_between()]
+    faturamento = dict(system._faturamento_por_dia)
+    system.close()
+    for (src, dst) in zip(caminho, caminho[1:]):
+        assert convert_storage(src, dst) == (1, 1, 60 - arquivados, 0)
+    system = CarRentalSystem(caminho[-1])
+    assert len(system.archive) == arquivados
+    assert [r["rental_id"] for r in system.rentals_between()] == alugueis
+    assert system.get_rental(1)["rental_id"] == 1
+    assert system.storage.load_aggregates() is not None
+    assert system._faturamento_por_dia == faturamento
+    system.login("admin", "admin")
+    system.rent_vehicle(1, "Ana", "9", "", 1, 10.0)
+    assert system.last_rental_id == 61
+    system.close()
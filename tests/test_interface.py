@@ -0,0 +1,50 @@
+import queue
+
+import pytest
+
+pytest.importorskip("tkinter")
+pytest.importorskip("matplotlib")
+
+from interface import atualizar_grafico, calcular_visao_geral, montar_grafico
+from sistema_de_alugueis import CarRentalSystem
+
+def _paineis(fila):
+    resultados = {}
+    while not fila.empty():
+        (geracao, painel, valor) = fila.get_nowait()
+        resultados[painel] = (geracao, valor)
+    return resultados
+
+def test_visao_geral_calculada_a_partir_do_snapshot(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.login("admin", "admin")
+    for i in range(3):
+        system.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+    for (vid, cpf) in ((1, "111"), (2, "111"), (3, "222")):
+        system.rent_vehicle(vid, "Cliente", cpf, "", 2, 50.0)
+    snapshot = system.dashboard_snapshot()
+    # Mutações depois do snapshot não aparecem no cálculo
+    system.return_vehicle(1)
+    system.rent_vehicle(1, "Cliente", "333", "", 1, 999.0)
+    fila = queue.Queue()
+    calcular_visao_geral(snapshot, fila, 7, criar_figura=False)
+    paineis = _paineis(fila)
+    assert "erro" not in paineis
+    assert {geracao for (geracao, _) in paineis.values()} == {7}
+    assert paineis["top_clients"][1].splitlines() == ["CPF: 111 - 2 aluguéis", "CPF: 222 - 1 aluguéis"]
+    assert "Carro 0 - 1 aluguéis" in paineis["top_veic"][1]
+    (labels, values, figura) = paineis["grafico"][1]
+    assert figura is None and len(labels) == 7 and sum(values) == 300.0
+    system.close()
+
+def test_grafico_atualizado_no_lugar():
+    labels = [f"{dia:02d}/01" for dia in range(1, 8)]
+    fig = montar_grafico(labels, [0.0] * 7)
+    linha = fig.axes[0].lines[0]
+    assert fig.axes[0].get_ylim() == (0, 1)
+    novos = [f"{dia:02d}/01" for dia in range(2, 9)]
+    atualizar_grafico(fig, novos, [10.0, 0, 0, 0, 0, 0, 50.0])
+    assert fig.axes[0].lines[0] is linha and len(fig.axes[0].lines) == 1
+    assert list(linha.get_ydata()) == [10.0, 0, 0, 0, 0, 0, 50.0]
+    assert fig.axes[0].get_ylim() == pytest.approx((0, 55.0))
+    assert [t.get_text() for t in fig.axes[0].get_xticklabels()] == novos
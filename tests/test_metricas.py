@@ -0,0 +1,44 @@
+import json
+
+from metricas import LIMITES_MS, Metricas
+from sistema_de_alugueis import CarRentalSystem
+
+def test_registro_por_faixa_do_histograma():
+    metricas = Metricas()
+    for ms in (0.005, 0.5, 0.5, 5000):
+        metricas.registrar("op", ms, nbytes=10)
+    op = metricas.snapshot()["operacoes"]["op"]
+    assert op["chamadas"] == 4 and op["bytes_gravados"] == 40
+    assert op["max_ms"] == 5000
+    faixas = list(op["histograma"].values())
+    assert len(faixas) == len(LIMITES_MS) + 1
+    assert (faixas[0], faixas[2], faixas[-1]) == (1, 2, 1)
+
+def test_metodos_medidos_so_com_as_metricas_ligadas(tmp_path):
+    path = str(tmp_path / "metricas.jsonl")
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    assert system.get_metrics() is None
+    assert "register_vehicle" not in vars(system)
+    system.enable_metrics(path)
+    system.login("admin", "admin")
+    for i in range(3):
+        system.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+    system.list_vehicles()
+    operacoes = system.get_metrics()["operacoes"]
+    assert operacoes["register_vehicle"]["chamadas"] == 3
+    assert operacoes["register_vehicle"]["bytes_gravados"] > 0
+    assert operacoes["list_vehicles"]["bytes_gravados"] == 0
+    system.close()
+    # close() grava o último snapshot no arquivo de métricas
+    with open(path, encoding="utf-8") as f:
+        linhas = [json.loads(linha) for linha in f]
+    assert linhas[-1]["operacoes"]["register_vehicle"]["chamadas"] == 3
+
+def test_desligar_restaura_os_metodos(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.enable_metrics()
+    assert "login" in vars(system)
+    system.disable_metrics()
+    assert "login" not in vars(system) and system.get_metrics() is None
+    assert system.login("admin", "admin")
+    system.close()
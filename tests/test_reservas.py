@@ -0,0 +1,114 @@
+import datetime
+import random
+
+from reservas import AgendaVeiculos
+from sistema_de_alugueis import CarRentalSystem
+
+# ------------------ AgendaVeiculos ------------------
+BASE = datetime.datetime(2024, 6, 1)
+
+def _h(horas):
+    return BASE + datetime.timedelta(hours=horas)
+
+def test_conflito_igual_a_comparar_com_todos_os_intervalos():
+    rng = random.Random(4)
+    agenda = AgendaVeiculos()
+    reservas = {}        # vehicle_id -> [(inicio, fim, reserva_id)]
+    for reserva_id in range(1, 300):
+        vid = rng.randint(1, 5)
+        inicio = _h(rng.randrange(2000))
+        fim = inicio + datetime.timedelta(hours=rng.randint(1, 48))
+        # Como em reserve_vehicle: só entra se não colidir
+        if agenda.conflito(vid, inicio, fim, BASE) is None:
+            agenda.adicionar_reserva(vid, inicio, fim, reserva_id)
+            reservas.setdefault(vid, []).append((inicio, fim, reserva_id))
+    for (vid, lista) in reservas.items():
+        assert agenda.reservas(vid) == sorted(lista)
+        assert all(a[1] <= b[0] for (a, b) in zip(sorted(lista), sorted(lista)[1:]))
+    for _ in range(2000):
+        vid = rng.randint(1, 6)
+        inicio = _h(rng.randrange(-50, 2100))
+        fim = inicio + datetime.timedelta(hours=rng.randint(1, 72))
+        colisoes = [b[2] for b in reservas.get(vid, []) if b[0] < fim and inicio < b[1]]
+        ocupado = agenda.conflito(vid, inicio, fim, BASE)
+        if colisoes:
+            assert ocupado[0] == "reserva" and ocupado[1] in colisoes
+        else:
+            assert ocupado is None
+        if len(colisoes) == 1:
+            assert agenda.conflito(vid, inicio, fim, BASE, ignorar_reserva=colisoes[0]) is None
+
+def test_intervalos_semiabertos():
+    agenda = AgendaVeiculos()
+    agenda.adicionar_reserva(1, _h(10), _h(20), 1)
+    assert agenda.conflito(1, _h(20), _h(30), BASE) is None
+    assert agenda.conflito(1, _h(0), _h(10), BASE) is None
+    assert agenda.conflito(1, _h(19), _h(21), BASE) == ("reserva", 1)
+    assert agenda.conflito(1, _h(12), _h(13), BASE) == ("reserva", 1)
+    agenda.remover_reserva(1, _h(10), _h(20), 1)
+    assert agenda.conflito(1, _h(12), _h(13), BASE) is None
+
+def test_aluguel_atrasado_ocupa_ate_agora():
+    agenda = AgendaVeiculos()
+    agenda.iniciar_uso(1, _h(0), _h(24), 7)
+    assert agenda.conflito(1, _h(30), _h(40), agora=_h(10)) is None
+    assert agenda.conflito(1, _h(30), _h(40), agora=_h(35)) == ("aluguel", 7)
+    # Só o aluguel em aberto atual sai da agenda
+    agenda.encerrar_uso(1, 6)
+    assert agenda.conflito(1, _h(1), _h(2), _h(1)) == ("aluguel", 7)
+    agenda.encerrar_uso(1, 7)
+    assert agenda.conflito(1, _h(1), _h(2), _h(1)) is None
+
+def test_reserva_recusada_quando_colide(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.login("admin", "admin")
+    system.register_vehicle("Gol", "VW", 2020, "ABC1234")
+    system.register_vehicle("Uno", "Fiat", 2021, "DEF5678")
+    inicio = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=3)
+    fim = inicio + datetime.timedelta(days=2)
+    system.reserve_vehicle(1, "Bia", "222", "", inicio, fim, 100.0)
+    msg = system.reserve_vehicle(1, "Caio", "333", "", fim - datetime.timedelta(hours=1),
+                                 fim + datetime.timedelta(days=1), 100.0)
+    assert msg.startswith("Veículo já reservado")
+    assert not system.is_vehicle_free(1, inicio, fim)
+    assert system.is_vehicle_free(1, fim, fim + datetime.timedelta(days=1))
+    assert system.free_vehicles(inicio, fim) == [system.get_vehicle(2)]
+    # O aluguel de hoje colide com a reserva só se passar do início dela
+    msg = system.rent_vehicle(1, "Dani", "444", "", 5, 100.0)
+    assert msg.startswith("Veículo já reservado") and system.last_rental_id is None
+    assert system.rent_vehicle(1, "Dani", "444", "", 2, 100.0).startswith("Aluguel realizado")
+    assert system.last_rental_id == 1
+    system.close()
+
+# ------------------ Importação ------------------
+
+def _sistema(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.login("admin", "admin")
+    system.register_vehicle("Gol", "VW", 2020, "ABC1234")
+    return system
+
+def _aberto(retirada, dias):
+    return {"vehicle_id": "1", "nome_cliente": "Ana", "cpf": "111", "whatsapp": "",
+            "dias": str(dias), "valor_por_dia": "100", "data_retirada": retirada}
+
+def test_importar_aluguel_aberto_que_colide_com_reserva_e_recusado(tmp_path):
+    system = _sistema(tmp_path)
+    amanha = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=1)
+    system.reserve_vehicle(1, "Bia", "222", "", amanha, amanha + datetime.timedelta(days=2), 100.0)
+    hoje = (amanha - datetime.timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    msg = system.import_rentals([_aberto(hoje, 3)])
+    assert msg.startswith("0 aluguéis importados.")
+    assert "Registro 1: Veículo já reservado" in msg
+    assert system._vehicles_by_id[1]["disponivel"]
+    assert system.rentals == []
+    system.close()
+
+def test_importar_aluguel_aberto_antes_da_reserva(tmp_path):
+    system = _sistema(tmp_path)
+    inicio = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(days=5)
+    system.reserve_vehicle(1, "Bia", "222", "", inicio, inicio + datetime.timedelta(days=2), 100.0)
+    hoje = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    assert system.import_rentals([_aberto(hoje, 2)]) == "1 aluguéis importados."
+    assert not system._vehicles_by_id[1]["disponivel"]
+    system.close()
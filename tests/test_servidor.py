@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+import time
+
+from armazenamento import FileLock
+from servidor import RentalHTTPServer, _request
+from sistema_de_alugueis import CarRentalSystem
+
+def _rodar(system, cenario):
+    async def principal():
+        servidor = RentalHTTPServer(system)
+        (host, port) = await servidor.start(port=0)
+        try:
+            return await cenario(host, port)
+        finally:
+            await servidor.stop()
+    return asyncio.run(principal())
+
+async def _bruto(host, port, dados):
+    # Envia bytes sem formatação e devolve (status, corpo)
+    (reader, writer) = await asyncio.open_connection(host, port)
+    writer.write(dados)
+    await writer.drain()
+    resposta = await reader.read()
+    writer.close()
+    (cabecalho, _, corpo) = resposta.partition(b"\r\n\r\n")
+    return (int(cabecalho.split()[1]), json.loads(corpo))
+
+def test_content_length_invalido_responde_400(tmp_path):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+
+    async def cenario(host, port):
+        return await _bruto(host, port, b"POST /login HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+
+    (status, corpo) = _rodar(system, cenario)
+    system.close()
+    assert status == 400
+    assert "erro" in corpo
+
+def test_erro_inesperado_responde_500_e_mantem_a_conexao(tmp_path, monkeypatch):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+
+    def falha():
+        raise RuntimeError("falha")
+
+    monkeypatch.setattr(system, "list_vehicles", falha)
+
+    async def cenario(host, port):
+        (reader, writer) = await asyncio.open_connection(host, port)
+        (_, login) = await _request(reader, writer, "POST", "/login",
+                                    {"username": "admin", "password": "admin"})
+        erro = await _request(reader, writer, "GET", "/veiculos", token=login["token"])
+        depois = await _request(reader, writer, "GET", "/alugueis/abertos", token=login["token"])
+        writer.close()
+        return (erro, depois)
+
+    ((status, corpo), (status_depois, abertos)) = _rodar(system, cenario)
+    system.close()
+    assert status == 500 and "erro" in corpo
+    assert (status_depois, abertos) == (200, [])
+
+def test_leituras_continuam_enquanto_mutacao_espera_a_trava(tmp_path):
+    path = tmp_path / "dados.json"
+    system = CarRentalSystem(str(path), shared=True)
+    system.login("admin", "admin")
+    system.register_vehicle("Gol", "VW", 2020, "ABC1234")
+    system.logout()
+    # Outra "instância" segura a trava do arquivo
+    outra = FileLock(str(path) + ".lock")
+    liberar = threading.Event()
+    travada = threading.Event()
+
+    def segurar():
+        with outra:
+            travada.set()
+            # Com prazo: se o loop travasse junto, o teste falha em vez de parar
+            liberar.wait(3)
+
+    dono = threading.Thread(target=segurar)
+    dono.start()
+    travada.wait()
+
+    async def cenario(host, port):
+        (r1, w1) = await asyncio.open_connection(host, port)
+        (r2, w2) = await asyncio.open_connection(host, port)
+        (_, login) = await _request(r1, w1, "POST", "/login", {"username": "admin", "password": "admin"})
+        token = login["token"]
+        aluguel = asyncio.create_task(_request(r1, w1, "POST", "/alugueis", {
+            "vehicle_id": 1, "nome_cliente": "Ana", "cpf": "1", "whatsapp": "",
+            "dias": 1, "valor_por_dia": 10.0}, token=token))
+        await asyncio.sleep(0.2)
+        assert not aluguel.done()
+        # A leitura responde mesmo com a mutação parada na trava
+        (status, veiculos) = await asyncio.wait_for(_request(r2, w2, "GET", "/veiculos", token=token), 2)
+        assert status == 200 and veiculos[0]["disponivel"] is True
+        liberar.set()
+        (status, resposta) = await asyncio.wait_for(aluguel, 5)
+        (_, veiculos) = await _request(r2, w2, "GET", "/veiculos", token=token)
+        w1.close()
+        w2.close()
+        return (status, resposta, veiculos)
+
+    try:
+        (status, resposta, veiculos) = _rodar(system, cenario)
+    finally:
+        liberar.set()
+        dono.join()
+    system.close()
+    assert status == 200 and resposta["mensagem"].startswith("Aluguel realizado")
+    assert veiculos[0]["disponivel"] is False
+
+def test_mutacao_demorada_nao_para_o_loop(tmp_path, monkeypatch):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    original = system.register_vehicle
+
+    def devagar(*args):
+        # Simula uma gravação lenta feita com o estado travado
+        time.sleep(1.0)
+        return original(*args)
+
+    monkeypatch.setattr(system, "register_vehicle", devagar)
+
+    async def cenario(host, port):
+        conexoes = [await asyncio.open_connection(host, port) for _ in range(3)]
+        ((r1, w1), (r2, w2), (r3, w3)) = conexoes
+        (_, login) = await _request(r1, w1, "POST", "/login", {"username": "admin", "password": "admin"})
+        token = login["token"]
+        cadastro = asyncio.create_task(_request(r1, w1, "POST", "/veiculos", {
+            "nome": "Gol", "marca": "VW", "ano": "2020", "placa": "ABC1234"}, token=token))
+        await asyncio.sleep(0.1)
+        # A leitura espera a mutação terminar, mas fora do loop
+        leitura = asyncio.create_task(_request(r2, w2, "GET", "/veiculos", token=token))
+        await asyncio.sleep(0.1)
+        inicio = time.perf_counter()
+        (status, _) = await asyncio.wait_for(
+            _request(r3, w3, "POST", "/login", {"username": "admin", "password": "admin"}), 2)
+        espera = time.perf_counter() - inicio
+        assert not cadastro.done()
+        (_, veiculos) = await asyncio.wait_for(leitura, 5)
+        await cadastro
+        for (_, w) in conexoes:
+            w.close()
+        return (status, espera, veiculos)
+
+    (status, espera, veiculos) = _rodar(system, cenario)
+    system.close()
+    assert status == 200 and espera < 0.5
+    assert [v["placa"] for v in veiculos] == ["ABC1234"]
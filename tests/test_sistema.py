@@ -0,0 +1,163 @@
+import datetime
+import os
+import random
+import subprocess
+import sys
+
+from armazenamento import rental_to_json
+import sistema_de_alugueis
+from sistema_de_alugueis import CarRentalSystem, main
+from transferencia import export_file, import_file
+
+def _sistema(tmp_path, veiculos=3):
+    system = CarRentalSystem(str(tmp_path / "dados.json"))
+    system.login("admin", "admin")
+    for i in range(veiculos):
+        system.register_vehicle(f"Carro {i}", "Marca", 2020, f"PLC{i:04d}")
+    return system
+
+def _linha(vehicle_id, cpf, retirada, dias=1, devolvido=True):
+    devolucao = retirada + datetime.timedelta(days=dias)
+    return {"vehicle_id": vehicle_id, "nome_cliente": "Cliente", "cpf": cpf, "whatsapp": "",
+            "dias": dias, "valor_por_dia": 10.0, "data_retirada": retirada.isoformat(),
+            "data_devolucao_efetiva": devolucao.isoformat() if devolvido else ""}
+
+# ------------------ Índices por id, placa e usuário ------------------
+def test_indices_seguem_as_mutacoes(tmp_path):
+    system = _sistema(tmp_path)
+    assert system.register_vehicle("Outro", "Marca", 2021, "plc0001") == "Já existe um veículo com essa placa!"
+    assert system.modify_vehicle(1, "Carro 0", "Marca", 2020, "Plc0002") == \
+        "Já existe outro veículo com essa placa!"
+    assert system.modify_vehicle(1, "Carro 0", "Marca", 2020, "NOV0001") == "Veículo modificado com sucesso!"
+    # A placa antiga ficou livre; a nova já está ocupada
+    assert system.register_vehicle("Outro", "Marca", 2021, "PLC0000").endswith("cadastrado com sucesso!")
+    assert system.register_vehicle("Outro", "Marca", 2021, "nov0001") == "Já existe um veículo com essa placa!"
+    assert system.create_user("bia", "123", "padrao") == "Usuário 'bia' criado com sucesso!"
+    assert system.create_user("bia", "456", "padrao") == "Usuário já existe!"
+    assert system.get_user("bia")["role"] == "padrao"
+    system.rent_vehicle(2, "Ana", "111", "", 1, 10.0)
+    rental_id = system.last_rental_id
+    assert system.get_rental(rental_id)["vehicle_id"] == 2
+    assert system.get_vehicle(2)["disponivel"] is False
+    assert system.return_vehicle(rental_id).startswith("Devolução realizada")
+    assert system.get_vehicle(2)["disponivel"] is True
+    system.close()
+
+    reaberto = CarRentalSystem(str(tmp_path / "dados.json"))
+    assert reaberto.login("bia", "123")
+    assert reaberto.get_vehicle(1)["placa"] == "NOV0001"
+    assert sorted(reaberto._vehicles_by_placa) == ["nov0001", "plc0000", "plc0001", "plc0002"]
+    reaberto.close()
+
+# ------------------ Aluguéis em aberto e atrasados ------------------
+def test_aluguel_atrasado_sai_da_fila_ao_ser_devolvido(tmp_path):
+    system = _sistema(tmp_path)
+    ids = []
+    for (vid, dias) in ((1, 3), (2, 1), (3, 2)):
+        system.rent_vehicle(vid, "Cliente", str(vid), "", dias, 10.0)
+        ids.append(system.last_rental_id)
+    assert [r["rental_id"] for r in system.list_open_rentals()] == ids
+    agora = datetime.datetime.now()
+    assert system.list_overdue_rentals(agora) == []
+    depois = agora + datetime.timedelta(days=2, hours=12)
+    assert [r["rental_id"] for r in system.list_overdue_rentals(depois)] == [ids[1], ids[2]]
+    system.return_vehicle(ids[1])
+    assert [r["rental_id"] for r in system.list_overdue_rentals(depois)] == [ids[2]]
+    assert [r["rental_id"] for r in system.list_open_rentals()] == [ids[0], ids[2]]
+    assert [r["rental_id"] for r in system.list_overdue_rentals(agora + datetime.timedelta(days=4))] \
+        == [ids[2], ids[0]]
+    system.close()
+
+# ------------------ Índice por data de retirada ------------------
+def test_consultas_por_periodo_batem_com_a_varredura(tmp_path):
+    system = _sistema(tmp_path)
+    rng = random.Random(5)
+    agora = datetime.datetime.now()
+    linhas = []
+    for vid in (1, 2, 3):
+        retirada = agora - datetime.timedelta(days=40, minutes=rng.randrange(600))
+        while retirada < agora - datetime.timedelta(days=2):
+            linhas.append(_linha(vid, str(rng.randrange(4)), retirada))
+            retirada += datetime.timedelta(days=1, minutes=rng.randrange(1, 2000))
+    system.import_rentals(linhas)
+    alugueis = sorted(system.rentals, key=lambda r: r["data_retirada"])
+    for _ in range(20):
+        a = agora - datetime.timedelta(minutes=rng.randrange(45 * 1440))
+        b = a + datetime.timedelta(minutes=rng.randrange(20 * 1440))
+        esperado = [r["rental_id"] for r in alugueis if a <= r["data_retirada"] < b]
+        assert sorted(r["rental_id"] for r in system.rentals_between(a, b)) == sorted(esperado)
+    sete_dias = agora - datetime.timedelta(days=7)
+    assert sorted(r["rental_id"] for (r, _) in system.list_rentals_last_7_days()) == \
+        sorted(r["rental_id"] for r in alugueis if r["data_retirada"] >= sete_dias)
+    inicio_semana = (agora - datetime.timedelta(days=agora.weekday())).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    assert sorted(r["rental_id"] for (r, _) in system.list_rentals_current_week()) == \
+        sorted(r["rental_id"] for r in alugueis
+               if inicio_semana <= r["data_retirada"] < inicio_semana + datetime.timedelta(days=7))
+    (labels, values) = system.get_7days_faturamento()
+    assert len(labels) == 7 and labels[-1] == agora.strftime("%d/%m")
+    assert sum(values) == sum(r["valor_total"] for r in alugueis
+                              if r["data_retirada"].date() > (agora - datetime.timedelta(days=7)).date())
+    system.close()
+
+# ------------------ Linha de comando ------------------
+def test_importar_o_sistema_nao_carrega_a_interface():
+    codigo = ("import sys, sistema_de_alugueis; "
+              "print(any(m.split('.')[0] in ('tkinter', 'matplotlib') for m in sys.modules))")
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                           cwd=os.path.dirname(sistema_de_alugueis.__file__))
+    assert saida.stdout.strip() == "False"
+
+def test_linha_de_comando_sem_interface(tmp_path, capsys):
+    _sistema(tmp_path, veiculos=1).close()
+    arquivo = str(tmp_path / "dados.json")
+    assert main(["--arquivo", arquivo, "rent", "1", "--cliente", "Ana", "--cpf", "111",
+                 "--dias", "2", "--valor-dia", "50"]) == 0
+    assert capsys.readouterr().out.startswith("Aluguel realizado")
+    assert main(["--arquivo", arquivo, "list-open"]) == 0
+    assert "Cliente: Ana | CPF: 111" in capsys.readouterr().out
+    assert main(["--arquivo", arquivo, "stats"]) == 0
+    assert "111: 1" in capsys.readouterr().out
+    assert main(["--arquivo", arquivo, "return", "1"]) == 0
+    assert capsys.readouterr().out.startswith("Devolução realizada")
+    assert main(["--arquivo", arquivo, "--senha", "errada", "return", "1"]) == 1
+
+# ------------------ Listagens paginadas ------------------
+def test_paginas_das_listagens(tmp_path):
+    system = _sistema(tmp_path, veiculos=7)
+    for vid in (2, 4, 6):
+        system.rent_vehicle(vid, "Cliente", str(vid), "", 1, 10.0)
+    assert system.count_vehicles() == 7
+    assert [v["id"] for v in system.list_vehicles_page(2, 3)] == [3, 4, 5]
+    assert [v["id"] for v in system.list_vehicles_page(5)] == [6, 7]
+    assert system.list_vehicles_page(10, 3) == []
+    assert system.count_open_rentals() == 3
+    assert [r["vehicle_id"] for r in system.list_open_rentals_page(1, 5)] == [4, 6]
+    system.close()
+
+# ------------------ Importação e exportação em lote ------------------
+def test_importacao_e_exportacao_ida_e_volta(tmp_path):
+    system = _sistema(tmp_path, veiculos=1)
+    msg = system.import_vehicles([{"nome": "Gol", "marca": "VW", "ano": "2020", "placa": "ABC1234"},
+                                  {"nome": "Uno", "marca": "Fiat", "ano": "2019", "placa": "abc1234"},
+                                  {"nome": "Ka", "marca": "Ford", "ano": "2018", "placa": "plc0000"}],
+                                 batch_size=1)
+    assert msg.startswith("1 veículos importados.\n2 linhas ignoradas:")
+    retirada = datetime.datetime(2024, 5, 1, 10, 0)
+    msg = system.import_rentals([_linha(2, "111", retirada), _linha(1, "222", retirada, devolvido=False),
+                                 _linha(9, "333", retirada)])
+    assert msg.startswith("2 aluguéis importados.\n1 linhas ignoradas:")
+    assert system.get_vehicle(1)["disponivel"] is False
+    for ext in (".csv", ".jsonl"):
+        for tipo in ("veiculos", "alugueis"):
+            assert export_file(system, tipo, str(tmp_path / f"{tipo}{ext}")) == 2
+    esperado = [rental_to_json(r) for r in system.rentals]
+    system.close()
+
+    for ext in (".csv", ".jsonl"):
+        outro = CarRentalSystem(str(tmp_path / f"outro{ext}.json"))
+        outro.login("admin", "admin")
+        assert import_file(outro, "veiculos", str(tmp_path / f"veiculos{ext}")) == "2 veículos importados."
+        assert import_file(outro, "alugueis", str(tmp_path / f"alugueis{ext}")) == "2 aluguéis importados."
+        assert [rental_to_json(r) for r in outro.rentals] == esperado
+        outro.close()
@@ -0,0 +1,102 @@
+import datetime
+import random
+
+import pytest
+
+from utilizacao import calcular_utilizacao, limites_periodos
+
+UMA_HORA = datetime.timedelta(hours=1)
+
+def _horas(inicio, fim):
+    return int((fim - inicio) / UMA_HORA)
+
+def _por_hora(intervalos, vehicle_ids, inicio, fim, limites):
+    # Contagem hora a hora, com todos os extremos em horas cheias
+    total = _horas(inicio, fim)
+    ocupadas = {vid: [False] * total for vid in vehicle_ids}
+    for (vid, retirada, devolucao) in intervalos:
+        a = max(_horas(inicio, retirada), 0)
+        b = total if devolucao is None else min(_horas(inicio, devolucao), total)
+        for h in range(a, b):
+            ocupadas[vid][h] = True
+    esperado = {}
+    for (vid, horas) in ocupadas.items():
+        ocupacao = []
+        for (p_ini, p_fim) in zip(limites, limites[1:]):
+            (a, b) = (_horas(inicio, p_ini), _horas(inicio, p_fim))
+            ocupacao.append(100.0 * sum(horas[a:b]) / (b - a))
+        # Lacunas: trechos máximos de horas livres
+        lacunas = []
+        h = 0
+        while h < total:
+            if horas[h]:
+                h += 1
+                continue
+            fim_lacuna = h
+            while fim_lacuna < total and not horas[fim_lacuna]:
+                fim_lacuna += 1
+            lacunas.append((h, fim_lacuna))
+            h = fim_lacuna
+        maior = max(lacunas, key=lambda g: g[1] - g[0], default=None)
+        esperado[vid] = {
+            "ocupacao": ocupacao,
+            "horas_alugado": sum(horas),
+            "horas_ocioso": total - sum(horas),
+            "lacunas": len(lacunas),
+            "maior_lacuna": None if maior is None else (inicio + maior[0] * UMA_HORA,
+                                                        inicio + maior[1] * UMA_HORA),
+        }
+    return esperado
+
+@pytest.mark.parametrize("periodo", ["dia", "semana", "mes"])
+def test_varredura_igual_a_contagem_hora_a_hora(periodo):
+    rng = random.Random(3)
+    inicio = datetime.datetime(2024, 1, 10, 6)
+    fim = datetime.datetime(2024, 3, 20, 18)
+    vehicle_ids = list(range(1, 13))
+    intervalos = []
+    for _ in range(150):
+        # Sobrepostos, contidos, cortados pelas pontas e em aberto
+        retirada = inicio + rng.randint(-200, _horas(inicio, fim) + 50) * UMA_HORA
+        devolucao = None if rng.random() < 0.05 else retirada + rng.randint(1, 400) * UMA_HORA
+        intervalos.append((rng.choice(vehicle_ids[:-2]), retirada, devolucao))
+    limites = limites_periodos(inicio, fim, periodo)
+    relatorio = calcular_utilizacao(intervalos, vehicle_ids, inicio, fim, periodo)
+    esperado = _por_hora(intervalos, vehicle_ids, inicio, fim, limites)
+
+    assert relatorio["periodos"] == limites[:-1]
+    assert set(relatorio["veiculos"]) == set(vehicle_ids)
+    for (vid, e) in esperado.items():
+        v = relatorio["veiculos"][vid]
+        assert list(v["ocupacao"]) == pytest.approx(e["ocupacao"])
+        assert v["horas_alugado"] == pytest.approx(e["horas_alugado"])
+        assert v["horas_ocioso"] == pytest.approx(e["horas_ocioso"])
+        assert v["lacunas"] == e["lacunas"]
+        assert v["maior_lacuna"] == e["maior_lacuna"]
+    frota = [sum(e["ocupacao"][k] for e in esperado.values()) / len(vehicle_ids)
+             for k in range(len(limites) - 1)]
+    assert relatorio["frota"] == pytest.approx(frota)
+
+def test_limites_dos_periodos():
+    inicio = datetime.datetime(2024, 1, 31, 12)
+    fim = datetime.datetime(2024, 3, 5)
+    assert limites_periodos(inicio, fim, "mes") == [
+        inicio, datetime.datetime(2024, 2, 1), datetime.datetime(2024, 3, 1), fim]
+    # Semanas começam na segunda-feira (2024-02-05 foi uma segunda)
+    semanas = limites_periodos(inicio, fim, "semana")
+    assert semanas[1] == datetime.datetime(2024, 2, 5)
+    assert all(b.weekday() == 0 and b - a == datetime.timedelta(days=7)
+               for (a, b) in zip(semanas[1:-2], semanas[2:-1]))
+    assert len(limites_periodos(inicio, fim, "dia")) == 35
+    with pytest.raises(ValueError):
+        limites_periodos(inicio, fim, "ano")
+
+def test_veiculo_sem_aluguel_fica_ocioso_o_periodo_todo():
+    inicio = datetime.datetime(2024, 5, 1)
+    fim = datetime.datetime(2024, 5, 3)
+    relatorio = calcular_utilizacao([], [7], inicio, fim)
+    v = relatorio["veiculos"][7]
+    assert list(v["ocupacao"]) == [0.0, 0.0]
+    assert (v["lacunas"], v["maior_lacuna"]) == (1, (inicio, fim))
+    with pytest.raises(ValueError):
+        calcular_utilizacao([], [7], fim, inicio)
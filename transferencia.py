@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+
+from armazenamento import RENTAL_FIELDS, rental_to_json, write_atomic
+from sistema_de_alugueis import IMPORT_BATCH_SIZE
+
+# ---------------------------------------------------------------------------------------
+# Importação e exportação em lote (CSV e JSONL)
+# ---------------------------------------------------------------------------------------
+# O formato é escolhido pela extensão do arquivo. Os arquivos são lidos e gravados
+# linha a linha, sem carregar o arquivo inteiro na memória.
+FORMATOS = (".csv", ".jsonl")
+
+CAMPOS = {
+    "usuarios": ("username", "password", "role"),
+    "veiculos": ("id", "nome", "marca", "ano", "placa", "disponivel"),
+    "alugueis": RENTAL_FIELDS,
+}
+
+def _formato(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATOS:
+        raise ValueError(f"Formato não suportado: {ext or path}. Use {', '.join(FORMATOS)}.")
+    return ext
+
+def read_rows(path):
+    """
+    Gera os registros (dicts) de um arquivo CSV (com cabeçalho) ou JSONL.
+    Em CSV, campos vazios viram None.
+    """
+    formato = _formato(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if formato == ".csv":
+            for row in csv.DictReader(f):
+                yield {k: (v if v != "" else None) for (k, v) in row.items()}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def write_rows(path, campos, rows):
+    """
+    Grava os registros em CSV ou JSONL de forma atômica. Retorna quantos foram gravados.
+    """
+    formato = _formato(path)
+    total = 0
+
+    def write(f):
+        nonlocal total
+        if formato == ".csv":
+            writer = csv.DictWriter(f, fieldnames=campos, lineterminator="\n", extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                total += 1
+        else:
+            for row in rows:
+                f.write(json.dumps({k: row[k] for k in campos}, ensure_ascii=False) + "\n")
+                total += 1
+
+    write_atomic(path, write)
+    return total
+
+def import_file(system, tipo, path, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importa "usuarios", "veiculos" ou "alugueis" de um arquivo para o sistema
+    (requer admin logado). Retorna a mensagem de resultado.
+    """
+    metodos = {"usuarios": system.import_users,
+               "veiculos": system.import_vehicles,
+               "alugueis": system.import_rentals}
+    if tipo not in metodos:
+        return f"Tipo inválido: {tipo}. Use {', '.join(metodos)}."
+    return metodos[tipo](read_rows(path), batch_size=batch_size)
+
+def export_file(system, tipo, path):
+    """
+    Exporta "usuarios", "veiculos" ou "alugueis" para um arquivo.
+    Retorna a quantidade de registros gravados.
+    """
+    if tipo == "usuarios":
+        rows = system.users
+    elif tipo == "veiculos":
+        rows = system.list_vehicles()
+    elif tipo == "alugueis":
+        rows = (rental_to_json(r) for r in system.all_rentals())
+    else:
+        raise ValueError(f"Tipo inválido: {tipo}. Use {', '.join(CAMPOS)}.")
+    return write_rows(path, CAMPOS[tipo], rows)
@@ -0,0 +1,145 @@
+import bisect
+import datetime
+from array import array
+
+# ---------------------------------------------------------------------------------------
+# Utilização da frota - varredura (sweep line) sobre os intervalos de aluguel
+# ---------------------------------------------------------------------------------------
+# Os intervalos [retirada, devolução) são ordenados por (veículo, retirada) uma única
+# vez e percorridos em sequência: para cada veículo, um cursor marca o fim do último
+# trecho alugado. Trechos sobrepostos são unidos, o espaço entre o cursor e a próxima
+# retirada é uma lacuna ociosa e cada trecho alugado é repartido entre os períodos
+# (dia, semana ou mês) que atravessa. Nada é recontado por período.
+PERIODOS = ("dia", "semana", "mes")
+UM_SEGUNDO = datetime.timedelta(seconds=1)
+
+def inicio_do_periodo(dt, periodo):
+    dia = datetime.datetime(dt.year, dt.month, dt.day)
+    if periodo == "dia":
+        return dia
+    if periodo == "semana":
+        return dia - datetime.timedelta(days=dia.weekday())
+    return dia.replace(day=1)
+
+def proximo_periodo(inicio, periodo):
+    if periodo == "dia":
+        return inicio + datetime.timedelta(days=1)
+    if periodo == "semana":
+        return inicio + datetime.timedelta(days=7)
+    return (inicio.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+def limites_periodos(inicio, fim, periodo):
+    """
+    Retorna [inicio, p1, ..., fim]: as fronteiras dos períodos entre inicio e fim
+    (o primeiro e o último período podem ser parciais).
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo!r}. Use {', '.join(PERIODOS)}.")
+    limites = [inicio]
+    p = proximo_periodo(inicio_do_periodo(inicio, periodo), periodo)
+    while p < fim:
+        limites.append(p)
+        p = proximo_periodo(p, periodo)
+    limites.append(fim)
+    return limites
+
+def calcular_utilizacao(intervalos, vehicle_ids, inicio, fim, periodo="dia"):
+    """
+    `intervalos`: iterável de (vehicle_id, retirada, devolução), com devolução
+    None para aluguéis em aberto (contam até `fim`). Retorna um dict com:
+      - periodos: início de cada período; frota: % da frota alugada em cada um
+      - ocupacao_frota: % do tempo total da frota em aluguel
+      - veiculos: {vehicle_id: {"ocupacao": array de % por período, "ocupacao_total",
+        "horas_alugado", "horas_ocioso", "lacunas" (quantidade), "maior_lacuna"
+        ((inicio, fim) ou None)}}, para todos os `vehicle_ids` e os que aparecem
+        nos intervalos.
+    Custa O(n log n) na ordenação mais O(n + trechos × períodos atravessados).
+    """
+    if fim <= inicio:
+        raise ValueError("O fim do relatório deve ser depois do início.")
+    limites = limites_periodos(inicio, fim, periodo)
+    fronteiras = [(b - inicio) / UM_SEGUNDO for b in limites]   # segundos desde `inicio`
+    total = fronteiras[-1]
+    n_periodos = len(limites) - 1
+
+    itens = []
+    for (vid, retirada, devolucao) in intervalos:
+        if retirada >= fim or (devolucao is not None and devolucao <= inicio):
+            continue
+        s = (retirada - inicio) / UM_SEGUNDO if retirada > inicio else 0.0
+        e = total if devolucao is None or devolucao >= fim else (devolucao - inicio) / UM_SEGUNDO
+        if e > s:
+            itens.append((vid, s, e))
+    itens.sort()
+
+    veiculos = {}
+    frota = array("d", bytes(8 * n_periodos))   # segundos alugados da frota por período
+
+    def fechar(vid, ocupado, cursor, ociosas, maior):
+        # Lacuna final (do último trecho alugado até o fim do relatório)
+        if total > cursor:
+            ociosas.append(total - cursor)
+            if maior is None or total - cursor > maior[1] - maior[0]:
+                maior = (cursor, total)
+        alugado = sum(ocupado)
+        veiculos[vid] = {
+            "ocupacao": array("d", (100.0 * ocupado[k] / (fronteiras[k + 1] - fronteiras[k])
+                                    for k in range(n_periodos))),
+            "ocupacao_total": 100.0 * alugado / total if total else 0.0,
+            "horas_alugado": alugado / 3600,
+            "horas_ocioso": sum(ociosas) / 3600,
+            "lacunas": len(ociosas),
+            "maior_lacuna": None if maior is None else (inicio + maior[0] * UM_SEGUNDO,
+                                                        inicio + maior[1] * UM_SEGUNDO),
+        }
+        for k in range(n_periodos):
+            frota[k] += ocupado[k]
+
+    vid_atual = None
+    ocupado = None
+    for (vid, s, e) in itens:
+        if vid != vid_atual:
+            if vid_atual is not None:
+                fechar(vid_atual, ocupado, cursor, ociosas, maior)
+            vid_atual = vid
+            ocupado = array("d", bytes(8 * n_periodos))
+            (cursor, ociosas, maior) = (0.0, [], None)
+        if e <= cursor:
+            continue              # contido em um trecho já contado
+        if s < cursor:
+            s = cursor            # sobreposição: conta só a parte nova
+        elif s > cursor:
+            ociosas.append(s - cursor)
+            if maior is None or s - cursor > maior[1] - maior[0]:
+                maior = (cursor, s)
+        cursor = e
+        k = bisect.bisect_right(fronteiras, s) - 1
+        while True:
+            limite = fronteiras[k + 1]
+            if e <= limite:
+                ocupado[k] += e - s
+                break
+            ocupado[k] += limite - s
+            s = limite
+            k += 1
+    if vid_atual is not None:
+        fechar(vid_atual, ocupado, cursor, ociosas, maior)
+
+    vazio = array("d", bytes(8 * n_periodos))
+    for vid in vehicle_ids:
+        if vid not in veiculos:
+            fechar(vid, vazio, 0.0, [], None)
+
+    n_veiculos = len(veiculos)
+    duracoes = [fronteiras[k + 1] - fronteiras[k] for k in range(n_periodos)]
+    return {
+        "inicio": inicio,
+        "fim": fim,
+        "periodo": periodo,
+        "periodos": limites[:-1],
+        "frota": [100.0 * frota[k] / (duracoes[k] * n_veiculos) if n_veiculos else 0.0
+                  for k in range(n_periodos)],
+        "ocupacao_frota": (100.0 * sum(frota) / (total * n_veiculos)
+                           if n_veiculos and total else 0.0),
+        "veiculos": veiculos,
+    }